@@ -0,0 +1,71 @@
+#rankings, group-bys and filtered counts on seeded catalogues of several sizes: the orm (sql) path against the
+#in-memory numpy columns of movies/analytics.py, whose one-off load time is reported separately
+#usage: python benchmarks/analytics_bench.py --sizes 1000 10000 100000
+import argparse
+import time
+
+from common import temporary_database
+
+from django.db.models import Avg, Count, Sum
+from movies.analytics import Catalogue
+from movies.factories import seed_catalogue
+from movies.leaderboards import top_directors
+from movies.models import Movie, MovieGenre
+
+
+def best_time(function, repeat):
+    #best wall time in ms over repeat calls, and the last result
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+def workloads(catalogue):
+    #(label, orm callable, numpy callable); both sides return comparable values
+    return [
+        ('top 10 movies by gross',
+         lambda: list(Movie.objects.order_by('-gross', 'id').values_list('id', flat=True)[:10]),
+         lambda: [pk for pk, _, _ in catalogue.top_movies('gross', 10)]),
+        ('top 10 movies by imdb, 2000-2010',
+         lambda: list(Movie.objects.filter(year__range=(2000, 2010)).order_by('-imdb_score', 'id').values_list('id', flat=True)[:10]),
+         lambda: [pk for pk, _, _ in catalogue.top_movies('imdb_score', 10, year_from=2000, year_to=2010)]),
+        ('average imdb by genre',
+         lambda: {row['genre__name']: round(row['value'], 6) for row in MovieGenre.objects.values('genre__name').annotate(value=Avg('movie__imdb_score'))},
+         lambda: {name: round(value, 6) for name, value in catalogue.group_by('genre', 'imdb_score').items()}),
+        ('total gross by year',
+         lambda: {row['year']: row['value'] for row in Movie.objects.values('year').annotate(value=Sum('gross'))},
+         lambda: catalogue.group_by('year', 'gross', 'sum')),
+        ('movie count by language',
+         lambda: {row['language__name']: row['value'] for row in Movie.objects.values('language__name').annotate(value=Count('id'))},
+         lambda: catalogue.group_by('language', aggregate='count')),
+        ('count of drama since 2000',
+         lambda: Movie.objects.filter(year__gte=2000, genres__name='Drama').count(),
+         lambda: catalogue.count(year_from=2000, genre='Drama')),
+        ('top 10 directors by gross',
+         lambda: sorted(director.total_gross for director in top_directors('total_gross')),
+         lambda: sorted(value for _, _, value in catalogue.top_directors('total_gross'))),
+    ]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Analytics queries: orm against in-memory numpy columns.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--repeat', type=int, default=5, help='calls per query, the best time is kept')
+    args = parser.parse_args()
+
+    with temporary_database():
+        seeded = 0
+        for size in sorted(args.sizes):
+            seed_catalogue(size - seeded, seed=size)
+            seeded = size
+            load_ms, catalogue = best_time(Catalogue, 1)
+            print(f"\n{size} movies, numpy load {load_ms:.0f} ms")
+            print(f"{'query':<36} {'orm ms':>10} {'numpy ms':>10} {'speedup':>8}")
+            for label, orm, numpy in workloads(catalogue):
+                orm_ms, expected = best_time(orm, args.repeat)
+                numpy_ms, result = best_time(numpy, args.repeat)
+                assert result == expected, label
+                print(f"{label:<36} {orm_ms:>10.2f} {numpy_ms:>10.2f} {orm_ms / numpy_ms:>7.0f}x")
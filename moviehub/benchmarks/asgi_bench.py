@@ -0,0 +1,124 @@
+#throughput and latency percentiles of the read-only api under concurrent requests, served three ways:
+#the sync DRF views through the wsgi application on a thread pool (like gunicorn --threads), and the sync
+#and async views through the asgi application on one event loop (like uvicorn). the applications are
+#driven in-process, without sockets, so the numbers compare the serving paths rather than an http server
+#usage: python benchmarks/asgi_bench.py --movies 10000 --requests 2000 --concurrency 1 8 32
+import argparse
+import asyncio
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+from wsgiref.util import setup_testing_defaults
+
+from common import temporary_database
+
+from django.core.asgi import get_asgi_application
+from django.core.wsgi import get_wsgi_application
+from django.db import connections
+from movies.cache import clear_caches
+from movies.factories import seed_catalogue
+from movies.models import Director, Movie
+
+#(sync path, async path) pairs, the leaderboards hit the cache after their first request
+def endpoints():
+    movie = Movie.objects.order_by('id').values_list('id', flat=True).first()
+    director = Director.objects.order_by('-stats__movie_count', 'id').values_list('id', flat=True).first()
+    return [
+        (f'/api/{path}', f'/api/async/{path}') for path in (
+            'movies/', 'movies/?page=3', f'movies/{movie}/', 'directors/', 'actors/?page=2',
+            'movies/top_grossing/', f'directors/{director}/actors/', 'directors/top_by_imdb/', 'directors/top_versatile/',
+        )
+    ]
+
+
+def summary(label, concurrency, latencies, elapsed):
+    latencies = sorted(latencies)
+    percentile = lambda p: latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000
+    print(f"{label:<18} {concurrency:>11} {len(latencies) / elapsed:>10.0f} {percentile(0.5):>9.2f} {percentile(0.99):>9.2f}")
+
+
+def wsgi_request(application, path):
+    path, _, query = path.partition('?')
+    environ = {'PATH_INFO': path, 'QUERY_STRING': query, 'HTTP_ACCEPT': 'application/json', 'wsgi.input': io.BytesIO()}
+    setup_testing_defaults(environ)
+    start = time.perf_counter()
+    body = b''.join(application(environ, lambda status, headers, exc_info=None: None))
+    assert body
+    return time.perf_counter() - start
+
+
+def run_wsgi(paths, requests, concurrency):
+    application = get_wsgi_application()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(lambda i: wsgi_request(application, paths[i % len(paths)]), range(requests)))
+    return latencies, time.perf_counter() - start
+
+
+async def asgi_request(application, path):
+    path, _, query = path.partition('?')
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET', 'scheme': 'http',
+        'path': path, 'raw_path': path.encode(), 'query_string': query.encode(), 'root_path': '',
+        'headers': [(b'host', b'localhost'), (b'accept', b'application/json')],
+        'client': ('127.0.0.1', 0), 'server': ('localhost', 80),
+    }
+    messages = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+    status, done = [], asyncio.Event()
+
+    async def receive():
+        #django listens for a client disconnect while the view runs, the client stays until the response is sent
+        if messages:
+            return messages.pop()
+        await done.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status.append(message['status'])
+        elif not message.get('more_body'):
+            done.set()
+
+    start = time.perf_counter()
+    await application(scope, receive, send)
+    assert status == [200], (path, status)
+    return time.perf_counter() - start
+
+
+async def run_asgi(paths, requests, concurrency):
+    application = get_asgi_application()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited(i):
+        async with semaphore:
+            return await asgi_request(application, paths[i % len(paths)])
+
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(limited(i) for i in range(requests)))
+    return latencies, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Concurrent read throughput: wsgi sync views against asgi sync and async views.')
+    parser.add_argument('--movies', type=int, default=10000)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32])
+    args = parser.parse_args()
+
+    with temporary_database():
+        seed_catalogue(args.movies)
+        pairs = endpoints()
+        sync_paths, async_paths = [sync for sync, _ in pairs], [async_path for _, async_path in pairs]
+        connections.close_all()
+        print(f"{args.movies} movies, {args.requests} requests over {len(pairs)} endpoints")
+        print(f"{'path':<18} {'concurrency':>11} {'req/s':>10} {'p50 ms':>9} {'p99 ms':>9}")
+        for concurrency in args.concurrency:
+            for label, run in (
+                ('wsgi sync views', lambda: run_wsgi(sync_paths, args.requests, concurrency)),
+                ('asgi sync views', lambda: asyncio.run(run_asgi(sync_paths, args.requests, concurrency))),
+                ('asgi async views', lambda: asyncio.run(run_asgi(async_paths, args.requests, concurrency))),
+            ):
+                clear_caches()
+                latencies, elapsed = run()
+                summary(label, concurrency, latencies, elapsed)
+                connections.close_all()
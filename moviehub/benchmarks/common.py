@@ -0,0 +1,77 @@
+#shared helpers for the benchmark scripts in this directory
+#every script is run from the moviehub directory, e.g. `python benchmarks/ingest_bench.py`
+import contextlib
+import csv
+import os
+import random
+import sys
+import tempfile
+import django
+
+#make the project importable and set up Django environment
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'moviehub.settings')
+django.setup()
+
+from django.conf import settings
+from django.db import connection
+
+GENRES = [
+    'Action', 'Adventure', 'Animation', 'Biography', 'Comedy', 'Crime', 'Documentary', 'Drama', 'Family',
+    'Fantasy', 'History', 'Horror', 'Music', 'Musical', 'Mystery', 'Romance', 'Sci-Fi', 'Sport', 'Thriller', 'War',
+]
+LANGUAGES = ['English', 'French', 'Spanish', 'German', 'Hindi', 'Mandarin', 'Japanese', 'Italian']
+COUNTRIES = ['USA', 'UK', 'France', 'Germany', 'India', 'China', 'Japan', 'Canada', 'Spain', 'Italy']
+RATINGS = ['G', 'PG', 'PG-13', 'R', 'NC-17', 'Not Rated']
+
+#columns of movie_metadata.csv that load_data.py reads
+CSV_HEADER = [
+    'director_name', 'duration', 'actor_2_name', 'gross', 'genres', 'actor_1_name', 'movie_title',
+    'actor_3_name', 'language', 'country', 'content_rating', 'budget', 'title_year', 'imdb_score',
+]
+
+
+def write_synthetic_csv(path, rows, seed=0):
+    #write a csv in the movie_metadata.csv layout with roughly one director per 5 movies and one actor per movie
+    rng = random.Random(seed)
+    directors = max(1, rows // 5)
+    actors = max(3, rows)
+    with open(path, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(CSV_HEADER)
+        for i in range(rows):
+            cast = rng.sample(range(actors), 3)
+            writer.writerow([
+                f'Director {rng.randrange(directors)}',
+                rng.randint(60, 240),
+                f'Actor {cast[1]}',
+                rng.randint(10_000, 800_000_000),
+                '|'.join(rng.sample(GENRES, rng.randint(1, 4))),
+                f'Actor {cast[0]}',
+                f'Synthetic Movie {i}\xa0',
+                f'Actor {cast[2]}',
+                rng.choice(LANGUAGES),
+                rng.choice(COUNTRIES),
+                rng.choice(RATINGS),
+                rng.randint(100_000, 300_000_000),
+                rng.randint(1920, 2016),
+                round(rng.uniform(1.0, 9.9), 1),
+            ])
+
+
+@contextlib.contextmanager
+def temporary_database(in_memory=False):
+    #create a migrated throwaway database (a temp file by default, like a real deployment) and drop it afterwards
+    #so benchmarks never touch db.sqlite3
+    handle, path = tempfile.mkstemp(suffix='.sqlite3')
+    os.close(handle)
+    os.remove(path)
+    if not in_memory:
+        settings.DATABASES['default'].setdefault('TEST', {})['NAME'] = path
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        if os.path.exists(path):
+            os.remove(path)
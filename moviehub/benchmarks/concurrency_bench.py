@@ -0,0 +1,119 @@
+#read latency under a concurrent writer, per database profile (MOVIEHUB_DB_PROFILES in settings.py): reader
+#threads request movie pages through the wsgi application (like gunicorn --threads), first alone and then
+#while a load_data.py bulk import writes to the same database. the import runs in its own process, as it
+#would in production, so the readers wait on sqlite's locks and not on the GIL
+#usage: python benchmarks/concurrency_bench.py --movies 10000 --import-rows 30000 --readers 4
+import argparse
+import io
+import multiprocessing
+import os
+import random
+import tempfile
+import threading
+import time
+from wsgiref.util import setup_testing_defaults
+
+from common import temporary_database, write_synthetic_csv
+
+from django.conf import settings
+from django.core.wsgi import get_wsgi_application
+from django.db import connections
+from movies.factories import seed_catalogue
+from movies.models import Movie
+
+
+def apply_profile(name):
+    #switch the running process to a profile; connections opened afterwards use it
+    profile = settings.MOVIEHUB_DB_PROFILES[name]
+    settings.MOVIEHUB_SQLITE_PRAGMAS = profile['PRAGMAS']
+    settings.DATABASES['default']['CONN_MAX_AGE'] = profile['CONN_MAX_AGE']
+    settings.DATABASES['default']['CONN_HEALTH_CHECKS'] = profile.get('CONN_HEALTH_CHECKS', False)
+    connections.close_all()
+
+
+def run_import(database, profile, csv_path):
+    #the writer process: a bulk import into the benchmark's database
+    import load_data
+    settings.DATABASES['default']['NAME'] = database
+    apply_profile(profile)
+    load_data.bulk_load_data(csv_path)
+
+
+def request(application, path):
+    #(latency, status) of one GET
+    path, _, query = path.partition('?')
+    environ = {'PATH_INFO': path, 'QUERY_STRING': query, 'HTTP_ACCEPT': 'application/json', 'wsgi.input': io.BytesIO()}
+    setup_testing_defaults(environ)
+    status = []
+    start = time.perf_counter()
+    b''.join(application(environ, lambda code, headers, exc_info=None: status.append(int(code.split()[0]))))
+    return time.perf_counter() - start, status[0]
+
+
+def read_until(application, paths, stop, results, seed):
+    rng = random.Random(seed)
+    while not stop.is_set():
+        results.append(request(application, rng.choice(paths)))
+    #the thread's own persistent connection
+    connections.close_all()
+
+
+def read_phase(paths, readers, until):
+    #latencies and statuses of every read made by the reader threads until until() returns
+    application = get_wsgi_application()
+    stop, results = threading.Event(), []
+    threads = [threading.Thread(target=read_until, args=(application, paths, stop, results, i)) for i in range(readers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    until()
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return results, time.perf_counter() - start
+
+
+def summary(profile, phase, results, elapsed):
+    latencies = sorted(latency for latency, status in results if status == 200)
+    errors = sum(status != 200 for _, status in results)
+    percentile = lambda p: latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000 if latencies else float('nan')
+    print(f"{profile:<12} {phase:<14} {len(results) / elapsed:>8.0f} {percentile(0.5):>8.2f} {percentile(0.99):>8.2f} "
+          f"{latencies[-1] * 1000 if latencies else float('nan'):>9.1f} {errors:>7} {elapsed:>8.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Read latency while a bulk import writes, per database profile.')
+    parser.add_argument('--movies', type=int, default=10000, help='catalogue size before the import')
+    parser.add_argument('--import-rows', type=int, default=30000)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--idle-seconds', type=float, default=5.0, help='length of the read-only phase')
+    parser.add_argument('--profiles', nargs='+', default=list(settings.MOVIEHUB_DB_PROFILES))
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    csv_path = os.path.join(directory, 'import.csv')
+    write_synthetic_csv(csv_path, args.import_rows, seed=1)
+    spawn = multiprocessing.get_context('spawn')
+    print(f"{args.readers} readers, {args.movies} movies, importing {args.import_rows} rows")
+    print(f"{'profile':<12} {'phase':<14} {'reads/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>9} {'errors':>7} {'seconds':>8}")
+    try:
+        for profile in args.profiles:
+            #a new database per profile: WAL mode is stored in the file
+            apply_profile(profile)
+            with temporary_database():
+                seed_catalogue(args.movies)
+                ids = list(Movie.objects.values_list('id', flat=True))
+                paths = [f'/api/movies/{pk}/' for pk in random.Random(0).sample(ids, 200)]
+                paths += [f'/api/movies/?page={page}' for page in range(1, 50)] + [f'/movies/{ids[0]}/']
+                database = settings.DATABASES['default']['NAME']
+                connections.close_all()
+
+                summary(profile, 'reads only', *read_phase(paths, args.readers, lambda: time.sleep(args.idle_seconds)))
+                writer = spawn.Process(target=run_import, args=(database, profile, csv_path))
+                writer.start()
+                summary(profile, 'during import', *read_phase(paths, args.readers, writer.join))
+                if writer.exitcode:
+                    print(f"{profile}: the import failed with exit code {writer.exitcode}")
+    finally:
+        os.remove(csv_path)
+        os.rmdir(directory)
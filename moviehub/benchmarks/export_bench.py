@@ -0,0 +1,64 @@
+#full-catalogue export: rows/sec and peak python memory of the streaming export per format and catalogue size,
+#against walking the paginated /api/movies/ list (the only way to export before), which is measured on the
+#smaller catalogues only since its cost grows with the square of the catalogue
+#usage: python benchmarks/export_bench.py --sizes 10000 100000
+import argparse
+import time
+import tracemalloc
+
+from common import temporary_database
+
+from django.test import Client
+from movies.export import EXPORTERS
+from movies.factories import seed_catalogue
+from movies.models import Movie
+
+#largest catalogue walked page by page
+MAX_PAGED_SIZE = 10000
+
+
+def stream(export_format):
+    #(rows/sec, bytes) of one export through the streaming endpoint
+    client = Client(HTTP_HOST='localhost')
+    start = time.perf_counter()
+    response = client.get(f'/api/movies/export/?format={export_format}')
+    size = sum(len(chunk) for chunk in response.streaming_content)
+    return Movie.objects.count() / (time.perf_counter() - start), size
+
+
+def peak_memory(export_format):
+    #peak traced allocation while the export is consumed, in MB
+    tracemalloc.start()
+    for _ in EXPORTERS[export_format]():
+        pass
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 2 ** 20
+
+
+def paged_walk():
+    #rows/sec of following the next links of /api/movies/
+    client = Client(HTTP_HOST='localhost')
+    start = time.perf_counter()
+    url, rows = '/api/movies/', 0
+    while url:
+        data = client.get(url, HTTP_ACCEPT='application/json').json()
+        rows += len(data['results'])
+        url = data['next']
+    return rows / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Streaming export throughput and memory against the paginated api.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    args = parser.parse_args()
+
+    print(f"{'movies':>8} {'path':<16} {'rows/s':>10} {'MB out':>8} {'peak MB':>8}")
+    for size in args.sizes:
+        with temporary_database():
+            seed_catalogue(size)
+            for export_format in EXPORTERS:
+                rate, output = stream(export_format)
+                print(f"{size:>8} {'export ' + export_format:<16} {rate:>10.0f} {output / 2 ** 20:>8.1f} {peak_memory(export_format):>8.1f}")
+            if size <= MAX_PAGED_SIZE:
+                print(f"{size:>8} {'paged /api/movies/':<16} {paged_walk():>10.0f} {'':>8} {'':>8}")
@@ -0,0 +1,51 @@
+#director and actor detail endpoints: query count and time of an uncached detail for people with 1 to 500
+#movies in a larger catalogue
+#usage: python benchmarks/filmography_bench.py --movies 10000 --filmographies 1 10 100 500
+import argparse
+import time
+
+from common import temporary_database
+
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from movies.cache import clear_caches
+from movies.factories import ActorFactory, DirectorFactory, MovieFactory, seed_catalogue
+from movies.models import Genre
+
+
+def measure(client, url):
+    #(queries, ms) of an uncached request
+    clear_caches()
+    #the query log keeps the last 9000 queries, a full log would hide the new ones
+    connection.queries_log.clear()
+    with CaptureQueriesContext(connection) as queries:
+        start = time.perf_counter()
+        client.get(url)
+        elapsed = time.perf_counter() - start
+    return len(queries), elapsed * 1000
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Query count and time of the director and actor details.')
+    parser.add_argument('--movies', type=int, default=10000, help='catalogue size around the measured people')
+    parser.add_argument('--filmographies', type=int, nargs='+', default=[1, 10, 100, 500])
+    args = parser.parse_args()
+
+    client = Client(HTTP_HOST='localhost')
+    print(f"{'movies':>7} {'director queries':>17} {'director ms':>12} {'actor queries':>14} {'actor ms':>9}")
+    with temporary_database():
+        seed_catalogue(args.movies)
+        genres = list(Genre.objects.all()[:3])
+        #the first request pays for imports and url resolver setup
+        client.get('/api/')
+        for count in args.filmographies:
+            #named apart from the seeded people, whose names are unique
+            director, actor = DirectorFactory(name=f'Bench Director {count}'), ActorFactory(name=f'Bench Actor {count}')
+            for i in range(count):
+                movie = MovieFactory(director=director)
+                movie.actors.add(actor, ActorFactory(name=f'Bench Co-star {count}-{i}'))
+                movie.genres.add(*genres)
+            director_queries, director_ms = measure(client, f'/api/directors/{director.id}/')
+            actor_queries, actor_ms = measure(client, f'/api/actors/{actor.id}/')
+            print(f"{count:>7} {director_queries:>17} {director_ms:>12.2f} {actor_queries:>14} {actor_ms:>9.2f}")
@@ -0,0 +1,44 @@
+#render time of the catalogue pages with their {% cache %} fragments missing (every request after a write)
+#and present (every request until the next write)
+#usage: python benchmarks/fragment_bench.py --sizes 1000 10000 100000
+import argparse
+import time
+
+from common import temporary_database
+
+from django.test import Client
+from django.urls import reverse
+from movies.cache import clear_caches
+from movies.factories import seed_catalogue
+
+PAGES = ['movie_list', 'movies_by_year_genre', 'movies_by_language', 'movies_by_content_rating', 'movies_by_actor']
+
+
+def render_ms(client, url, repeat, cold):
+    #best time of repeat requests, dropping the cached fragments before each one when cold
+    best = float('inf')
+    for _ in range(repeat):
+        if cold:
+            clear_caches()
+        start = time.perf_counter()
+        client.get(url)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Catalogue page render time with and without cached fragments.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    client = Client(HTTP_HOST='localhost')
+    print(f"{'movies':>8} {'page':<26} {'missing ms':>11} {'cached ms':>10}")
+    for size in args.sizes:
+        with temporary_database():
+            seed_catalogue(size)
+            for name in PAGES:
+                url = reverse(name)
+                cold = render_ms(client, url, args.repeat, cold=True)
+                warm = render_ms(client, url, args.repeat, cold=False)
+                print(f"{size:>8} {name:<26} {cold:>11.2f} {warm:>10.2f}")
@@ -0,0 +1,37 @@
+#ingest throughput of load_data.py on a synthetic csv: bulk mode vs the pipeline at several worker counts
+#usage: python benchmarks/ingest_bench.py --rows 300000 --workers 1 2 4 8
+import argparse
+import os
+import tempfile
+import time
+
+from common import temporary_database, write_synthetic_csv
+
+import load_data
+from movies.models import Movie
+
+
+def run(label, loader):
+    with temporary_database():
+        start = time.perf_counter()
+        loaded = loader()
+        elapsed = time.perf_counter() - start
+        assert Movie.objects.count() == loaded
+    print(f"{label:<22} {loaded:>9} rows {elapsed:>8.2f}s {loaded / elapsed:>10.0f} rows/sec")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingest throughput of load_data.py on a synthetic csv.")
+    parser.add_argument('--rows', type=int, default=300_000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--chunk-size', type=int, default=load_data.BATCH_SIZE)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'synthetic.csv')
+        write_synthetic_csv(path, args.rows)
+        print(f"synthetic csv: {args.rows} rows, {os.path.getsize(path) / 1e6:.1f} MB, cpus: {os.cpu_count()}")
+
+        run('bulk (1 process)', lambda: load_data.bulk_load_data(path, batch_size=args.chunk_size))
+        for workers in args.workers:
+            run(f'pipeline {workers} workers', lambda: load_data.pipelined_load_data(path, workers=workers, chunk_size=args.chunk_size))
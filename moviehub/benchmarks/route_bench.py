@@ -0,0 +1,56 @@
+#query count, sql time and wall time of every route against seeded catalogues of several sizes,
+#compared with the checked-in baseline (benchmarks/route_baseline.json)
+#usage: python benchmarks/route_bench.py --sizes 1000 10000 100000 [--update-baseline]
+#exits with status 1 when a route's query count grows with the dataset size or its latency regresses
+import argparse
+import json
+import os
+import sys
+
+from common import temporary_database
+
+from django.test import Client
+from django.test.utils import setup_test_environment
+from movies.factories import seed_catalogue
+from movies.profiling import BASELINE_PATH, latency_regressions, load_baseline, measure_routes, query_count_regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Route query count and latency regression check.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--repeat', type=int, default=3, help='cold requests per route, the best time is kept')
+    parser.add_argument('--tolerance', type=float, default=0.5, help='allowed relative slowdown against the baseline')
+    parser.add_argument('--slack-ms', type=float, default=5.0, help='allowed absolute slowdown against the baseline')
+    parser.add_argument('--baseline', default=str(BASELINE_PATH))
+    parser.add_argument('--update-baseline', action='store_true', help='write the results as the new baseline')
+    args = parser.parse_args()
+
+    setup_test_environment()
+    client = Client()
+    results = {}
+    with temporary_database():
+        seeded = 0
+        for size in sorted(args.sizes):
+            #grow the same catalogue from one size to the next
+            seed_catalogue(size - seeded, seed=size)
+            seeded = size
+            results[str(size)] = measure_routes(client, repeat=args.repeat)
+            print(f"\n{size} movies")
+            print(f"{'route':<42} {'status':>6} {'queries':>8} {'sql ms':>10} {'wall ms':>10}")
+            for name, result in results[str(size)].items():
+                print(f"{name:<42} {result['status']:>6} {result['queries']:>8} {result['sql_ms']:>10.1f} {result['wall_ms']:>10.1f}")
+
+    if args.update_baseline:
+        #sizes that were not measured keep their previous entries, so large sizes can be refreshed on their own
+        baseline = load_baseline(args.baseline) if os.path.exists(args.baseline) else {}
+        baseline.update(results)
+        with open(args.baseline, 'w') as file:
+            json.dump(baseline, file, indent=2, sort_keys=True)
+        print(f"\nbaseline written to {args.baseline}")
+        sys.exit(0)
+
+    baseline = load_baseline(args.baseline)
+    problems = query_count_regressions(results, baseline) + latency_regressions(results, baseline, args.tolerance, args.slack_ms)
+    for problem in problems:
+        print(f"REGRESSION {problem}")
+    sys.exit(1 if problems else 0)
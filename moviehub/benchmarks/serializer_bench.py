@@ -0,0 +1,56 @@
+#rows/sec of the list serialization paths on a seeded catalogue: model instances through a ModelSerializer and
+#DRF's JSONRenderer (before) against values() rows through ValuesSerializer and FastJSONRenderer (after).
+#every run reads the same pages from the database and checks that both paths produce the same bytes
+#usage: python benchmarks/serializer_bench.py --movies 20000 --page-sizes 10 100 1000 --repeat 3
+import argparse
+import time
+
+from common import temporary_database
+
+from rest_framework.renderers import JSONRenderer
+from movies.factories import seed_catalogue
+from movies.fast_serializers import ValuesSerializer
+from movies.models import Director, Movie
+from movies.renderers import FastJSONRenderer
+from movies.serializers import SimpleDirectorSerializer, SimpleMovieSerializer
+
+
+def model_path(serializer_class, queryset):
+    return JSONRenderer().render(serializer_class(queryset, many=True).data)
+
+
+def values_path(serializer_class, queryset):
+    serializer = ValuesSerializer(serializer_class)
+    return FastJSONRenderer().render(serializer.to_representation(serializer.values(queryset)))
+
+
+def rows_per_second(path, serializer_class, queryset, total, page_size, repeat):
+    #serialize `total` rows page by page, as the paginated list endpoints do; best of `repeat` runs
+    best = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        pages = [path(serializer_class, queryset[offset:offset + page_size]) for offset in range(0, total, page_size)]
+        best = max(best, total / (time.perf_counter() - start))
+    return best, pages
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='List serialization throughput: ModelSerializer against values() rows.')
+    parser.add_argument('--movies', type=int, default=20000)
+    parser.add_argument('--page-sizes', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with temporary_database():
+        seed_catalogue(args.movies)
+        cases = [
+            ('movies', SimpleMovieSerializer, Movie.objects.with_relation_ids().order_by('id'), args.movies),
+            ('directors', SimpleDirectorSerializer, Director.objects.order_by('id'), Director.objects.count()),
+        ]
+        print(f"{'endpoint rows':<14} {'page size':>9} {'before rows/s':>14} {'after rows/s':>13} {'speedup':>8}")
+        for label, serializer_class, queryset, total in cases:
+            for page_size in args.page_sizes:
+                before, expected = rows_per_second(model_path, serializer_class, queryset, total, page_size, args.repeat)
+                after, pages = rows_per_second(values_path, serializer_class, queryset, total, page_size, args.repeat)
+                assert pages == expected, label
+                print(f"{label:<14} {page_size:>9} {before:>14.0f} {after:>13.0f} {after / before:>7.1f}x")
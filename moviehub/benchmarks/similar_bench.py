@@ -0,0 +1,60 @@
+#"more like this": time of the full offline rebuild, of the incremental refresh after one movie changed, and of
+#serving a list, from the SimilarMovie table against scoring the movie against the catalogue at request time
+#usage: python benchmarks/similar_bench.py --sizes 10000 100000
+import argparse
+import time
+
+from common import temporary_database
+
+import numpy as np
+from django.test import Client
+from movies.analytics import get_catalogue
+from movies.factories import seed_catalogue
+from movies.models import Actor, Movie
+from movies.similar import Similarity, refresh_similar_movies
+
+REQUESTS = 200
+
+
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def serve_ms(client, movie_ids):
+    start = time.perf_counter()
+    for movie_id in movie_ids:
+        client.get(f'/api/movies/{movie_id}/similar/')
+    return (time.perf_counter() - start) * 1000 / len(movie_ids)
+
+
+def on_the_fly_ms(movie_ids):
+    #the scoring alone, with the feature arrays already built
+    similarity = Similarity(get_catalogue())
+    rows = np.searchsorted(similarity.catalogue.ids, movie_ids)
+    start = time.perf_counter()
+    for row in rows:
+        similarity.neighbours(np.array([row]))
+    return (time.perf_counter() - start) * 1000 / len(movie_ids)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Similar movies: rebuild, incremental refresh and serving time.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    args = parser.parse_args()
+
+    print(f"{'movies':>8} {'rebuild s':>10} {'refresh s':>10} {'refreshed':>10} {'served ms':>10} {'scored ms':>10}")
+    for size in args.sizes:
+        with temporary_database():
+            seed_catalogue(size)
+            rebuild, _ = timed(refresh_similar_movies, rebuild=True)
+
+            movie = Movie.objects.order_by('?').first()
+            movie.actors.add(Actor.objects.order_by('?').first())
+            refresh, (count, _) = timed(refresh_similar_movies)
+
+            sample = list(Movie.objects.order_by('?').values_list('id', flat=True)[:REQUESTS])
+            served = serve_ms(Client(HTTP_HOST='localhost'), sample)
+            scored = on_the_fly_ms(sample[:REQUESTS // 4])
+            print(f"{size:>8} {rebuild:>10.2f} {refresh:>10.2f} {count:>10} {served:>10.2f} {scored:>10.2f}")
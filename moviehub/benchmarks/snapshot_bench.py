@@ -0,0 +1,65 @@
+#size and time of moving a whole catalogue out and back in: the csv export loaded by load_data.py in bulk mode
+#(its fastest csv path) against the parquet snapshot loaded by load_snapshot. each load goes into a fresh
+#empty database
+#usage: python benchmarks/snapshot_bench.py --sizes 10000 100000
+import argparse
+import gzip
+import os
+import shutil
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+from common import temporary_database
+
+import load_data
+from movies.export import iter_csv
+from movies.factories import seed_catalogue
+from movies.snapshot import SNAPSHOT_MODELS, export_snapshot, load_snapshot, snapshot_path
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+
+def write_csv(path):
+    with open(path, 'w', newline='', encoding='utf-8') as file:
+        for chunk in iter_csv():
+            file.write(chunk)
+
+
+def csv_load(path):
+    with redirect_stdout(open(os.devnull, 'w')):
+        load_data.bulk_load_data(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='CSV export/import against parquet snapshots: size and time.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    args = parser.parse_args()
+
+    print(f"{'movies':>8} {'format':<16} {'MB':>7} {'export s':>9} {'import s':>9}")
+    for size in args.sizes:
+        directory = tempfile.mkdtemp()
+        csv_path = os.path.join(directory, 'movies.csv')
+        snapshot = os.path.join(directory, 'snapshot')
+        try:
+            with temporary_database():
+                seed_catalogue(size)
+                csv_export = timed(write_csv, csv_path)
+                snapshot_export = timed(export_snapshot, snapshot)
+            with temporary_database():
+                csv_import = timed(csv_load, csv_path)
+            with temporary_database():
+                snapshot_import = timed(load_snapshot, snapshot)
+
+            with open(csv_path, 'rb') as file:
+                gzipped = len(gzip.compress(file.read()))
+            parquet = sum(os.path.getsize(snapshot_path(snapshot, model)) for model in SNAPSHOT_MODELS)
+            print(f"{size:>8} {'csv':<16} {os.path.getsize(csv_path) / 2 ** 20:>7.1f} {csv_export:>9.2f} {csv_import:>9.2f}")
+            print(f"{size:>8} {'csv (gzipped)':<16} {gzipped / 2 ** 20:>7.1f} {'':>9} {'':>9}")
+            print(f"{size:>8} {'parquet (zstd)':<16} {parquet / 2 ** 20:>7.1f} {snapshot_export:>9.2f} {snapshot_import:>9.2f}")
+        finally:
+            shutil.rmtree(directory)
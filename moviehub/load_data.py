@@ -1,33 +1,96 @@
+import argparse
 import csv
+import hashlib
+import json
+import multiprocessing
 import os
+import time
 import django
 
 #set up Django environment
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'moviehub.settings')
 django.setup()
 
+from django.db import connection, transaction
+
 #import models from movies app (tables to store data)
-from movies.models import Movie, Director, Actor, Genre, Language, Country, ContentRating, MovieActor, MovieGenre
+from movies.models import Movie, Director, Actor, Genre, Language, Country, ContentRating, MovieActor, MovieGenre, MovieFingerprint
+from movies.cache import bump_data_version
+from movies.deletes import delete_movies, delete_pairs
+from movies.export import CSV_COLUMNS
+from movies.similar import mark_similar_stale
+from movies.sqlite import LOOKUP_CHUNK_SIZE
+from movies.stats import refresh_director_stats
 
-def load_data(file_path):
-    #dictionary mapping: internal fields to actual column names in csv
-    required_fields = {
-        'director_name': 'director_name',
-        'language': 'language',
-        'country': 'country',
-        'content_rating': 'content_rating',
-        'movie_title': 'movie_title',
-        'duration': 'duration',
-        'gross': 'gross',
-        'budget': 'budget',
-        'year': 'title_year',
-        'imdb_score': 'imdb_score',
-        'actor_1_name': 'actor_1_name',
-        'actor_2_name': 'actor_2_name',
-        'actor_3_name': 'actor_3_name',
-        'genres': 'genres'
+#dictionary mapping: internal fields to actual column names in csv
+REQUIRED_FIELDS = {
+    'director_name': 'director_name',
+    'language': 'language',
+    'country': 'country',
+    'content_rating': 'content_rating',
+    'movie_title': 'movie_title',
+    'duration': 'duration',
+    'gross': 'gross',
+    'budget': 'budget',
+    'year': 'title_year',
+    'imdb_score': 'imdb_score',
+}
+#the cast and genre columns may be blank: a row needs one actor in actor_1_name, actor_2_name, ..., and
+#may have no genre. the exports (movies/export.py) leave these cells empty for a smaller cast
+GENRES_FIELD = 'genres'
+
+#number of csv rows written per bulk_create batch (and per transaction) in bulk mode
+BATCH_SIZE = 1000
+
+#files read as ndjson exports (movies/export.py), one movie object per line, instead of csv
+NDJSON_SUFFIXES = ('.ndjson', '.jsonl')
+
+#default csv shipped next to this script
+DEFAULT_FILE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'movie_data.csv')
+
+
+def actor_names(row):
+    #the non-blank actor_1_name, actor_2_name, ... cells, the csv export adds a column per actor beyond three
+    names = []
+    number = 1
+    while number <= 3 or f'actor_{number}_name' in row:
+        name = row.get(f'actor_{number}_name', '').strip()
+        if name:
+            names.append(name)
+        number += 1
+    return names
+
+
+def parse_row(row):
+    #only process rows that have all required fields and at least one actor, returns None for incomplete rows
+    if not all(field in row and row[field].strip() != '' for field in REQUIRED_FIELDS.values()):
+        return None
+    actors = actor_names(row)
+    if not actors:
+        return None
+
+    #extract and clean required data for each row
+    #remove whitespace
+    #convert numerical fields (duration, gross, etc) into appropriate types
+    #split genre field into list of genres using split |
+    return {
+        'director_name': row[REQUIRED_FIELDS['director_name']].strip(),
+        'language': row[REQUIRED_FIELDS['language']].strip(),
+        'country': row[REQUIRED_FIELDS['country']].strip(),
+        'content_rating': row[REQUIRED_FIELDS['content_rating']].strip(),
+        'movie_title': row[REQUIRED_FIELDS['movie_title']].strip(),
+        'duration': int(row[REQUIRED_FIELDS['duration']].strip()),
+        'gross': int(row[REQUIRED_FIELDS['gross']].strip()),
+        'budget': int(row[REQUIRED_FIELDS['budget']].strip()),
+        'year': int(row[REQUIRED_FIELDS['year']].strip()),
+        'imdb_score': float(row[REQUIRED_FIELDS['imdb_score']].strip()),
+        'actors': actors,
+        'genres': [genre.strip() for genre in row.get(GENRES_FIELD, '').strip().split('|') if genre.strip()],
     }
-    #open csv file in read mode using dictreader 
+
+
+def load_data(file_path):
+    #open csv file in read mode using dictreader
     with open(file_path, 'r') as file:
         reader = csv.DictReader(file)
 
@@ -37,74 +100,420 @@ def load_data(file_path):
         #iterate over each row and check that required fields are present and not empty
         for i, row in enumerate(reader):
             try:
-                # Only process rows that have all required fields
-                if all(field in row and row[field].strip() != '' for field in required_fields.values()):
-                    #extract and clean required data for each row
-                    #remove whitespace
-                    #convert numerical fields (duration, gross, etc) into appropriate types
-                    #split genre field into list of genres using split |
-                    director_name = row[required_fields['director_name']].strip()
-                    language = row[required_fields['language']].strip()
-                    country = row[required_fields['country']].strip()
-                    content_rating = row[required_fields['content_rating']].strip()
-                    movie_title = row[required_fields['movie_title']].strip()
-                    duration = int(row[required_fields['duration']].strip())
-                    gross = int(row[required_fields['gross']].strip())
-                    budget = int(row[required_fields['budget']].strip())
-                    year = int(row[required_fields['year']].strip())
-                    imdb_score = float(row[required_fields['imdb_score']].strip())
-                    actor_1_name = row[required_fields['actor_1_name']].strip()
-                    actor_2_name = row[required_fields['actor_2_name']].strip()
-                    actor_3_name = row[required_fields['actor_3_name']].strip()
-                    genres = row[required_fields['genres']].strip().split('|')
-
-                    print(f"Processing row {i}: {movie_title}, {director_name}, {year}")
-
-                    #create or get Director, Language, Country, ContentRating instances
-                    director, _ = Director.objects.get_or_create(name=director_name)
-                    language, _ = Language.objects.get_or_create(name=language)
-                    country, _ = Country.objects.get_or_create(name=country)
-                    content_rating, _ = ContentRating.objects.get_or_create(rating=content_rating)
-
-                    #create Movie instance and save to database
-                    movie = Movie(
-                        title=movie_title,
-                        director=director,
-                        duration=duration,
-                        gross=gross,
-                        language=language,
-                        country=country,
-                        content_rating=content_rating,
-                        budget=budget,
-                        year=year,
-                        imdb_score=imdb_score
-                    )
-                    movie.save()
-                    print(f"Saved movie: {movie.title}")
-
-                    # Create or get Actor instances and create many-to-many relationships
-                    actor_1, _ = Actor.objects.get_or_create(name=actor_1_name)
-                    actor_2, _ = Actor.objects.get_or_create(name=actor_2_name)
-                    actor_3, _ = Actor.objects.get_or_create(name=actor_3_name)
-
-                    MovieActor.objects.create(movie=movie, actor=actor_1)
-                    MovieActor.objects.create(movie=movie, actor=actor_2)
-                    MovieActor.objects.create(movie=movie, actor=actor_3)
-                    print(f"Created actors: {actor_1_name}, {actor_2_name}, {actor_3_name}")
-
-                    #split genre string into individual genres
-                    #create Genre instances and create many-to-many relationships
-                    for genre_name in genres:
-                        genre, _ = Genre.objects.get_or_create(name=genre_name.strip())
-                        MovieGenre.objects.create(movie=movie, genre=genre)
-                    print(f"Created genres: {genres}")
+                record = parse_row(row)
+                if record is None:
+                    continue
+
+                movie_title = record['movie_title']
+                director_name = record['director_name']
+                year = record['year']
+                genres = record['genres']
+
+                print(f"Processing row {i}: {movie_title}, {director_name}, {year}")
+
+                #create or get Director, Language, Country, ContentRating instances
+                director, _ = Director.objects.get_or_create(name=director_name)
+                language, _ = Language.objects.get_or_create(name=record['language'])
+                country, _ = Country.objects.get_or_create(name=record['country'])
+                content_rating, _ = ContentRating.objects.get_or_create(rating=record['content_rating'])
+
+                #create Movie instance and save to database
+                movie = Movie(
+                    title=movie_title,
+                    director=director,
+                    duration=record['duration'],
+                    gross=record['gross'],
+                    language=language,
+                    country=country,
+                    content_rating=content_rating,
+                    budget=record['budget'],
+                    year=year,
+                    imdb_score=record['imdb_score']
+                )
+                movie.save()
+                print(f"Saved movie: {movie.title}")
+
+                # Create or get Actor instances and create many-to-many relationships
+                #dict.fromkeys skips a name repeated in the row (unique_together on MovieActor)
+                for actor_name in dict.fromkeys(record['actors']):
+                    actor, _ = Actor.objects.get_or_create(name=actor_name)
+                    MovieActor.objects.create(movie=movie, actor=actor)
+                print(f"Created actors: {', '.join(record['actors'])}")
+
+                #split genre string into individual genres
+                #create Genre instances and create many-to-many relationships
+                for genre_name in genres:
+                    genre, _ = Genre.objects.get_or_create(name=genre_name)
+                    MovieGenre.objects.create(movie=movie, genre=genre)
+                print(f"Created genres: {genres}")
 
             #catch and print exceptions: skip rows that cause exceptions and continue with next row
             except (KeyError, ValueError) as e:
                 print(f"Skipping row {i} due to error: {e}")
                 print(f"Row {i} data: {row}")
                 continue
+
+
+
+#========================== BULK MODE ==========================
+
+class DimensionMaps:
+    #in-memory name -> id maps for the lookup tables, so every name costs at most one insert per import
+    #instead of one get_or_create per row
+    FIELDS = {
+        Director: 'name',
+        Language: 'name',
+        Country: 'name',
+        ContentRating: 'rating',
+        Actor: 'name',
+        Genre: 'name',
+    }
+
+    def __init__(self, preload=True):
+        #preload the names already in the database (full loads), or look them up lazily per batch
+        #(incremental loads, where only the delta should touch the database)
+        self.preloaded = preload
+        if preload:
+            self.maps = {model: dict(model.objects.values_list(field, 'id')) for model, field in self.FIELDS.items()}
+        else:
+            self.maps = {model: {} for model in self.FIELDS}
+
+    def _lookup(self, model, names):
+        field = self.FIELDS[model]
+        for start in range(0, len(names), LOOKUP_CHUNK_SIZE):
+            chunk = names[start:start + LOOKUP_CHUNK_SIZE]
+            self.maps[model].update(model.objects.filter(**{f'{field}__in': chunk}).values_list(field, 'id'))
+
+    def resolve(self, model, names):
+        #bulk insert the names that are not known yet and read back their ids
+        known = self.maps[model]
+        missing = [name for name in set(names) if name not in known]
+        if missing and not self.preloaded:
+            self._lookup(model, missing)
+            missing = [name for name in missing if name not in known]
+        if not missing:
+            return
+        field = self.FIELDS[model]
+        model.objects.bulk_create([model(**{field: name}) for name in missing], ignore_conflicts=True)
+        self._lookup(model, missing)
+
+    def resolve_records(self, records):
+        #resolve every name used by a batch of parsed rows
+        self.resolve(Director, [record['director_name'] for record in records])
+        self.resolve(Language, [record['language'] for record in records])
+        self.resolve(Country, [record['country'] for record in records])
+        self.resolve(ContentRating, [record['content_rating'] for record in records])
+        self.resolve(Actor, [name for record in records for name in record['actors']])
+        self.resolve(Genre, [name for record in records for name in record['genres']])
+
+    def id(self, model, name):
+        return self.maps[model][name]
+
+
+#concrete Movie columns written from a csv row (used by bulk_update)
+MOVIE_FIELDS = ['title', 'director', 'duration', 'gross', 'language', 'country', 'content_rating', 'budget', 'year', 'imdb_score']
+
+
+def movie_from_record(record, maps, movie_id=None):
+    #build an unsaved Movie from a parsed row, foreign keys come from the dimension maps
+    return Movie(
+        id=movie_id,
+        title=record['movie_title'],
+        director_id=maps.id(Director, record['director_name']),
+        duration=record['duration'],
+        gross=record['gross'],
+        language_id=maps.id(Language, record['language']),
+        country_id=maps.id(Country, record['country']),
+        content_rating_id=maps.id(ContentRating, record['content_rating']),
+        budget=record['budget'],
+        year=record['year'],
+        imdb_score=record['imdb_score'],
+    )
+
+
+def insert_pairs(model, columns, rows):
+    #the through tables are two integer columns: a plain executemany skips the per-object ORM overhead
+    #of bulk_create, which dominates the writer on large imports
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    names = ', '.join(quote(model._meta.get_field(column).column) for column in columns)
+    with connection.cursor() as cursor:
+        cursor.executemany(f'INSERT INTO {table} ({names}) VALUES (%s, %s)', rows)
+
+
+def write_relations(movies, records, maps):
+    #dict.fromkeys drops repeated names within a row (unique_together on the through tables)
+    insert_pairs(MovieActor, ['movie', 'actor'], [
+        (movie.id, maps.id(Actor, name))
+        for movie, record in zip(movies, records)
+        for name in dict.fromkeys(record['actors'])
+    ])
+    insert_pairs(MovieGenre, ['movie', 'genre'], [
+        (movie.id, maps.id(Genre, name))
+        for movie, record in zip(movies, records)
+        for name in dict.fromkeys(record['genres'])
+    ])
+
+
+def write_batch(records, maps):
+    #write a batch of parsed rows with one bulk insert per table inside a single transaction
+    with transaction.atomic():
+        maps.resolve_records(records)
+        movies = Movie.objects.bulk_create([movie_from_record(record, maps) for record in records])
+        write_relations(movies, records, maps)
+        #bulk_create bypasses the signals that maintain the director stats, the similar movies queue and the cache version
+        refresh_director_stats(movie.director_id for movie in movies)
+        mark_similar_stale(movie.id for movie in movies)
+        bump_data_version()
+    return movies
+
+
+def ndjson_row(line):
+    #one line of an ndjson export as the csv row it would be in the csv export
+    movie = json.loads(line)
+    row = {column: str(movie[key]) for column, key in CSV_COLUMNS.items() if movie.get(key) is not None}
+    row.update((f'actor_{i}_name', name) for i, name in enumerate(movie.get('actors', []), 1))
+    row['genres'] = '|'.join(movie.get('genres', []))
+    return row
+
+
+def iter_records(file_path):
+    #yield the parsed rows of a csv file (or of an ndjson export), None for rows that are incomplete or cannot be converted
+    ndjson = file_path.endswith(NDJSON_SUFFIXES)
+    with open(file_path, 'r', newline='', encoding='utf-8' if ndjson else None) as file:
+        rows = (line for line in file if line.strip()) if ndjson else csv.DictReader(file)
+        for i, row in enumerate(rows):
+            try:
+                yield parse_row(ndjson_row(row) if ndjson else row)
+            except (AttributeError, KeyError, ValueError) as e:
+                print(f"Skipping row {i} due to error: {e}")
+                yield None
+
+
+def bulk_load_data(file_path, batch_size=BATCH_SIZE):
+    #bulk mode: parse rows into batches and write each batch with bulk_create, reports rows/sec
+    start = time.perf_counter()
+    maps = DimensionMaps()
+    loaded = skipped = 0
+    batch = []
+
+    for record in iter_records(file_path):
+        if record is None:
+            skipped += 1
+            continue
+
+        batch.append(record)
+        if len(batch) >= batch_size:
+            write_batch(batch, maps)
+            loaded += len(batch)
+            batch = []
+
+    if batch:
+        write_batch(batch, maps)
+        loaded += len(batch)
+
+    elapsed = time.perf_counter() - start
+    print(f"Loaded {loaded} movies in {elapsed:.2f}s ({loaded / elapsed:.0f} rows/sec), skipped {skipped} rows")
+    return loaded
+
+
+
+#========================== INCREMENTAL MODE ==========================
+
+def _normalize(value):
+    #collapse whitespace and case so cosmetic csv differences do not change the natural key
+    return ' '.join(str(value).split()).casefold()
+
+
+def _digest(*parts):
+    return hashlib.sha1('\x1f'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+
+
+def natural_key(title, year, director_name):
+    #identifies a movie across feeds: the csv has no id column
+    return _digest(_normalize(title), year, _normalize(director_name))
+
+
+def fingerprint(record):
+    #hash of every imported column, equal fingerprints mean the row has not changed
+    return _digest(*('|'.join(value) if isinstance(value, list) else value for _, value in sorted(record.items())))
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def adopt_unmanaged_movies(incoming, existing):
+    #movies written without a fingerprint (rows/bulk mode, or older imports) are matched to feed rows by
+    #natural key so they are updated instead of duplicated, extra copies of the same feed row are returned
+    #for deletion. movies that match no feed row (e.g. created in the UI) are left alone
+    duplicates = []
+    unmanaged = Movie.objects.filter(moviefingerprint__isnull=True).values_list('id', 'title', 'year', 'director__name')
+    for movie_id, title, year, director_name in unmanaged.iterator():
+        key = natural_key(title, year, director_name)
+        if key not in incoming:
+            continue
+        if key in existing:
+            duplicates.append(movie_id)
+        else:
+            #empty fingerprint: the movie is rewritten once and gets its fingerprint row
+            existing[key] = (movie_id, '')
+    return duplicates
+
+
+def update_batch(items, maps):
+    #rewrite changed movies in place: columns, through rows and fingerprint
+    movie_ids = [movie_id for movie_id, _, _, _ in items]
+    records = [record for _, _, _, record in items]
+    with transaction.atomic():
+        maps.resolve_records(records)
+        previous_directors = list(Movie.objects.filter(id__in=movie_ids).values_list('director_id', flat=True))
+        movies = [movie_from_record(record, maps, movie_id) for movie_id, record in zip(movie_ids, records)]
+        Movie.objects.bulk_update(movies, MOVIE_FIELDS)
+        #plain DELETEs, the signals a queryset delete would send per row are replaced by the refreshes below
+        delete_pairs(MovieActor, movie_ids)
+        delete_pairs(MovieGenre, movie_ids)
+        write_relations(movies, records, maps)
+        refresh_director_stats(previous_directors + [movie.director_id for movie in movies])
+        mark_similar_stale(movie_ids)
+        bump_data_version()
+        MovieFingerprint.objects.bulk_create(
+            [MovieFingerprint(movie_id=movie_id, natural_key=key, fingerprint=digest) for movie_id, key, digest, _ in items],
+            update_conflicts=True, unique_fields=['movie'], update_fields=['natural_key', 'fingerprint'],
+        )
+
+
+def incremental_load_data(file_path, batch_size=BATCH_SIZE):
+    #incremental mode: insert, update or delete only the movies whose csv row changed since the last import
+    start = time.perf_counter()
+    incoming = {}
+    skipped = 0
+
+    #the last occurrence wins when the feed repeats a movie
+    for record in iter_records(file_path):
+        if record is None:
+            skipped += 1
+            continue
+        key = natural_key(record['movie_title'], record['year'], record['director_name'])
+        incoming[key] = (fingerprint(record), record)
+
+    existing = {key: (movie_id, digest) for movie_id, key, digest in MovieFingerprint.objects.values_list('movie_id', 'natural_key', 'fingerprint')}
+    duplicates = adopt_unmanaged_movies(incoming, existing)
+
+    to_insert = [key for key in incoming if key not in existing]
+    to_update = [key for key, (digest, _) in incoming.items() if key in existing and existing[key][1] != digest]
+    to_delete = [movie_id for key, (movie_id, _) in existing.items() if key not in incoming] + duplicates
+
+    maps = DimensionMaps(preload=False)
+    for keys in _chunks(to_insert, batch_size):
+        records = [incoming[key][1] for key in keys]
+        with transaction.atomic():
+            movies = write_batch(records, maps)
+            MovieFingerprint.objects.bulk_create([
+                MovieFingerprint(movie_id=movie.id, natural_key=key, fingerprint=incoming[key][0])
+                for movie, key in zip(movies, keys)
+            ])
+
+    for keys in _chunks(to_update, batch_size):
+        update_batch([(existing[key][0], key, incoming[key][0], incoming[key][1]) for key in keys], maps)
+
+    for movie_ids in _chunks(to_delete, LOOKUP_CHUNK_SIZE):
+        with transaction.atomic():
+            directors = list(Movie.objects.filter(id__in=movie_ids).values_list('director_id', flat=True))
+            #set-based like update_batch: the stats, similar movies queue and cache version are refreshed once per chunk
+            delete_movies(movie_ids)
+            refresh_director_stats(directors)
+            mark_similar_stale(movie_ids)
+            bump_data_version()
+
+    result = {
+        'inserted': len(to_insert),
+        'updated': len(to_update),
+        'deleted': len(to_delete),
+        'unchanged': len(incoming) - len(to_insert) - len(to_update),
+        'skipped': skipped,
+    }
+    elapsed = time.perf_counter() - start
+    print(f"Incremental import in {elapsed:.2f}s: {result['inserted']} inserted, {result['updated']} updated, "
+          f"{result['deleted']} deleted, {result['unchanged']} unchanged, skipped {skipped} rows")
+    return result
+
+
+
+#========================== PIPELINE MODE ==========================
+
+def iter_raw_chunks(file_path, chunk_size):
+    #split the csv into chunks of raw rows; the C csv reader is cheap, the cleaning and casts happen in the workers
+    with open(file_path, 'r', newline='') as file:
+        reader = csv.reader(file)
+        header = next(reader)
+        chunk = []
+        for values in reader:
+            chunk.append(values)
+            if len(chunk) >= chunk_size:
+                yield header, chunk
+                chunk = []
+        if chunk:
+            yield header, chunk
+
+
+def parse_chunk(chunk):
+    #worker process: parse and validate one chunk of raw rows, returns the records and the number of skipped rows
+    header, rows = chunk
+    records = []
+    skipped = 0
+    for values in rows:
+        try:
+            record = parse_row(dict(zip(header, values)))
+        except (KeyError, ValueError):
+            record = None
+        if record is None:
+            skipped += 1
+        else:
+            records.append(record)
+    return records, skipped
+
+
+def pipelined_load_data(file_path, workers=4, chunk_size=BATCH_SIZE):
+    #pipeline mode: worker processes parse chunks while this process is the single database writer
+    #(sqlite allows one writer at a time), chunks are written in file order
+    start = time.perf_counter()
+    maps = DimensionMaps()
+    loaded = skipped = 0
+
+    with multiprocessing.Pool(processes=workers) as pool:
+        for records, chunk_skipped in pool.imap(parse_chunk, iter_raw_chunks(file_path, chunk_size)):
+            skipped += chunk_skipped
+            if records:
+                write_batch(records, maps)
+                loaded += len(records)
+
+    elapsed = time.perf_counter() - start
+    print(f"Loaded {loaded} movies with {workers} workers in {elapsed:.2f}s ({loaded / elapsed:.0f} rows/sec), skipped {skipped} rows")
+    return loaded
+
+
+
 #set filepath to csv file and call function
 if __name__ == "__main__":
-    file_path = '/Users/kerstinkegel/Documents/CM3035AWD/midTerm/moviehub/movie_data.csv'
-    load_data(file_path)
+    parser = argparse.ArgumentParser(description='Load the IMDB 5000 movie csv into the database.')
+    parser.add_argument('file_path', nargs='?', default=DEFAULT_FILE_PATH, help='csv file (or .ndjson export) to load')
+    parser.add_argument('--mode', choices=['incremental', 'bulk', 'pipeline', 'rows'], default='incremental',
+                        help='incremental: apply only the rows that changed since the last import (safe to re-run), '
+                             'bulk: batched bulk_create into an empty database, pipeline: bulk mode with parsing spread over '
+                             'worker processes, rows: original one-insert-per-object loader')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='rows per batch (pipeline mode: rows per worker chunk)')
+    parser.add_argument('--workers', type=int, default=multiprocessing.cpu_count(), help='parser processes in pipeline mode')
+    args = parser.parse_args()
+    if args.file_path.endswith(NDJSON_SUFFIXES) and args.mode in ('pipeline', 'rows'):
+        parser.error('ndjson exports are read in the incremental and bulk modes')
+
+    if args.mode == 'incremental':
+        incremental_load_data(args.file_path, batch_size=args.batch_size)
+    elif args.mode == 'bulk':
+        bulk_load_data(args.file_path, batch_size=args.batch_size)
+    elif args.mode == 'pipeline':
+        pipelined_load_data(args.file_path, workers=args.workers, chunk_size=args.batch_size)
+    else:
+        load_data(args.file_path)
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -63,8 +64,20 @@ REST_FRAMEWORK = {
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,  #adjust as needed
+    'DEFAULT_RENDERER_CLASSES': [
+        'movies.renderers.FastJSONRenderer',  #same bytes as JSONRenderer, encoded by orjson when installed
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
 }
 
+#rows per page of the html list views, ?page_size= may ask for up to MOVIEHUB_MAX_PAGE_SIZE
+MOVIEHUB_PAGE_SIZE = 50
+MOVIEHUB_MAX_PAGE_SIZE = 200
+#seconds before the in-memory typeahead index is rebuilt, bounds how long bulk loads stay invisible to it
+MOVIEHUB_TYPEAHEAD_MAX_AGE = 300
+#seconds before the in-memory co-star graph is rebuilt to pick up bulk loads, orm writes patch it immediately
+MOVIEHUB_GRAPH_MAX_AGE = 300
+
 
 
 
@@ -123,6 +136,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'movies.context_processors.catalogue_cache',
             ],
         },
     },
@@ -134,14 +148,72 @@ WSGI_APPLICATION = 'moviehub.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 
+#database profiles, chosen with the MOVIEHUB_DB_PROFILE environment variable. 'development' is django's
+#default: a connection per request and sqlite's rollback journal, under which readers wait while a writer
+#commits. 'production' keeps connections open across requests and switches sqlite to WAL, where readers
+#see the last commit while a writer (an admin edit, a load_data.py import) appends to the log. the pragmas
+#are applied to every new connection by movies/sqlite.py
+MOVIEHUB_DB_PROFILES = {
+    'development': {
+        'CONN_MAX_AGE': 0,
+        'PRAGMAS': {},
+    },
+    'production': {
+        'CONN_MAX_AGE': 600,  #seconds a connection is reused, per server thread
+        'CONN_HEALTH_CHECKS': True,  #a reused connection that went away is replaced instead of failing the request
+        'PRAGMAS': {
+            'journal_mode': 'wal',
+            'synchronous': 'normal',  #sync at checkpoints, not every commit: safe in WAL, a power cut may lose the last commits only
+            'busy_timeout': 5000,  #ms a writer waits for the write lock before 'database is locked'
+            'cache_size': -65536,  #page cache per connection in KiB (negative), 64 MB
+            'mmap_size': 268435456,  #read through a 256 MB memory map instead of read() calls
+            'temp_store': 'memory',  #sorts and temp b-trees stay in memory
+        },
+    },
+}
+MOVIEHUB_DB_PROFILE = os.environ.get('MOVIEHUB_DB_PROFILE', 'development')
+MOVIEHUB_SQLITE_PRAGMAS = MOVIEHUB_DB_PROFILES[MOVIEHUB_DB_PROFILE]['PRAGMAS']
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': MOVIEHUB_DB_PROFILES[MOVIEHUB_DB_PROFILE]['CONN_MAX_AGE'],
+        'CONN_HEALTH_CHECKS': MOVIEHUB_DB_PROFILES[MOVIEHUB_DB_PROFILE].get('CONN_HEALTH_CHECKS', False),
     }
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+# leaderboards and aggregates are cached per data version (movies/cache.py), point 'default' at a shared
+# backend (file based, memcached, redis) when running several processes. the data version itself has to
+# be seen by every process that writes the catalogue (load_data.py and the management commands run apart
+# from the server), so it has its own cache in files next to the database; a shared backend works too
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'moviehub',
+    },
+    'data_version': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('MOVIEHUB_DATA_VERSION_DIR', BASE_DIR / '.data_version'),
+    },
+}
+
+#the test runner moves CACHES['data_version'] to a temporary directory, so a test run leaves the version
+#of a running dev server alone
+TEST_RUNNER = 'moviehub.test_runner.MoviehubTestRunner'
+
+#seconds a cached result is kept; entries of older data versions are never read and expire on their own
+MOVIEHUB_CACHE_TIMEOUT = 3600
+
+#backend of the leaderboards (movies/leaderboards.py): 'orm' queries the database, 'numpy' ranks an
+#in-memory columnar copy of the catalogue that is reloaded whenever the data version changes
+MOVIEHUB_ANALYTICS_BACKEND = 'orm'
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
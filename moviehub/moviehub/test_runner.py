@@ -0,0 +1,20 @@
+#test runner of `python manage.py test`: the tests clear and bump the data version (movies/cache.py), so
+#CACHES['data_version'] points at a temporary directory for the run instead of the one a dev server reads
+import tempfile
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class MoviehubTestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.data_version_dir = tempfile.TemporaryDirectory(prefix='moviehub-data-version-')
+        data_version = {**settings.CACHES['data_version'], 'LOCATION': self.data_version_dir.name}
+        self.data_version_override = override_settings(CACHES={**settings.CACHES, 'data_version': data_version})
+        self.data_version_override.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.data_version_override.disable()
+        self.data_version_dir.cleanup()
+        super().teardown_test_environment(**kwargs)
@@ -1,5 +1,13 @@
 from django.contrib import admin
 from .models import Movie, Director, Actor, Genre, Language, Country, ContentRating
+from .search import filter_matching
+
+class FullTextSearchMixin:
+    #answer the admin search box from the full-text index instead of icontains on search_fields
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return super().get_search_results(request, queryset, search_term)
+        return filter_matching(queryset, search_term), False
 
 class MovieActorInline(admin.TabularInline):
     model = Movie.actors.through
@@ -15,11 +23,18 @@ class MovieAdmin(admin.ModelAdmin):
     search_fields = ('title', 'director__name')
     inlines = [MovieActorInline, MovieGenreInline]
 
-class DirectorAdmin(admin.ModelAdmin):
+    def get_search_results(self, request, queryset, search_term):
+        #movies whose title or whose director's name matches, both through the full-text index
+        if not search_term:
+            return super().get_search_results(request, queryset, search_term)
+        directors = filter_matching(Director.objects.all(), search_term)
+        return filter_matching(queryset, search_term) | queryset.filter(director__in=directors), False
+
+class DirectorAdmin(FullTextSearchMixin, admin.ModelAdmin):
     list_display = ('name',)
     search_fields = ('name',)
 
-class ActorAdmin(admin.ModelAdmin):
+class ActorAdmin(FullTextSearchMixin, admin.ModelAdmin):
     list_display = ('name',)
     search_fields = ('name',)
 
@@ -0,0 +1,230 @@
+#read-only, in-process columnar copy of the catalogue for rankings, group-bys and filtered counts
+#the movies are loaded once into numpy arrays (one per column, foreign keys as dense integer codes,
+#actors and genres as CSR arrays) and every question is answered with vectorized operations instead of
+#an sql round trip. the copy is reloaded when the data version (movies/cache.py) changes
+import threading
+from functools import cached_property
+import numpy as np
+from .cache import data_version
+from .models import Actor, ContentRating, Country, Director, Genre, Language, Movie, MovieActor, MovieGenre
+
+METRICS = ('gross', 'budget', 'imdb_score', 'year', 'duration')
+#group-by keys: single-valued foreign keys and year are one code per movie, genre and actor go through CSR
+GROUP_KEYS = ('director', 'language', 'country', 'content_rating', 'year', 'genre', 'actor')
+
+
+class Dimension:
+    #the rows of a lookup table, sorted by id: code i is ids[i], named names[i]
+    def __init__(self, model, field='name'):
+        rows = sorted(model.objects.values_list('id', field))
+        self.ids = np.array([pk for pk, _ in rows], dtype=np.int64)
+        self.names = [name for _, name in rows]
+        self.codes = {name: code for code, name in enumerate(self.names)}
+
+    def __len__(self):
+        return len(self.names)
+
+    def encode(self, ids):
+        return np.searchsorted(self.ids, ids)
+
+
+class CSR:
+    #values grouped by row: the values of row i are indices[indptr[i]:indptr[i + 1]], e.g. the actor codes of
+    #movie row i, or (as a posting list) the movie rows that have value i
+    def __init__(self, rows, values, size):
+        order = np.argsort(rows, kind='stable')
+        self.rows = rows[order]
+        self.indices = values[order]
+        self.indptr = np.concatenate([[0], np.cumsum(np.bincount(self.rows, minlength=size))])
+
+    def __getitem__(self, row):
+        return self.indices[self.indptr[row]:self.indptr[row + 1]]
+
+
+class Facet:
+    #one group-by key over the whole catalogue: entry i says that movie rows[i] has the value labels[codes[i]].
+    #postings[code] lists the movie rows with that value, so filtering and counting never scan a table
+    def __init__(self, codes, rows, labels):
+        self.codes = codes
+        self.rows = rows
+        self.labels = labels
+        self.postings = CSR(codes, rows, len(labels))
+
+    def matching(self, codes, size):
+        #mask of the movies that have any of the given value codes
+        mask = np.zeros(size, dtype=bool)
+        for code in codes:
+            mask[self.postings[code]] = True
+        return mask
+
+    def counts(self, mask):
+        #number of movies in mask per value code
+        return np.bincount(self.codes[mask[self.rows]], minlength=len(self.labels))
+
+
+class Catalogue:
+    def __init__(self):
+        self.version = data_version()
+        self.directors = Dimension(Director)
+        self.languages = Dimension(Language)
+        self.countries = Dimension(Country)
+        self.content_ratings = Dimension(ContentRating, 'rating')
+        self.genre_names = Dimension(Genre)
+        self.actor_names = Dimension(Actor)
+
+        columns = list(zip(*Movie.objects.order_by('id').values_list(
+            'id', 'title', 'director_id', 'language_id', 'country_id', 'content_rating_id', *METRICS,
+        ))) or [()] * (6 + len(METRICS))
+        self.ids = np.array(columns[0], dtype=np.int64)
+        self.titles = list(columns[1])
+        self.director = self.directors.encode(np.array(columns[2], dtype=np.int64))
+        self.language = self.languages.encode(np.array(columns[3], dtype=np.int64))
+        self.country = self.countries.encode(np.array(columns[4], dtype=np.int64))
+        self.content_rating = self.content_ratings.encode(np.array(columns[5], dtype=np.int64))
+        #gross, budget, year and duration stay int64, imdb_score is float64
+        self.metrics = {name: np.array(values) for name, values in zip(METRICS, columns[6:])}
+
+        self.actors = self._relation(MovieActor, 'actor_id', self.actor_names)
+        self.genres = self._relation(MovieGenre, 'genre_id', self.genre_names)
+
+    def __len__(self):
+        return len(self.ids)
+
+    @cached_property
+    def facets(self):
+        #a Facet per group-by key, built once per loaded version
+        rows = np.arange(len(self))
+        return {key: Facet(*self._group_codes(key, rows)) for key in GROUP_KEYS}
+
+    @cached_property
+    def title_order(self):
+        #movie rows sorted by (title, id), the order of the list views (python and sqlite both compare code points)
+        return np.array(sorted(range(len(self)), key=lambda row: (self.titles[row], self.ids[row])), dtype=np.int64)
+
+    def _relation(self, through, column, dimension):
+        pairs = np.array(through.objects.values_list('movie_id', column), dtype=np.int64).reshape(-1, 2)
+        return CSR(np.searchsorted(self.ids, pairs[:, 0]), dimension.encode(pairs[:, 1]), len(self))
+
+    #=================== FILTERS ===================
+
+    def mask(self, year=None, year_from=None, year_to=None, genre=None, language=None, country=None,
+             content_rating=None, director_id=None, min_imdb=None):
+        #boolean row mask of the movies matching every given condition
+        mask = np.ones(len(self), dtype=bool)
+        year_column = self.metrics['year']
+        if year is not None:
+            mask &= year_column == year
+        if year_from is not None:
+            mask &= year_column >= year_from
+        if year_to is not None:
+            mask &= year_column <= year_to
+        if min_imdb is not None:
+            mask &= self.metrics['imdb_score'] >= min_imdb
+        for codes, dimension, name in (
+            (self.language, self.languages, language),
+            (self.country, self.countries, country),
+            (self.content_rating, self.content_ratings, content_rating),
+        ):
+            if name is not None:
+                mask &= codes == dimension.codes.get(name, -1)
+        if director_id is not None:
+            mask &= self.directors.ids[self.director] == director_id if len(self.directors) else False
+        if genre is not None:
+            in_genre = np.zeros(len(self), dtype=bool)
+            in_genre[self.genres.rows[self.genres.indices == self.genre_names.codes.get(genre, -1)]] = True
+            mask &= in_genre
+        return mask
+
+    def count(self, **filters):
+        return int(self.mask(**filters).sum())
+
+    #=================== RANKINGS ===================
+
+    def top_movies(self, metric, n=10, ascending=False, **filters):
+        #(movie id, title, value) of the n best movies by metric, ties broken by the lower id
+        rows = np.flatnonzero(self.mask(**filters)) if filters else np.arange(len(self))
+        values = self.metrics[metric][rows]
+        keys = values if ascending else -values
+        if len(rows) > n:
+            #only the candidates that can make the top n are sorted: everything up to the n-th key, ties included
+            threshold = np.partition(keys, n - 1)[n - 1]
+            candidates = keys <= threshold
+            rows, values, keys = rows[candidates], values[candidates], keys[candidates]
+        order = np.lexsort((self.ids[rows], keys))[:n]
+        return [(int(self.ids[row]), self.titles[row], value.item()) for row, value in zip(rows[order], values[order])]
+
+    #=================== GROUP BY ===================
+
+    def _group_codes(self, key, rows):
+        #(group code per entry, movie row per entry, group labels); genre and actor repeat a movie per relation
+        if key in ('genre', 'actor'):
+            relation, dimension = (self.genres, self.genre_names) if key == 'genre' else (self.actors, self.actor_names)
+            selected = np.zeros(len(self), dtype=bool)
+            selected[rows] = True
+            keep = selected[relation.rows]
+            return relation.indices[keep], relation.rows[keep], dimension.names
+        if key == 'year':
+            years = self.metrics['year'][rows].astype(np.int64)
+            labels, codes = np.unique(years, return_inverse=True)
+            return codes, rows, labels.tolist()
+        codes, dimension = {
+            'director': (self.director, self.directors),
+            'language': (self.language, self.languages),
+            'country': (self.country, self.countries),
+            'content_rating': (self.content_rating, self.content_ratings),
+        }[key]
+        return codes[rows], rows, dimension.names
+
+    def group_by(self, key, metric=None, aggregate='mean', **filters):
+        #{group label: value} for the groups that have movies; aggregate is mean, sum or count
+        rows = np.flatnonzero(self.mask(**filters)) if filters else np.arange(len(self))
+        codes, entry_rows, labels = self._group_codes(key, rows)
+        counts = np.bincount(codes, minlength=len(labels))
+        if aggregate == 'count':
+            values = counts
+        else:
+            sums = np.bincount(codes, weights=self.metrics[metric][entry_rows], minlength=len(labels))
+            values = sums if aggregate == 'sum' else np.divide(sums, counts, out=np.zeros(len(labels)), where=counts > 0)
+        present = np.flatnonzero(counts)
+        return {labels[code]: values[code].item() for code in present}
+
+    @cached_property
+    def director_stats(self):
+        #the DirectorStats columns as arrays indexed by director code, computed once per loaded version
+        count = len(self.directors)
+        movie_count = np.bincount(self.director, minlength=count)
+        total_gross = np.bincount(self.director, weights=self.metrics['gross'], minlength=count).astype(np.int64)
+        imdb_sum = np.bincount(self.director, weights=self.metrics['imdb_score'], minlength=count)
+        average_imdb = np.divide(imdb_sum, movie_count, out=np.zeros(count), where=movie_count > 0)
+        #distinct (director, actor) pairs across the director's movies
+        pairs = np.unique(self.director[self.actors.rows] * max(len(self.actor_names), 1) + self.actors.indices)
+        unique_actors = np.bincount(pairs // max(len(self.actor_names), 1), minlength=count)
+        return {
+            'movie_count': movie_count,
+            'total_gross': total_gross,
+            'average_imdb': average_imdb,
+            'unique_actors': unique_actors,
+        }
+
+    def top_directors(self, metric, n=10):
+        #(director id, name, value) of the n directors with the highest DirectorStats metric, ties by lower id
+        stats = self.director_stats
+        codes = np.flatnonzero(stats['movie_count'])
+        values = stats[metric][codes]
+        order = np.lexsort((self.directors.ids[codes], -values))[:n]
+        return [(int(self.directors.ids[code]), self.directors.names[code], value.item()) for code, value in zip(codes[order], values[order])]
+
+
+_catalogue = None
+_lock = threading.Lock()
+
+
+def get_catalogue():
+    #the columnar copy of the current data version, loaded on first use and after every catalogue write
+    global _catalogue
+    version = data_version()
+    if _catalogue is None or _catalogue.version != version:
+        with _lock:
+            if _catalogue is None or _catalogue.version != version:
+                _catalogue = Catalogue()
+    return _catalogue
@@ -1,8 +1,10 @@
 from django.urls import path
+from . import async_api_views
 from .api_views import (
     MovieListView, MovieDetailView, DirectorListView, ActorListView, GenreMovieListView,
     top_10_highest_grossing_movies, actors_with_director, list_directors, top_directors_by_imdb,
-    top_versatile_directors, api_home_view
+    top_versatile_directors, api_home_view, bulk_movies, export_movies, search_view, typeahead_view, faceted_search_view,
+    actor_costars, actor_path, actor_neighborhood, movie_similar, director_detail, actor_detail
 )
 
 app_name = 'api'
@@ -10,13 +12,35 @@ app_name = 'api'
 urlpatterns = [
     path('', api_home_view, name='api_home'),  # API home endpoint
     path('movies/', MovieListView.as_view(), name='movie_list'),  # List and create movies
+    path('movies/bulk/', bulk_movies, name='bulk_movies'),  # Create and update many movies in one transaction
+    path('movies/export/', export_movies, name='export_movies'),  # Stream the whole catalogue as NDJSON or CSV
+    path('movies/facets/', faceted_search_view, name='faceted_search'),  # Faceted filtering with per-value counts
     path('movies/<int:pk>/', MovieDetailView.as_view(), name='movie_detail'),  # Retrieve, update, and delete a movie
+    path('movies/<int:pk>/similar/', movie_similar, name='movie_similar'),  # Precomputed "more like this" list
     path('directors/', DirectorListView.as_view(), name='director_list'),  # List all directors
     path('directors/all/', list_directors, name='list_directors'),  # List all directors for dropdown
+    path('directors/<int:director_id>/', director_detail, name='director_detail'),  # A director with their filmography and totals
     path('actors/', ActorListView.as_view(), name='actor_list'),  # List all actors
+    path('actors/<int:actor_id>/', actor_detail, name='actor_detail'),  # An actor with their filmography and totals
+    path('actors/<int:actor_id>/costars/', actor_costars, name='actor_costars'),  # Co-stars ranked by shared movies
+    path('actors/<int:actor_id>/path/<int:other_id>/', actor_path, name='actor_path'),  # Degrees of separation between two actors
+    path('actors/<int:actor_id>/neighborhood/', actor_neighborhood, name='actor_neighborhood'),  # Actors within k co-star hops
     path('movies_by_genre/<str:genre>/', GenreMovieListView.as_view(), name='movies_by_genre'),  # List movies by genre
     path('movies/top_grossing/', top_10_highest_grossing_movies, name='top_10_highest_grossing_movies'),  # Top 10 highest grossing movies
     path('directors/<int:director_id>/actors/', actors_with_director, name='actors_with_director'),  # Actors who worked with a given director
     path('directors/top_by_imdb/', top_directors_by_imdb, name='top_directors_by_imdb'),  # Top directors by IMDb score
     path('directors/top_versatile/', top_versatile_directors, name='top_versatile_directors'),  # Top versatile directors
+    path('search/', search_view, name='search'),  # Full-text search of titles and names
+    path('typeahead/', typeahead_view, name='typeahead'),  # Director and actor name completion
+
+    #async versions of the read-only endpoints above, for asgi deployments
+    path('async/movies/', async_api_views.movie_list, name='async_movie_list'),
+    path('async/movies/<int:pk>/', async_api_views.movie_detail, name='async_movie_detail'),
+    path('async/movies/top_grossing/', async_api_views.top_10_highest_grossing_movies, name='async_top_10_highest_grossing_movies'),
+    path('async/movies_by_genre/<str:genre>/', async_api_views.movies_by_genre, name='async_movies_by_genre'),
+    path('async/directors/', async_api_views.director_list, name='async_director_list'),
+    path('async/directors/<int:director_id>/actors/', async_api_views.actors_with_director, name='async_actors_with_director'),
+    path('async/directors/top_by_imdb/', async_api_views.top_directors_by_imdb, name='async_top_directors_by_imdb'),
+    path('async/directors/top_versatile/', async_api_views.top_versatile_directors, name='async_top_versatile_directors'),
+    path('async/actors/', async_api_views.actor_list, name='async_actor_list'),
 ]
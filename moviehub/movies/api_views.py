@@ -1,11 +1,26 @@
-from rest_framework import generics
+from rest_framework import generics, status
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
-from django.shortcuts import get_object_or_404
-from django.db.models import Count, Avg
-from django.http import JsonResponse
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from django.db.models import Count
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import require_GET
+from .bulk import MAX_BATCH_SIZE, MovieBulkItemSerializer, bulk_write
+from .cache import cached, conditional_on_data_version
+from .fast_serializers import ValuesListMixin, ValuesSerializer
+from .export import EXPORTERS, FORMATS
+from .facets import FACETS, ID_FACETS, MAX_PAGE_SIZE, faceted_search
+from .filmography import actor_filmography, director_filmography
+from . import graph
+from .leaderboards import top_directors as rank_directors, top_movies as rank_movies
 from .models import Movie, Director, Actor, Genre, MovieActor
+from .pagination import OptInKeysetPagination
+from .search import KINDS, search
+from .similar import similar_movies
+from .sqlite import MAX_INTEGER
+from .typeahead import INDEXES, typeahead
 from .serializers import (
     MovieSerializer, SimpleMovieSerializer,
     DirectorSerializer, SimpleDirectorSerializer,
@@ -14,37 +29,59 @@ from .serializers import (
 )
 
 #================== CLASS BASED VIEWS ==================
-class MovieListView(generics.ListCreateAPIView):
-    queryset = Movie.objects.all()
+#the list views build their rows from values() (movies/fast_serializers.py) instead of serializing model
+#instances; the output is the same as their serializer_class's
+#every GET below except the typeahead (whose index may lag behind bulk loads) is a conditional GET:
+#a request with a current If-None-Match gets a 304 without running the view (movies/cache.py)
+#orderings allowed with ?pagination=cursor, the first one is the default
+MOVIE_KEYSET_ORDERINGS = ['title', '-title', 'gross', '-gross', 'imdb_score', '-imdb_score']
+NAME_KEYSET_ORDERINGS = ['name', '-name']
+
+@method_decorator(conditional_on_data_version, name='dispatch')
+class MovieListView(ValuesListMixin, generics.ListCreateAPIView):
+    queryset = Movie.objects.with_relation_ids()  # batch-load the actor/genre ids rendered by the serializer
     serializer_class = MovieCreateUpdateSerializer
     permission_classes = [AllowAny]
+    pagination_class = OptInKeysetPagination
+    keyset_orderings = MOVIE_KEYSET_ORDERINGS
 
+@method_decorator(conditional_on_data_version, name='dispatch')
 class MovieDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Movie.objects.all()
+    queryset = Movie.objects.with_relation_ids()
     serializer_class = MovieCreateUpdateSerializer
     permission_classes = [AllowAny]
 
-class DirectorListView(generics.ListAPIView):
+@method_decorator(conditional_on_data_version, name='dispatch')
+class DirectorListView(ValuesListMixin, generics.ListAPIView):
     queryset = Director.objects.all()
     serializer_class = SimpleDirectorSerializer  # use the simplified serializer
     permission_classes = [AllowAny]
+    pagination_class = OptInKeysetPagination
+    keyset_orderings = NAME_KEYSET_ORDERINGS
 
-class ActorListView(generics.ListAPIView):
+@method_decorator(conditional_on_data_version, name='dispatch')
+class ActorListView(ValuesListMixin, generics.ListAPIView):
     queryset = Actor.objects.all()
     serializer_class = SimpleActorSerializer  # use the simplified serializer
     permission_classes = [AllowAny]
+    pagination_class = OptInKeysetPagination
+    keyset_orderings = NAME_KEYSET_ORDERINGS
 
-class GenreMovieListView(generics.ListAPIView):
+@method_decorator(conditional_on_data_version, name='dispatch')
+class GenreMovieListView(ValuesListMixin, generics.ListAPIView):
     serializer_class = SimpleMovieSerializer  # use the simplified serializer
     permission_classes = [AllowAny]
+    pagination_class = OptInKeysetPagination
+    keyset_orderings = MOVIE_KEYSET_ORDERINGS
 
     def get_queryset(self):
         genre_name = self.kwargs['genre']
-        return Movie.objects.filter(genres__name=genre_name)
+        return Movie.objects.filter(genres__name=genre_name).with_relation_ids()
 
 
 
 #================== FUNCTION BASED VIEWS ==================
+@conditional_on_data_version
 @api_view(['GET'])
 def api_home_view(request):
     # provide a description of the available API endpoints
@@ -66,6 +103,16 @@ def api_home_view(request):
                 "method": "POST",
                 "description": "Create a new movie."
             },
+            "bulk_movies": {
+                "url": "/api/movies/bulk/",
+                "method": "POST",
+                "description": "Create (items without an id) and update (items with an id, only the given fields) up to 5000 movies from a JSON array in one transaction. Nothing is written if any item is invalid; the errors are then returned per item, in the order of the array."
+            },
+            "export_movies": {
+                "url": "/api/movies/export/?format={ndjson|csv}",
+                "method": "GET",
+                "description": "Stream every movie with its director, language, country, content rating, actors and genres as NDJSON or as a CSV in the layout read by load_data.py."
+            },
             "update_movie": {
                 "url": "/api/movies/{id}/",
                 "method": "PUT",
@@ -89,7 +136,7 @@ def api_home_view(request):
             "director_detail": {
                 "url": "/api/directors/{id}/",
                 "method": "GET",
-                "description": "Retrieve the details of a specific director by their ID."
+                "description": "Retrieve a director by their ID with their movies (genres and cast) and their movie count, total gross and average IMDb score."
             },
             "actors": {
                 "url": "/api/actors/",
@@ -99,7 +146,7 @@ def api_home_view(request):
             "actor_detail": {
                 "url": "/api/actors/{id}/",
                 "method": "GET",
-                "description": "Retrieve the details of a specific actor by their ID."
+                "description": "Retrieve an actor by their ID with their movies (genres, director and cast) and their movie count, total gross and average IMDb score."
             },
             "movies_by_genre": {
                 "url": "/api/movies_by_genre/{genre}/",
@@ -125,6 +172,41 @@ def api_home_view(request):
                 "url": "/api/directors/all/",
                 "method": "GET",
                 "description": "Retrieve a list of all directors for selection in actors_with_director."
+            },
+            "typeahead": {
+                "url": "/api/typeahead/?kind={director|actor}&q={prefix}&limit={n}",
+                "method": "GET",
+                "description": "Ids and names of the directors or actors with a word starting with the prefix, for autocompletion."
+            },
+            "search": {
+                "url": "/api/search/?q={query}&kind={movie|director|actor}&limit={n}",
+                "method": "GET",
+                "description": "Full-text search of movie titles, director names and actor names, best matches first. Every word matches as a prefix."
+            },
+            "actor_costars": {
+                "url": "/api/actors/{id}/costars/?limit={n}",
+                "method": "GET",
+                "description": "Actors who appeared with the actor, ranked by the number of shared movies."
+            },
+            "actor_path": {
+                "url": "/api/actors/{id}/path/{other_id}/",
+                "method": "GET",
+                "description": "Degrees of separation between two actors and a shortest chain of co-stars and movies linking them."
+            },
+            "actor_neighborhood": {
+                "url": "/api/actors/{id}/neighborhood/?hops={1-3}&limit={n}",
+                "method": "GET",
+                "description": "Number of actors at each co-star distance from the actor, with the first of them."
+            },
+            "movie_similar": {
+                "url": "/api/movies/{id}/similar/",
+                "method": "GET",
+                "description": "Movies like the movie (shared genres, actors, director and language, nearby year and score), most similar first."
+            },
+            "faceted_search": {
+                "url": "/api/movies/facets/?year_from={year}&year_to={year}&genre={name}&language={name}&country={name}&content_rating={rating}&director={id}&actor={id}&page={n}",
+                "method": "GET",
+                "description": "A page of movies matching every filter (repeat a filter to match any of several values), with the count of movies per year, genre, language, country, content rating, director and actor."
             }
         }
     }
@@ -132,33 +214,216 @@ def api_home_view(request):
 
 
 
+@api_view(['POST'])
+def bulk_movies(request):
+    #create and update a json array of movies in one transaction (movies/bulk.py): 200 with the written
+    #movies in the order of the array, or 400 with one dict of errors per item ({} for the valid ones)
+    items = request.data
+    if not isinstance(items, list):
+        return Response({'non_field_errors': [f'Expected a list of items but got type "{type(items).__name__}".']}, status=status.HTTP_400_BAD_REQUEST)
+    if len(items) > MAX_BATCH_SIZE:
+        return Response({'non_field_errors': [f'Ensure this field has no more than {MAX_BATCH_SIZE} elements.']}, status=status.HTTP_400_BAD_REQUEST)
+    movie_ids, errors = bulk_write(items)
+    if errors:
+        return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+    serializer = ValuesSerializer(MovieBulkItemSerializer)
+    rows = {row['id']: row for row in serializer.to_representation(serializer.values(Movie.objects.filter(pk__in=movie_ids)))}
+    return Response([rows[movie_id] for movie_id in movie_ids])
+
+
+
+#a plain django view: drf reserves ?format= for choosing a renderer
+@conditional_on_data_version
+@require_GET
+def export_movies(request):
+    #the whole catalogue as ndjson (default) or ?format=csv, streamed chunk by chunk (movies/export.py)
+    export_format = request.GET.get('format', 'ndjson')
+    if export_format not in EXPORTERS:
+        return JsonResponse({'format': f'Choose from {", ".join(EXPORTERS)}.'}, status=status.HTTP_400_BAD_REQUEST)
+    content_type, filename = FORMATS[export_format]
+    response = StreamingHttpResponse(EXPORTERS[export_format](), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+
+#the leaderboards and the director and actor details below are cached per data version (movies/cache.py):
+#repeated requests do not query the database until a catalogue write bumps the version
+def _actors_with_director_data(director_id):
+    #None for an unknown director, so the 404 is cached as well
+    if not Director.objects.filter(id=director_id).exists():
+        return None
+    actor_counts = MovieActor.objects.filter(movie__director_id=director_id).values('actor__name').annotate(count=Count('actor')).order_by('-count')
+    return [{'name': actor['actor__name'], 'count': actor['count']} for actor in actor_counts]
+
+@conditional_on_data_version
 @api_view(['GET'])
 def actors_with_director(request, director_id):
-    director = get_object_or_404(Director, id=director_id)
-    actor_counts = MovieActor.objects.filter(movie__director=director).values('actor__name').annotate(count=Count('actor')).order_by('-count')
-    actors = [{'name': actor['actor__name'], 'count': actor['count']} for actor in actor_counts]
+    actors = cached('actors_with_director', _actors_with_director_data, director_id)
+    if actors is None:
+        raise Http404('No Director matches the given query.')
     return Response(actors)
 
+@conditional_on_data_version
+@api_view(['GET'])
+def director_detail(request, director_id):
+    #the director with their movies (genres and cast) and totals, four queries for any number of movies
+    director = cached('director_filmography', director_filmography, director_id)
+    if director is None:
+        raise Http404('No Director matches the given query.')
+    return Response(director)
+
+@conditional_on_data_version
+@api_view(['GET'])
+def actor_detail(request, actor_id):
+    #the actor with their movies (genres, director and cast) and totals, four queries for any number of movies
+    actor = cached('actor_filmography', actor_filmography, actor_id)
+    if actor is None:
+        raise Http404('No Actor matches the given query.')
+    return Response(actor)
+
+def _top_10_highest_grossing_movies_data():
+    movies = rank_movies('gross', 10, Movie.objects.with_relation_ids())
+    return SimpleMovieSerializer(movies, many=True).data
+
+@conditional_on_data_version
 @api_view(['GET'])
 def top_10_highest_grossing_movies(request):
-    movies = Movie.objects.order_by('-gross')[:10]
-    serializer = SimpleMovieSerializer(movies, many=True)
-    return Response(serializer.data)
+    return Response(cached('top_10_highest_grossing_movies', _top_10_highest_grossing_movies_data))
 
+@conditional_on_data_version
 @api_view(['GET'])
 def list_directors(request):
-    directors = Director.objects.all()
-    serializer = SimpleDirectorSerializer(directors, many=True)
-    return Response(serializer.data)
+    serializer = ValuesSerializer(SimpleDirectorSerializer)
+    return Response(serializer.to_representation(serializer.values(Director.objects.all())))
+
+def _top_directors_by_imdb_data():
+    directors = rank_directors('average_imdb', 10)
+    return [{'name': director.name, 'average_imdb': director.average_imdb} for director in directors]
 
+@conditional_on_data_version
 @api_view(['GET'])
 def top_directors_by_imdb(request):
-    directors = Director.objects.annotate(average_imdb=Avg('movie__imdb_score')).order_by('-average_imdb')[:10]
-    data = [{'name': director.name, 'average_imdb': director.average_imdb} for director in directors]
-    return Response(data)
+    return Response(cached('top_directors_by_imdb_data', _top_directors_by_imdb_data))
 
+def _top_versatile_directors_data():
+    directors = rank_directors('unique_actors', 5)
+    return [{'name': director.name, 'unique_actors': director.unique_actors} for director in directors]
+
+@conditional_on_data_version
 @api_view(['GET'])
 def top_versatile_directors(request):
-    directors = Director.objects.annotate(unique_actors=Count('movie__movieactor__actor', distinct=True)).order_by('-unique_actors')[:5]
-    data = [{'name': director.name, 'unique_actors': director.unique_actors} for director in directors]
-    return Response(data)
+    return Response(cached('top_versatile_directors_data', _top_versatile_directors_data))
+
+@conditional_on_data_version
+@api_view(['GET'])
+def search_view(request):
+    #ranked full-text search, ?kind= may be repeated to restrict the result to movies, directors or actors
+    kinds = request.query_params.getlist('kind')
+    unknown = [kind for kind in kinds if kind not in KINDS]
+    if unknown:
+        return Response({'kind': f'Choose from {", ".join(KINDS)}.'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        limit = int(request.query_params.get('limit', 20))
+    except ValueError:
+        return Response({'limit': 'A valid integer is required.'}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(search(request.query_params.get('q', ''), kinds, limit))
+
+@conditional_on_data_version
+@api_view(['GET'])
+def faceted_search_view(request):
+    #one page of movies (by title) plus the counts of every facet value for the current selection,
+    #e.g. ?genre=Drama&genre=Comedy&language=English&year_from=2000&actor=12&page=2
+    errors, numbers = {}, {}
+    for name in ('year_from', 'year_to', 'page', 'page_size'):
+        try:
+            numbers[name] = int(request.query_params[name]) if name in request.query_params else None
+        except ValueError:
+            errors[name] = 'A valid integer is required.'
+    selection = {}
+    for key in FACETS:
+        values = request.query_params.getlist(key)
+        if key == 'year' or key in ID_FACETS:
+            try:
+                values = [int(value) for value in values]
+            except ValueError:
+                errors[key] = 'A valid integer is required.'
+        selection[key] = values
+    if errors:
+        return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+    page = max(1, numbers['page'] or 1)
+    page_size = max(1, min(numbers['page_size'] or 20, MAX_PAGE_SIZE))
+    result = faceted_search(selection, numbers['year_from'], numbers['year_to'], page, page_size)
+    url = request.build_absolute_uri()
+    has_next = page * page_size < result['count']
+    return Response({
+        'count': result['count'],
+        'next': replace_query_param(url, 'page', page + 1) if has_next else None,
+        'previous': (replace_query_param(url, 'page', page - 1) if page > 2 else remove_query_param(url, 'page')) if page > 1 else None,
+        'results': SimpleMovieSerializer(result['movies'], many=True).data,
+        'facets': result['facets'],
+    })
+
+#co-star graph queries, answered from the in-memory graph (movies/graph.py) which, like the typeahead,
+#may lag behind bulk loads and is therefore not conditional on the data version
+def _get_actor_or_404(actor_id):
+    if not Actor.objects.filter(id=actor_id).exists():
+        raise Http404('No Actor matches the given query.')
+
+def _int_params(request, **defaults):
+    #the integer query parameters with their defaults, or a 400 response
+    values, errors = {}, {}
+    for name, default in defaults.items():
+        try:
+            values[name] = int(request.query_params.get(name, default))
+        except ValueError:
+            errors[name] = 'A valid integer is required.'
+    return values, Response(errors, status=status.HTTP_400_BAD_REQUEST) if errors else None
+
+@api_view(['GET'])
+def actor_costars(request, actor_id):
+    #actors who appeared with the actor, ranked by the number of shared movies
+    params, error = _int_params(request, limit=20)
+    if error:
+        return error
+    _get_actor_or_404(actor_id)
+    return Response(graph.costars(actor_id, params['limit']))
+
+@api_view(['GET'])
+def actor_path(request, actor_id, other_id):
+    #a shortest chain of co-stars between two actors, degrees is null when they are not connected
+    _get_actor_or_404(actor_id)
+    _get_actor_or_404(other_id)
+    return Response(graph.shortest_path(actor_id, other_id))
+
+@api_view(['GET'])
+def actor_neighborhood(request, actor_id):
+    #the actors within ?hops= co-star links, per distance
+    params, error = _int_params(request, hops=2, limit=20)
+    if error:
+        return error
+    _get_actor_or_404(actor_id)
+    return Response(graph.neighborhood(actor_id, params['hops'], params['limit']))
+
+#precomputed by the refresh_similar_movies command, which does not change the data version: not conditional either
+@api_view(['GET'])
+def movie_similar(request, pk):
+    #the "more like this" list of the movie, most similar first
+    #an id beyond an sqlite integer cannot be bound to the lookup, and is no movie either
+    similar = similar_movies(pk) if pk <= MAX_INTEGER else []
+    if not similar and not Movie.objects.filter(pk=pk).exists():
+        raise Http404('No Movie matches the given query.')
+    return Response(similar)
+
+@api_view(['GET'])
+def typeahead_view(request):
+    #answered from the in-memory prefix index, without a database query once the index is built
+    kind = request.query_params.get('kind', 'director')
+    if kind not in INDEXES:
+        return Response({'kind': f'Choose from {", ".join(INDEXES)}.'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        limit = int(request.query_params.get('limit', 10))
+    except ValueError:
+        return Response({'limit': 'A valid integer is required.'}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(typeahead(kind, request.query_params.get('q', ''), limit))
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class MoviesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'movies'
+
+    def ready(self):
+        #connect the signal handlers that maintain the materialized tables, and the sqlite pragmas of the database profile
+        from . import signals, sqlite  # noqa: F401
@@ -0,0 +1,111 @@
+#async versions of the read-only api endpoints, for serving through the asgi entry point (moviehub/asgi.py)
+#under asgi a sync view holds a thread-pool slot for the whole request; these views await the async orm
+#(acount, aget, aexists, async for) instead. they return the same json bytes as their DRF counterparts in
+#api_views.py (rendered like DRF's JSONRenderer, without the browsable api) and share their cache entries
+from django.conf import settings
+from django.http import HttpResponse
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from django.db.models import Count
+from .cache import acached, conditional_on_data_version
+from .models import Movie, Director, Actor, MovieActor
+from .renderers import FastJSONRenderer
+from .serializers import MovieCreateUpdateSerializer, SimpleMovieSerializer, SimpleDirectorSerializer, SimpleActorSerializer
+
+
+def json_response(data, status=200):
+    return HttpResponse(FastJSONRenderer().render(data), content_type='application/json', status=status)
+
+
+def not_found(detail='Not found.'):
+    return json_response({'detail': detail}, status=404)
+
+
+async def paginated_response(request, queryset, serializer_class):
+    #the page number pagination of the DRF list views (count, next, previous and results), ?page=last included;
+    #the cursor pagination of api_views.py is only served by the sync views
+    page_size = settings.REST_FRAMEWORK['PAGE_SIZE']
+    count = await queryset.acount()
+    pages = max(1, -(-count // page_size))
+    number = request.GET.get('page', '1')
+    page = pages if number == 'last' else int(number) if number.isdigit() else 0
+    if not 1 <= page <= pages:
+        return not_found('Invalid page.')
+    offset = (page - 1) * page_size
+    rows = [row async for row in queryset[offset:offset + page_size]]
+    url = request.build_absolute_uri()
+    return json_response({
+        'count': count,
+        'next': replace_query_param(url, 'page', page + 1) if page < pages else None,
+        'previous': (replace_query_param(url, 'page', page - 1) if page > 2 else remove_query_param(url, 'page')) if page > 1 else None,
+        'results': serializer_class(rows, many=True).data,
+    })
+
+
+#================== LISTS ==================
+
+@conditional_on_data_version
+async def movie_list(request):
+    return await paginated_response(request, Movie.objects.with_relation_ids(), MovieCreateUpdateSerializer)
+
+@conditional_on_data_version
+async def movie_detail(request, pk):
+    try:
+        movie = await Movie.objects.with_relation_ids().aget(pk=pk)
+    except Movie.DoesNotExist:
+        return not_found('No Movie matches the given query.')
+    return json_response(MovieCreateUpdateSerializer(movie).data)
+
+@conditional_on_data_version
+async def director_list(request):
+    return await paginated_response(request, Director.objects.all(), SimpleDirectorSerializer)
+
+@conditional_on_data_version
+async def actor_list(request):
+    return await paginated_response(request, Actor.objects.all(), SimpleActorSerializer)
+
+@conditional_on_data_version
+async def movies_by_genre(request, genre):
+    return await paginated_response(request, Movie.objects.filter(genres__name=genre).with_relation_ids(), SimpleMovieSerializer)
+
+
+#================== LEADERBOARDS ==================
+#computed with the orm queries of the default analytics backend, under the cache keys of api_views.py
+
+async def _actors_with_director_data(director_id):
+    if not await Director.objects.filter(id=director_id).aexists():
+        return None
+    actor_counts = MovieActor.objects.filter(movie__director_id=director_id).values('actor__name').annotate(count=Count('actor')).order_by('-count')
+    return [{'name': actor['actor__name'], 'count': actor['count']} async for actor in actor_counts]
+
+@conditional_on_data_version
+async def actors_with_director(request, director_id):
+    actors = await acached('actors_with_director', _actors_with_director_data, director_id)
+    if actors is None:
+        return not_found('No Director matches the given query.')
+    return json_response(actors)
+
+async def _top_10_highest_grossing_movies_data():
+    movies = [movie async for movie in Movie.objects.with_relation_ids().order_by('-gross')[:10]]
+    return SimpleMovieSerializer(movies, many=True).data
+
+@conditional_on_data_version
+async def top_10_highest_grossing_movies(request):
+    return json_response(await acached('top_10_highest_grossing_movies', _top_10_highest_grossing_movies_data))
+
+async def _top_directors(metric, n):
+    directors = Director.objects.filter(stats__isnull=False).order_by(f'-stats__{metric}').values('name', f'stats__{metric}')[:n]
+    return [{'name': director['name'], metric: director[f'stats__{metric}']} async for director in directors]
+
+async def _top_directors_by_imdb_data():
+    return await _top_directors('average_imdb', 10)
+
+@conditional_on_data_version
+async def top_directors_by_imdb(request):
+    return json_response(await acached('top_directors_by_imdb_data', _top_directors_by_imdb_data))
+
+async def _top_versatile_directors_data():
+    return await _top_directors('unique_actors', 5)
+
+@conditional_on_data_version
+async def top_versatile_directors(request):
+    return json_response(await acached('top_versatile_directors_data', _top_versatile_directors_data))
@@ -0,0 +1,150 @@
+#batch create/update of movies for the editorial tools (POST /api/movies/bulk/ with a json array of movies)
+#an item with an id updates that movie, only the fields it gives (actors and genres replace the current ones);
+#an item without one creates a movie and needs every column. the whole batch is validated before anything
+#is written: the field checks of each item need no query, then every referenced id is checked with one
+#query per table for the whole batch. the checks and the writes (bulk_create and bulk_update) share one
+#transaction, the director stats, cache version and co-star graph are refreshed once for the batch
+from django.db import transaction
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from .cache import bump_data_version
+from .deletes import delete_pairs
+from .graph import GRAPH
+from .models import Actor, ContentRating, Country, Director, Genre, Language, Movie, MovieActor, MovieGenre
+from .serializers import MovieCreateUpdateSerializer
+from .similar import mark_similar_stale
+from .sqlite import LOOKUP_CHUNK_SIZE, MAX_INTEGER
+from .stats import refresh_director_stats
+
+#below LOOKUP_CHUNK_SIZE, so the ids referenced by a batch are checked with one query per table
+MAX_BATCH_SIZE = 5000
+
+#foreign key field -> related model
+FOREIGN_KEYS = {'director': Director, 'language': Language, 'country': Country, 'content_rating': ContentRating}
+#many-to-many field -> (related model, through model, column of the related model)
+RELATIONS = {'actors': (Actor, MovieActor, 'actor_id'), 'genres': (Genre, MovieGenre, 'genre_id')}
+
+#the messages of PrimaryKeyRelatedField, so both endpoints report a missing id the same way
+DOES_NOT_EXIST = 'Invalid pk "{pk}" - object does not exist.'
+
+
+class MovieBulkItemSerializer(serializers.ModelSerializer):
+    #the field checks of one item; related ids are plain integers here, validate_batch looks them up
+    id = serializers.IntegerField(required=False)
+    director = serializers.IntegerField()
+    language = serializers.IntegerField()
+    country = serializers.IntegerField()
+    content_rating = serializers.IntegerField()
+    actors = serializers.ListField(child=serializers.IntegerField(), required=False)
+    genres = serializers.ListField(child=serializers.IntegerField(), required=False)
+
+    class Meta:
+        model = Movie
+        fields = ['id'] + MovieCreateUpdateSerializer.Meta.fields
+
+
+def _chunks(ids):
+    #an id that does not fit in an sqlite integer cannot be bound to the query, and cannot exist either
+    ids = sorted(pk for pk in ids if -MAX_INTEGER - 1 <= pk <= MAX_INTEGER)
+    for start in range(0, len(ids), LOOKUP_CHUNK_SIZE):
+        yield ids[start:start + LOOKUP_CHUNK_SIZE]
+
+
+def _existing_ids(model, ids):
+    return {pk for chunk in _chunks(ids) for pk in model.objects.filter(pk__in=chunk).values_list('pk', flat=True)}
+
+
+def _check_items(items):
+    #(validated data, errors) of every item, through one serializer instance: building the fields of a
+    #ModelSerializer costs more than validating an item with them
+    check = MovieBulkItemSerializer()
+    for item in items:
+        check.partial = isinstance(item, dict) and 'id' in item
+        try:
+            yield check.run_validation(item), {}
+        except ValidationError as exc:
+            yield {}, serializers.as_serializer_error(exc)
+
+
+def validate_batch(items):
+    #(validated items, movies to update by id, errors); errors has one dict per item, empty for valid
+    #items, and is None when the whole batch is valid
+    data, errors = zip(*_check_items(items)) if items else ((), ())
+
+    referenced = {model: set() for model in [*FOREIGN_KEYS.values(), Actor, Genre]}
+    for item in data:
+        for field, model in FOREIGN_KEYS.items():
+            if field in item:
+                referenced[model].add(item[field])
+        for field, (model, _, _) in RELATIONS.items():
+            referenced[model].update(item.get(field, ()))
+    existing = {model: _existing_ids(model, ids) for model, ids in referenced.items()}
+    movie_ids = {item['id'] for item in data if 'id' in item}
+    movies = {movie.pk: movie for chunk in _chunks(movie_ids) for movie in Movie.objects.filter(pk__in=chunk)}
+
+    seen = set()
+    for item, item_errors in zip(data, errors):
+        if 'id' in item:
+            if item['id'] not in movies:
+                item_errors['id'] = [DOES_NOT_EXIST.format(pk=item['id'])]
+            elif item['id'] in seen:
+                item_errors['id'] = [f'Movie {item["id"]} appears more than once in the batch.']
+            seen.add(item['id'])
+        for field, model in FOREIGN_KEYS.items():
+            if field in item and item[field] not in existing[model]:
+                item_errors[field] = [DOES_NOT_EXIST.format(pk=item[field])]
+        for field, (model, _, _) in RELATIONS.items():
+            missing = [pk for pk in dict.fromkeys(item.get(field, ())) if pk not in existing[model]]
+            if missing:
+                item_errors[field] = [DOES_NOT_EXIST.format(pk=pk) for pk in missing]
+    return data, movies, list(errors) if any(errors) else None
+
+
+def _set_fields(movie, item):
+    for field, value in item.items():
+        if field in FOREIGN_KEYS:
+            setattr(movie, f'{field}_id', value)
+        elif field not in RELATIONS and field != 'id':
+            setattr(movie, field, value)
+    return movie
+
+
+def write_batch(data, movies):
+    #write a validated batch in one transaction, returns the ids of the movies in the order of the items
+    with transaction.atomic(savepoint=False):
+        previous_directors = [movie.director_id for movie in movies.values()]
+        created = Movie.objects.bulk_create([_set_fields(Movie(), item) for item in data if 'id' not in item])
+        updated = [_set_fields(movies[item['id']], item) for item in data if 'id' in item]
+        fields = {field for item in data if 'id' in item for field in item if field not in RELATIONS and field != 'id'}
+        if updated and fields:
+            Movie.objects.bulk_update(updated, sorted(fields))
+
+        created = iter(created)
+        written = [movies[item['id']] if 'id' in item else next(created) for item in data]
+        added, removed = [], []
+        for field, (_, through, column) in RELATIONS.items():
+            replaced = [movie.pk for movie, item in zip(written, data) if 'id' in item and field in item]
+            if through is MovieActor and GRAPH.built_at is not None:
+                removed += [pair for chunk in _chunks(replaced) for pair in through.objects.filter(movie_id__in=chunk).values_list('movie_id', column)]
+            delete_pairs(through, replaced)
+            pairs = [(movie.pk, pk) for movie, item in zip(written, data) for pk in dict.fromkeys(item.get(field, ()))]
+            through.objects.bulk_create([through(**{'movie_id': movie_id, column: pk}) for movie_id, pk in pairs])
+            if through is MovieActor:
+                added = pairs
+
+        #bulk writes bypass the signals that maintain these
+        refresh_director_stats(previous_directors + [movie.director_id for movie in written])
+        mark_similar_stale(movie.pk for movie in written)
+        bump_data_version()
+    GRAPH.update(added=added, removed=removed)
+    return [movie.pk for movie in written]
+
+
+def bulk_write(items):
+    #(ids of the written movies, None) or (None, per-item errors); nothing is written when any item is invalid.
+    #the checks run in the transaction of the writes, so a row deleted in between cannot fail or skip a write
+    with transaction.atomic():
+        data, movies, errors = validate_batch(items)
+        if errors:
+            return None, errors
+        return write_batch(data, movies), None
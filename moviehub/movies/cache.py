@@ -0,0 +1,81 @@
+#versioned cache for results derived from the catalogue (leaderboards, aggregates)
+#every key embeds the current data version; any write to a catalogue table bumps the version, so entries
+#computed from older data are never read again and simply expire. the version lives in its own cache,
+#CACHES['data_version'], which every process has to share: the server's workers read it on each request
+#and load_data.py or a management command bumps it from another process
+import hashlib
+import time
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.db import transaction
+from django.views.decorators.http import condition
+
+VERSION_KEY = 'moviehub:data_version'
+VERSION_CACHE = 'data_version'
+_MISSING = object()
+
+
+def data_version():
+    #nanosecond timestamp of the last catalogue write; a lost version (eviction, restart) restarts at now,
+    #which again differs from every version that was used for cached entries
+    versions = caches[VERSION_CACHE]
+    version = versions.get(VERSION_KEY)
+    if version is None:
+        versions.add(VERSION_KEY, time.time_ns(), None)
+        version = versions.get(VERSION_KEY)
+    return version
+
+
+def _set_new_version():
+    caches[VERSION_CACHE].set(VERSION_KEY, time.time_ns(), None)
+
+
+def bump_data_version():
+    #called after every catalogue write. inside a transaction the version is bumped again on commit,
+    #so a result computed by another request from the pre-commit data does not outlive the commit
+    _set_new_version()
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(_set_new_version)
+
+
+def clear_caches():
+    #drop every cached result and start a new data version: writes rolled back at the end of a test, and
+    #benchmarks restoring a database, change the data without bumping the version
+    cache.clear()
+    caches[VERSION_CACHE].clear()
+
+
+def _key(name, args):
+    return ':'.join(['moviehub', name, str(data_version())] + [str(arg) for arg in args])
+
+
+def cached(name, compute, *args):
+    #compute(*args) once per data version; the result has to be picklable (lists, dicts, model instances), None included
+    key = _key(name, args)
+    result = cache.get(key, _MISSING)
+    if result is _MISSING:
+        result = compute(*args)
+        cache.set(key, result, getattr(settings, 'MOVIEHUB_CACHE_TIMEOUT', 3600))
+    return result
+
+
+async def acached(name, compute, *args):
+    #cached() for async views, compute is a coroutine function; shares its entries with cached()
+    key = _key(name, args)
+    result = await cache.aget(key, _MISSING)
+    if result is _MISSING:
+        result = await compute(*args)
+        await cache.aset(key, result, getattr(settings, 'MOVIEHUB_CACHE_TIMEOUT', 3600))
+    return result
+
+
+#conditional GET for views whose response depends only on the catalogue and the request url:
+#the ETag comes from the data version, so If-None-Match is answered with a 304 before the view runs its
+#queries or serializers. there is no Last-Modified: an http date has whole seconds, two writes within one
+#second would share it and If-Modified-Since would answer a 304 with stale data
+def data_version_etag(request, *args, **kwargs):
+    #the Accept header selects the renderer (json or the browsable api), i.e. a different representation
+    return hashlib.md5(f"{data_version()}:{request.META.get('HTTP_ACCEPT', '')}".encode()).hexdigest()
+
+
+conditional_on_data_version = condition(etag_func=data_version_etag)
@@ -0,0 +1,12 @@
+#template context shared by every page
+from django.conf import settings
+from .cache import data_version
+
+
+def catalogue_cache(request):
+    #the current data version and timeout for {% cache %} fragments built from the catalogue: a write bumps
+    #the version, so fragments rendered from older data are never read again and simply expire
+    return {
+        'data_version': data_version(),
+        'fragment_timeout': getattr(settings, 'MOVIEHUB_CACHE_TIMEOUT', 3600),
+    }
@@ -0,0 +1,30 @@
+#set-based deletes for the batch write paths (bulk.py, load_data.py): one DELETE per table and chunk of ids.
+#queryset.delete() loads the rows of every model that has post_delete receivers (movies/signals.py) to send
+#the signals row by row, each of which refreshes director stats, queues similar movies and bumps the cache
+#version; the callers do that once for the whole batch instead
+from django.db import connection, models
+from .models import Movie
+from .sqlite import LOOKUP_CHUNK_SIZE
+
+
+def delete_rows(model, column, ids):
+    #DELETE the rows of model whose column is one of ids
+    ids = sorted(set(ids))
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        for start in range(0, len(ids), LOOKUP_CHUNK_SIZE):
+            chunk = ids[start:start + LOOKUP_CHUNK_SIZE]
+            cursor.execute(f'DELETE FROM {quote(model._meta.db_table)} WHERE {quote(column)} IN ({", ".join(["%s"] * len(chunk))})', chunk)
+
+
+def delete_pairs(through, movie_ids):
+    #the through rows (MovieActor, MovieGenre) of the movies
+    delete_rows(through, through._meta.get_field('movie').column, movie_ids)
+
+
+def delete_movies(movie_ids):
+    #the movies and the rows that cascade from them (through rows, fingerprints, similar movie lists)
+    for relation in Movie._meta.related_objects:
+        if relation.on_delete is models.CASCADE:
+            delete_rows(relation.related_model, relation.field.column, movie_ids)
+    delete_rows(Movie, Movie._meta.pk.column, movie_ids)
@@ -0,0 +1,92 @@
+#streaming export of the whole catalogue as ndjson or csv, for /api/movies/export/ and the export_catalogue command
+#movies are read in keyset chunks (id > last id of the previous chunk): three queries per chunk, the movie
+#columns with the names of their single-valued relations, then the actor names and the genre names, so the
+#memory used is one chunk whatever the size of the catalogue. sqlite has no server-side cursors, and a cursor
+#left open for a whole download would hold a read lock that blocks every writer until the client is done.
+#the csv has the columns of movie_data.csv read by load_data.py, and load_data.py also reads the ndjson,
+#so an export can be imported again (actors and genres in the order they were added to the movie)
+import csv
+import io
+import json
+from django.db.models import Count
+from .models import Movie, MovieActor, MovieGenre
+
+CHUNK_SIZE = 2000
+FORMATS = {
+    'ndjson': ('application/x-ndjson', 'movies.ndjson'),
+    'csv': ('text/csv; charset=utf-8', 'movies.csv'),
+}
+
+#ndjson key -> column read for it
+MOVIE_COLUMNS = {
+    'id': 'id', 'title': 'title', 'year': 'year', 'director': 'director__name', 'language': 'language__name',
+    'country': 'country__name', 'content_rating': 'content_rating__rating', 'duration': 'duration',
+    'gross': 'gross', 'budget': 'budget', 'imdb_score': 'imdb_score',
+}
+#csv column of movie_data.csv -> ndjson key; actor_N_name and genres are added per movie
+CSV_COLUMNS = {
+    'movie_title': 'title', 'title_year': 'year', 'director_name': 'director', 'language': 'language',
+    'country': 'country', 'content_rating': 'content_rating', 'duration': 'duration', 'gross': 'gross',
+    'budget': 'budget', 'imdb_score': 'imdb_score',
+}
+#movie_data.csv has three actor columns, blank for a smaller cast; more are added when a movie has more actors
+MIN_ACTOR_COLUMNS = 3
+
+
+def _names_by_movie(through, field, movie_ids):
+    #{movie id: [names]} in the order the rows were added, the order of actor_1_name, actor_2_name, ...
+    names = {movie_id: [] for movie_id in movie_ids}
+    rows = through.objects.filter(movie_id__in=movie_ids).order_by('id').values_list('movie_id', f'{field}__name')
+    for movie_id, name in rows:
+        names[movie_id].append(name)
+    return names
+
+
+def iter_chunks(chunk_size=CHUNK_SIZE):
+    #lists of movie dicts (the ndjson objects) in id order
+    last_id = 0
+    while True:
+        rows = Movie.objects.filter(id__gt=last_id).order_by('id').values_list(*MOVIE_COLUMNS.values())[:chunk_size]
+        movies = [dict(zip(MOVIE_COLUMNS, row)) for row in rows]
+        if not movies:
+            return
+        movie_ids = [movie['id'] for movie in movies]
+        actors = _names_by_movie(MovieActor, 'actor', movie_ids)
+        genres = _names_by_movie(MovieGenre, 'genre', movie_ids)
+        for movie in movies:
+            movie['actors'] = actors[movie['id']]
+            movie['genres'] = genres[movie['id']]
+        yield movies
+        last_id = movie_ids[-1]
+
+
+def iter_ndjson(chunk_size=CHUNK_SIZE):
+    #one string per chunk, a json object per line
+    for movies in iter_chunks(chunk_size):
+        yield ''.join(json.dumps(movie, ensure_ascii=False) + '\n' for movie in movies)
+
+
+def actor_columns():
+    #actor_1_name ... actor_N_name, N the largest cast in the catalogue (at least 3)
+    counts = MovieActor.objects.values('movie_id').annotate(n=Count('id')).order_by('-n').values_list('n', flat=True)[:1]
+    return [f'actor_{i}_name' for i in range(1, max([MIN_ACTOR_COLUMNS, *counts]) + 1)]
+
+
+def iter_csv(chunk_size=CHUNK_SIZE):
+    #one string per chunk, the header first
+    actor_names = actor_columns()
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([*CSV_COLUMNS, *actor_names, 'genres'])
+    for movies in iter_chunks(chunk_size):
+        for movie in movies:
+            actors = movie['actors'] + [''] * (len(actor_names) - len(movie['actors']))
+            writer.writerow([*(movie[key] for key in CSV_COLUMNS.values()), *actors, '|'.join(movie['genres'])])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+EXPORTERS = {'ndjson': iter_ndjson, 'csv': iter_csv}
@@ -0,0 +1,87 @@
+#faceted movie search: year range, genre, language, country, content rating, director and actor filters
+#combined in one request, answered with a page of movies and the counts of every facet value.
+#filters and counts run on the posting lists of the in-memory catalogue (movies/analytics.py), so the only
+#queries are the ones that load the page of movies. values of one facet are OR'ed, facets are AND'ed, and
+#the counts of a facet apply every filter except its own, so they show what selecting a value would add
+import numpy as np
+from .analytics import get_catalogue
+from .models import Movie
+
+FACETS = ('year', 'genre', 'language', 'country', 'content_rating', 'director', 'actor')
+#facets filtered by id rather than by name, they also have far too many values to list them all
+ID_FACETS = ('director', 'actor')
+FACET_LIMIT = 20
+INT64 = np.iinfo(np.int64)
+MAX_PAGE_SIZE = 100
+
+
+def _dimension(catalogue, key):
+    return {
+        'genre': catalogue.genre_names, 'language': catalogue.languages, 'country': catalogue.countries,
+        'content_rating': catalogue.content_ratings, 'director': catalogue.directors, 'actor': catalogue.actor_names,
+    }[key]
+
+
+def _codes(catalogue, key, values):
+    #value codes of the selected names, ids or years; unknown values match nothing
+    if key == 'year':
+        positions = {year: code for code, year in enumerate(catalogue.facets['year'].labels)}
+        return [positions[value] for value in values if value in positions]
+    dimension = _dimension(catalogue, key)
+    if key in ID_FACETS:
+        #an id beyond int64 cannot be encoded, and is no id of the catalogue either
+        values = [value for value in values if INT64.min <= value <= INT64.max]
+        codes = dimension.encode(np.array(values, dtype=np.int64))
+        return [int(code) for code, value in zip(codes, values) if code < len(dimension) and dimension.ids[code] == value]
+    return [dimension.codes[value] for value in values if value in dimension.codes]
+
+
+def _facet_values(catalogue, key, counts):
+    present = np.flatnonzero(counts)
+    if key == 'year':
+        #years in chronological order, the others by decreasing count
+        return [{'value': catalogue.facets['year'].labels[code], 'count': int(counts[code])} for code in present]
+    present = present[np.lexsort((present, -counts[present]))]
+    labels = catalogue.facets[key].labels
+    if key in ID_FACETS:
+        ids = _dimension(catalogue, key).ids
+        return [{'id': int(ids[code]), 'name': labels[code], 'count': int(counts[code])} for code in present[:FACET_LIMIT]]
+    return [{'value': labels[code], 'count': int(counts[code])} for code in present]
+
+
+def faceted_search(selection, year_from=None, year_to=None, page=1, page_size=20):
+    #selection maps a facet to its selected values: years, names, or ids for director and actor
+    catalogue = get_catalogue()
+    size = len(catalogue)
+    masks = {}
+    for key, values in selection.items():
+        if values:
+            masks[key] = catalogue.facets[key].matching(_codes(catalogue, key, values), size)
+    if year_from is not None or year_to is not None:
+        years = catalogue.metrics['year']
+        in_range = np.ones(size, dtype=bool)
+        if year_from is not None:
+            in_range &= years >= year_from
+        if year_to is not None:
+            in_range &= years <= year_to
+        masks['year'] = masks['year'] & in_range if 'year' in masks else in_range
+
+    def combined(excluded=None):
+        mask = np.ones(size, dtype=bool)
+        for key, facet_mask in masks.items():
+            if key != excluded:
+                mask &= facet_mask
+        return mask
+
+    matched = combined()
+    facets = {key: _facet_values(catalogue, key, catalogue.facets[key].counts(combined(key))) for key in FACETS}
+
+    ordered = catalogue.title_order[matched[catalogue.title_order]]
+    start = (page - 1) * page_size
+    ids = [int(pk) for pk in catalogue.ids[ordered[start:start + page_size]]]
+    movies = Movie.objects.with_relation_ids().in_bulk(ids)
+    return {
+        'count': len(ordered),
+        'movies': [movies[pk] for pk in ids if pk in movies],
+        'facets': facets,
+    }
@@ -1,9 +1,17 @@
+import random
 import factory
+import factory.random
 from faker import Faker
-from .models import Movie, Director, Actor, Genre, Language, Country, ContentRating
+from .models import Movie, Director, Actor, Genre, Language, Country, ContentRating, MovieActor, MovieGenre
 
 fake = Faker()
 
+#genre names of the IMDB 5000 dataset, used when seeding a catalogue
+GENRE_NAMES = [
+    'Action', 'Adventure', 'Animation', 'Biography', 'Comedy', 'Crime', 'Documentary', 'Drama', 'Family',
+    'Fantasy', 'History', 'Horror', 'Music', 'Musical', 'Mystery', 'Romance', 'Sci-Fi', 'Sport', 'Thriller', 'War',
+]
+
 class DirectorFactory(factory.django.DjangoModelFactory):
     class Meta:
         model = Director
@@ -19,24 +27,28 @@ class ActorFactory(factory.django.DjangoModelFactory):
 class GenreFactory(factory.django.DjangoModelFactory):
     class Meta:
         model = Genre
+        django_get_or_create = ('name',)  #few distinct values, reuse instead of violating the unique constraint
     
     name = factory.Faker('word')
 
 class LanguageFactory(factory.django.DjangoModelFactory):
     class Meta:
         model = Language
+        django_get_or_create = ('name',)  #few distinct values, reuse instead of violating the unique constraint
     
     name = factory.Faker('language_name')
 
 class CountryFactory(factory.django.DjangoModelFactory):
     class Meta:
         model = Country
+        django_get_or_create = ('name',)  #few distinct values, reuse instead of violating the unique constraint
     
     name = factory.Faker('country')
 
 class ContentRatingFactory(factory.django.DjangoModelFactory):
     class Meta:
         model = ContentRating
+        django_get_or_create = ('rating',)  #few distinct values, reuse instead of violating the unique constraint
     
     rating = factory.Faker('random_element', elements=['G', 'PG', 'PG-13', 'R', 'NC-17'])
 
@@ -54,3 +66,59 @@ class MovieFactory(factory.django.DjangoModelFactory):
     budget = factory.Faker('random_int', min=100000, max=5000000)
     year = factory.Faker('year')
     imdb_score = factory.Faker('pyfloat', positive=True, min_value=1.0, max_value=10.0)
+
+
+#========================== BULK SEEDING ==========================
+
+def _unique_names(objects, field='name'):
+    #faker repeats names in large batches (and across seedings), suffix the repeats so the unique constraints hold
+    model = type(objects[0])
+    seen = set(model.objects.values_list(field, flat=True))
+    for i, obj in enumerate(objects):
+        name = getattr(obj, field)
+        if name in seen:
+            name = f'{name} {i}'
+            setattr(obj, field, name)
+        seen.add(name)
+    return objects
+
+
+def seed_catalogue(movies, actors_per_movie=3, genres_per_movie=2, seed=0):
+    #bulk-insert a synthetic catalogue built from the factories above: roughly one director per 5 movies
+    #and one actor per movie, for the route regression tests and the benchmarks.
+    #rows are written with bulk_create, so the tables and cache version maintained by signals are refreshed at the end
+    from .cache import bump_data_version
+    from .stats import rebuild_director_stats
+
+    rng = random.Random(seed)
+    factory.random.reseed_random(seed)
+    offset = Movie.objects.count()
+
+    directors = Director.objects.bulk_create(_unique_names(DirectorFactory.build_batch(max(1, movies // 5))))
+    actors = Actor.objects.bulk_create(_unique_names(ActorFactory.build_batch(max(actors_per_movie, movies))))
+    genres = [GenreFactory(name=name) for name in GENRE_NAMES]
+    languages = [LanguageFactory(name=name) for name in ('English', 'French', 'Spanish', 'German', 'Hindi')]
+    countries = [CountryFactory(name=name) for name in ('USA', 'UK', 'France', 'India', 'Canada')]
+    ratings = [ContentRatingFactory(rating=rating) for rating in ('G', 'PG', 'PG-13', 'R', 'NC-17')]
+
+    built = MovieFactory.build_batch(
+        movies,
+        director=factory.LazyFunction(lambda: rng.choice(directors)),
+        language=factory.LazyFunction(lambda: rng.choice(languages)),
+        country=factory.LazyFunction(lambda: rng.choice(countries)),
+        content_rating=factory.LazyFunction(lambda: rng.choice(ratings)),
+    )
+    for i, movie in enumerate(built):
+        movie.title = f'{movie.title} {offset + i}'
+    built = Movie.objects.bulk_create(built, batch_size=1000)
+
+    MovieActor.objects.bulk_create([
+        MovieActor(movie=movie, actor=actor) for movie in built for actor in rng.sample(actors, actors_per_movie)
+    ], batch_size=1000)
+    MovieGenre.objects.bulk_create([
+        MovieGenre(movie=movie, genre=genre) for movie in built for genre in rng.sample(genres, genres_per_movie)
+    ], batch_size=1000)
+
+    rebuild_director_stats()
+    bump_data_version()
+    return built
@@ -0,0 +1,59 @@
+#read-only fast path for the list endpoints: rows are built straight from queryset.values() plus one query per
+#many-to-many field for the related ids, instead of model instances rendered field by field by a
+#ModelSerializer. the output is the same as the ModelSerializer's (same keys in the same order, foreign keys
+#as ids, many-to-many fields as id lists in id order, the order the prefetches of with_relation_ids read them
+#off the (movie, related) unique index), so the two are interchangeable
+from rest_framework.response import Response
+
+
+class ValuesSerializer:
+    #built from a ModelSerializer class whose Meta.fields are plain model fields, foreign keys and
+    #many-to-many fields, i.e. the serializers of serializers.py that have no nested or custom fields
+    def __init__(self, serializer_class):
+        self.model = serializer_class.Meta.model
+        self.fields = list(serializer_class.Meta.fields)
+        self.columns = {}   #output key -> values() key
+        self.relations = {}  #output key -> (through model, column of this model, column of the related model)
+        for name in self.fields:
+            field = self.model._meta.get_field(name)
+            if field.many_to_many:
+                through = field.remote_field.through
+                source = field.m2m_field_name()
+                target = field.m2m_reverse_field_name()
+                self.relations[name] = (through, f'{source}_id', f'{target}_id')
+            elif field.is_relation:
+                self.columns[name] = field.attname
+            else:
+                self.columns[name] = name
+
+    def values(self, queryset):
+        #the queryset as dicts; pk is always selected, for the related ids and the keyset cursors
+        return queryset.prefetch_related(None).values('pk', *dict.fromkeys(self.columns.values()))
+
+    def to_representation(self, rows):
+        #rows of values() -> the dicts the ModelSerializer would return, with one query per relation
+        rows = list(rows)
+        related = {}
+        pks = [row['pk'] for row in rows]
+        for name, (through, source, target) in self.relations.items():
+            ids = {pk: [] for pk in pks}
+            if pks:
+                pairs = through.objects.filter(**{f'{source}__in': pks}).order_by(source, target).values_list(source, target)
+                for pk, related_id in pairs:
+                    ids[pk].append(related_id)
+            related[name] = ids
+        return [
+            {name: related[name][row['pk']] if name in related else row[self.columns[name]] for name in self.fields}
+            for row in rows
+        ]
+
+
+class ValuesListMixin:
+    #list() of a generic list view through ValuesSerializer(serializer_class), with the view's pagination
+    def list(self, request, *args, **kwargs):
+        serializer = ValuesSerializer(self.get_serializer_class())
+        queryset = serializer.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(serializer.to_representation(page))
+        return Response(serializer.to_representation(queryset))
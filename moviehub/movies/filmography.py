@@ -0,0 +1,51 @@
+#director and actor detail: the person, their movies with genres and credits, and summary stats.
+#every part is one query joined from the person's side (movies, their genres, their cast), so a detail costs
+#the same four queries for one movie or five hundred, and no id list is sent back to the database
+from .models import Actor, Director, Movie, MovieActor, MovieGenre
+
+
+def _filmography(person, movies, movie_filter):
+    #person: values() of the director or actor, None when missing. movies: their movies, movie_filter: the
+    #same filter as seen from MovieGenre and MovieActor
+    if person is None:
+        return None
+    rows = list(movies.order_by('year', 'title', 'id').values('id', 'title', 'year', 'gross', 'imdb_score', 'director_id', 'director__name'))
+    genres = {row['id']: [] for row in rows}
+    for movie_id, name in MovieGenre.objects.filter(**movie_filter).order_by('movie_id', 'genre__name').values_list('movie_id', 'genre__name'):
+        genres[movie_id].append(name)
+    #credits in the order they were added, the billing order of the imported csv
+    actors = {row['id']: [] for row in rows}
+    for movie_id, actor_id, name in MovieActor.objects.filter(**movie_filter).order_by('movie_id', 'id').values_list('movie_id', 'actor_id', 'actor__name'):
+        actors[movie_id].append({'id': actor_id, 'name': name})
+
+    scores = [row['imdb_score'] for row in rows]
+    return {
+        'id': person['id'],
+        'name': person['name'],
+        'stats': {
+            'movie_count': len(rows),
+            'total_gross': sum(row['gross'] for row in rows),
+            'average_imdb': sum(scores) / len(scores) if scores else None,
+        },
+        'movies': [
+            {
+                'id': row['id'], 'title': row['title'], 'year': row['year'], 'gross': row['gross'], 'imdb_score': row['imdb_score'],
+                'director': {'id': row['director_id'], 'name': row['director__name']},
+                'genres': genres[row['id']],
+                'actors': actors[row['id']],
+            }
+            for row in rows
+        ],
+    }
+
+
+def director_filmography(director_id):
+    #the director and the movies they directed, None for an unknown director
+    director = Director.objects.filter(id=director_id).values('id', 'name').first()
+    return _filmography(director, Movie.objects.filter(director_id=director_id), {'movie__director_id': director_id})
+
+
+def actor_filmography(actor_id):
+    #the actor and the movies they appear in, with their co-stars in the credits; None for an unknown actor
+    actor = Actor.objects.filter(id=actor_id).values('id', 'name').first()
+    return _filmography(actor, Movie.objects.filter(movieactor__actor_id=actor_id), {'movie__movieactor__actor_id': actor_id})
@@ -0,0 +1,246 @@
+#in-memory co-star graph: actors are linked through the movies they share (the MovieActor table)
+#the edges are kept as CSR arrays in both directions, actor -> movies and movie -> actors, so co-stars,
+#shortest paths (bidirectional BFS) and k-hop neighborhoods are a few vectorized gathers per hop.
+#like the typeahead index, orm writes patch the graph through signals: the patches are queued and folded
+#into a new snapshot of the arrays with numpy on the next query, without reading the table again. bulk writes (load_data.py)
+#bypass the signals, so the graph is also rebuilt once it is older than MOVIEHUB_GRAPH_MAX_AGE seconds
+import threading
+import time
+import numpy as np
+from django.conf import settings
+from .analytics import CSR
+from .models import Actor, Movie, MovieActor
+
+MAX_LIMIT = 100
+MAX_HOPS = 3
+MAX_PATH_LENGTH = 12
+#parent marks of the BFS arrays: not reached yet, and the actor the search started from
+UNSEEN, START = -1, -2
+
+
+def gather(csr, rows):
+    #(values of every row, the row each value came from), concatenated
+    starts, lengths = csr.indptr[rows], csr.indptr[rows + 1] - csr.indptr[rows]
+    offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+    return csr.indices[offsets], np.repeat(rows, lengths)
+
+
+class CostarGraph:
+    #one immutable snapshot of the graph: the arrays are built once, in the constructor, and never changed,
+    #so a request keeps answering from the snapshot it started with while a newer one is swapped in
+    def __init__(self, edges):
+        #dense codes for the actor and movie ids that have edges, and the CSR arrays over them
+        self.edges = edges  #unique (movie id, actor id) rows
+        self.movie_ids, movies = np.unique(edges[:, 0], return_inverse=True)
+        self.actor_ids, actors = np.unique(edges[:, 1], return_inverse=True)
+        self.actor_movies = CSR(actors.reshape(-1), movies.reshape(-1), len(self.actor_ids))
+        self.movie_actors = CSR(movies.reshape(-1), actors.reshape(-1), len(self.movie_ids))
+
+    @classmethod
+    def empty(cls):
+        return cls(np.empty((0, 2), dtype=np.int64))
+
+    def patched(self, patches):
+        #a new snapshot with the ((movie id, actor id), present) patches folded in; the last patch of an edge
+        #decides whether it exists
+        final = dict(patches)
+        removed = np.array([edge for edge, present in final.items() if not present], dtype=np.int64).reshape(-1, 2)
+        added = np.array([edge for edge, present in final.items() if present], dtype=np.int64).reshape(-1, 2)
+        keys = self.edges[:, 0] * 2 ** 32 + self.edges[:, 1]
+        edges = self.edges[~np.isin(keys, removed[:, 0] * 2 ** 32 + removed[:, 1])]
+        return CostarGraph(np.unique(np.concatenate([edges, added]), axis=0))
+
+    def code(self, actor_id):
+        #dense code of an actor, None for an actor without movies
+        position = np.searchsorted(self.actor_ids, actor_id)
+        return int(position) if position < len(self.actor_ids) and self.actor_ids[position] == actor_id else None
+
+    #=================== QUERIES ===================
+
+    def costars(self, actor_id, limit=20):
+        #[(actor id, shared movie count)] ranked by shared movies, ties by the lower id
+        code = self.code(actor_id)
+        if code is None:
+            return []
+        neighbours, _ = gather(self.movie_actors, self.actor_movies[code])
+        neighbours, counts = np.unique(neighbours[neighbours != code], return_counts=True)
+        order = np.lexsort((neighbours, -counts))[:limit]
+        return [(int(self.actor_ids[neighbour]), int(count)) for neighbour, count in zip(neighbours[order], counts[order])]
+
+    def _expand(self, frontier, actor_parent, movie_parent):
+        #one hop from the frontier actors: record through which movie and from which actor every new actor
+        #is reached, and return the new actors
+        movies, owners = gather(self.actor_movies, frontier)
+        movies, first = np.unique(movies, return_index=True)
+        owners = owners[first]
+        new = movie_parent[movies] == UNSEEN
+        movies, owners = movies[new], owners[new]
+        movie_parent[movies] = owners
+        actors, via = gather(self.movie_actors, movies)
+        actors, first = np.unique(actors, return_index=True)
+        via = via[first]
+        new = actor_parent[actors] == UNSEEN
+        actors, via = actors[new], via[new]
+        actor_parent[actors] = via
+        return actors
+
+    def shortest_path(self, source_id, target_id, max_length=MAX_PATH_LENGTH):
+        #(actor ids, movie ids) of a shortest co-star chain, movies[i] links actors[i] and actors[i + 1];
+        #None when the actors are not connected within max_length hops
+        source, target = self.code(source_id), self.code(target_id)
+        if source is None or target is None:
+            return None
+        if source == target:
+            return [source_id], []
+        sides = []
+        for start in (source, target):
+            actor_parent = np.full(len(self.actor_ids), UNSEEN, dtype=np.int64)
+            movie_parent = np.full(len(self.movie_ids), UNSEEN, dtype=np.int64)
+            actor_parent[start] = START
+            sides.append({'frontier': np.array([start]), 'actors': actor_parent, 'movies': movie_parent})
+        for _ in range(max_length):
+            #grow the side with the smaller frontier by one whole level
+            side, other = sorted(sides, key=lambda side: len(side['frontier']))
+            if not len(side['frontier']):
+                return None
+            side['frontier'] = self._expand(side['frontier'], side['actors'], side['movies'])
+            met = side['frontier'][other['actors'][side['frontier']] != UNSEEN]
+            if len(met):
+                forward, backward = (side, other) if side is sides[0] else (other, side)
+                return self._path(int(met.min()), forward, backward)
+        return None
+
+    def _walk(self, side, actor):
+        #actors and movies from actor back to the start of a side
+        actors, movies = [actor], []
+        while side['actors'][actor] != START:
+            movie = int(side['actors'][actor])
+            actor = int(side['movies'][movie])
+            movies.append(movie)
+            actors.append(actor)
+        return actors, movies
+
+    def _path(self, meeting, forward, backward):
+        actors, movies = self._walk(forward, meeting)
+        actors, movies = actors[::-1], movies[::-1]
+        tail_actors, tail_movies = self._walk(backward, meeting)
+        actors += tail_actors[1:]
+        movies += tail_movies
+        return [int(self.actor_ids[code]) for code in actors], [int(self.movie_ids[code]) for code in movies]
+
+    def neighborhood(self, actor_id, hops=2):
+        #[actor ids at distance 1, 2, ... hops], each sorted by id
+        code = self.code(actor_id)
+        if code is None:
+            return [[] for _ in range(hops)]
+        actor_parent = np.full(len(self.actor_ids), UNSEEN, dtype=np.int64)
+        movie_parent = np.full(len(self.movie_ids), UNSEEN, dtype=np.int64)
+        actor_parent[code] = START
+        frontier, levels = np.array([code]), []
+        for _ in range(hops):
+            frontier = self._expand(frontier, actor_parent, movie_parent)
+            levels.append(self.actor_ids[np.sort(frontier)].tolist())
+        return levels
+
+
+class ActorGraph:
+    #the current CostarGraph of the process. readers take the snapshot reference without the lock; builds
+    #and compactions make a new snapshot and swap the reference under the lock, and one thread at a time
+    #rebuilds a stale graph
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.build_lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        with self.lock:
+            self.patches = []  #every patch queued since the last build began
+            self.folded = 0  #how many of them the snapshot has
+            self.built_at = None
+            self.snapshot = CostarGraph.empty()
+
+    def is_stale(self):
+        max_age = getattr(settings, 'MOVIEHUB_GRAPH_MAX_AGE', 300)
+        return self.built_at is None or time.monotonic() - self.built_at > max_age
+
+    def build(self):
+        #patches queued while the edges are read are folded into the new snapshot too, adding an edge that is
+        #already there or removing one that is not changes nothing
+        with self.lock:
+            self.patches, self.folded = [], 0
+        edges = np.array(MovieActor.objects.values_list('movie_id', 'actor_id'), dtype=np.int64).reshape(-1, 2)
+        snapshot = CostarGraph(np.unique(edges, axis=0))
+        with self.lock:
+            self.snapshot, self.folded, self.built_at = snapshot, 0, time.monotonic()
+
+    def refresh(self):
+        #one thread rebuilds a stale graph while the others answer from the current snapshot; before the
+        #first build there is nothing to answer from, so they wait for it
+        if not self.build_lock.acquire(blocking=self.built_at is None):
+            return
+        try:
+            if self.is_stale():
+                self.build()
+        finally:
+            self.build_lock.release()
+
+    def update(self, added=(), removed=()):
+        #queue (movie id, actor id) edges to add or remove, a no-op until the graph is first used
+        if self.built_at is None:
+            return
+        with self.lock:
+            self.patches.extend((tuple(edge), True) for edge in added)
+            self.patches.extend((tuple(edge), False) for edge in removed)
+
+    def _compact(self):
+        with self.lock:
+            if self.folded < len(self.patches):
+                self.snapshot = self.snapshot.patched(self.patches[self.folded:])
+                self.folded = len(self.patches)
+
+    def current(self):
+        #the snapshot to answer a request from, with the queued patches folded in
+        if self.is_stale():
+            self.refresh()
+        if self.folded < len(self.patches):
+            self._compact()
+        return self.snapshot
+
+
+GRAPH = ActorGraph()
+
+
+def _names(actor_ids):
+    names = Actor.objects.in_bulk(actor_ids)
+    return [{'id': pk, 'name': names[pk].name} for pk in actor_ids if pk in names]
+
+
+def costars(actor_id, limit=20):
+    ranked = GRAPH.current().costars(actor_id, max(1, min(limit, MAX_LIMIT)))
+    names = Actor.objects.in_bulk([pk for pk, _ in ranked])
+    return [{'id': pk, 'name': names[pk].name, 'shared_movies': count} for pk, count in ranked if pk in names]
+
+
+def shortest_path(source_id, target_id):
+    path = GRAPH.current().shortest_path(source_id, target_id)
+    if path is None:
+        return {'degrees': None, 'actors': [], 'movies': []}
+    actor_ids, movie_ids = path
+    titles = Movie.objects.in_bulk(movie_ids)
+    return {
+        'degrees': len(movie_ids),
+        'actors': _names(actor_ids),
+        'movies': [{'id': pk, 'title': titles[pk].title} for pk in movie_ids if pk in titles],
+    }
+
+
+def neighborhood(actor_id, hops=2, limit=20):
+    #size of every hop and its first actors by id
+    levels = GRAPH.current().neighborhood(actor_id, max(1, min(hops, MAX_HOPS)))
+    limit = max(1, min(limit, MAX_LIMIT))
+    shown = _names([pk for level in levels for pk in level[:limit]])
+    names = {actor['id']: actor for actor in shown}
+    return [
+        {'distance': distance, 'count': len(level), 'actors': [names[pk] for pk in level[:limit] if pk in names]}
+        for distance, level in enumerate(levels, start=1)
+    ]
@@ -0,0 +1,34 @@
+#top-N queries behind the leaderboard views, answered by the backend named in MOVIEHUB_ANALYTICS_BACKEND:
+#'orm' reads the indexed movie columns and the precomputed DirectorStats, 'numpy' ranks the in-memory
+#columnar copy of movies/analytics.py. both return model instances with the metric set as an attribute
+from django.conf import settings
+from django.db.models import F
+from .models import Director, Movie
+
+
+def use_numpy():
+    return getattr(settings, 'MOVIEHUB_ANALYTICS_BACKEND', 'orm') == 'numpy'
+
+
+def top_movies(metric, n=10, queryset=None):
+    #the n movies with the highest metric, read from queryset (Movie.objects by default)
+    queryset = Movie.objects.all() if queryset is None else queryset
+    if not use_numpy():
+        return list(queryset.order_by(f'-{metric}')[:n])
+    from .analytics import get_catalogue
+    ids = [pk for pk, _, _ in get_catalogue().top_movies(metric, n)]
+    movies = queryset.in_bulk(ids)
+    return [movies[pk] for pk in ids if pk in movies]
+
+
+def top_directors(metric, n=10):
+    #the n directors with the highest DirectorStats metric (total_gross, average_imdb, unique_actors, movie_count)
+    if not use_numpy():
+        return list(Director.objects.annotate(**{metric: F(f'stats__{metric}')}).filter(stats__isnull=False).order_by(f'-{metric}')[:n])
+    from .analytics import get_catalogue
+    directors = []
+    for pk, name, value in get_catalogue().top_directors(metric, n):
+        director = Director(id=pk, name=name)
+        setattr(director, metric, value)
+        directors.append(director)
+    return directors
@@ -0,0 +1,33 @@
+#python manage.py export_catalogue --format csv --output movies.csv
+#writes the same stream as /api/movies/export/, one chunk at a time; the output can be loaded again with
+#python load_data.py movies.csv (or movies.ndjson)
+import time
+from django.core.management.base import BaseCommand, CommandError
+from movies.export import CHUNK_SIZE, EXPORTERS
+
+
+class Command(BaseCommand):
+    help = 'Export every movie with its director, language, country, rating, actors and genres as NDJSON or CSV.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=list(EXPORTERS), default=None,
+                            help='ndjson or csv, by default taken from the extension of --output (ndjson on stdout)')
+        parser.add_argument('--output', help='file to write, stdout when omitted')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='movies read per query')
+
+    def handle(self, *args, **options):
+        output = options['output']
+        export_format = options['format'] or ('csv' if output and output.endswith('.csv') else 'ndjson')
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be at least 1.')
+
+        chunks = EXPORTERS[export_format](options['chunk_size'])
+        if not output:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
+            return
+        start = time.perf_counter()
+        with open(output, 'w', newline='', encoding='utf-8') as file:
+            for chunk in chunks:
+                file.write(chunk)
+        self.stderr.write(f'Exported {export_format} to {output} in {time.perf_counter() - start:.2f}s')
@@ -0,0 +1,29 @@
+#python manage.py export_snapshot snapshot/
+#writes one compressed parquet file per catalogue table (movies/snapshot.py), e.g. for pandas.read_parquet
+#or a warehouse job; python manage.py load_snapshot snapshot/ loads it into an empty database
+import os
+import time
+from django.core.management.base import BaseCommand, CommandError
+from movies.snapshot import CHUNK_SIZE, COMPRESSION, SNAPSHOT_MODELS, SnapshotError, export_snapshot, snapshot_path
+
+
+class Command(BaseCommand):
+    help = 'Write the movie, dimension and through tables as parquet files into a directory.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', help='directory for the .parquet files, created if missing')
+        parser.add_argument('--compression', default=COMPRESSION, help='parquet codec: zstd (default), snappy, gzip or none')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='rows read per query and written per row group')
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be at least 1.')
+        start = time.perf_counter()
+        try:
+            rows = export_snapshot(options['directory'], options['chunk_size'], options['compression'])
+        except SnapshotError as e:
+            raise CommandError(str(e))
+        size = sum(os.path.getsize(snapshot_path(options['directory'], model)) for model in SNAPSHOT_MODELS)
+        for table, count in rows.items():
+            self.stdout.write(f'{table}: {count} rows')
+        self.stdout.write(f'Exported {sum(rows.values())} rows ({size / 2 ** 20:.1f} MB) in {time.perf_counter() - start:.2f}s')
@@ -0,0 +1,25 @@
+#python manage.py load_snapshot snapshot/
+#loads the parquet files written by export_snapshot into an empty database (migrated, no movies or names yet)
+import time
+from django.core.management.base import BaseCommand, CommandError
+from movies.snapshot import CHUNK_SIZE, SnapshotError, load_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Load a parquet snapshot written by export_snapshot into an empty database.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', help='directory with the .parquet files')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='rows inserted per executemany')
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be at least 1.')
+        start = time.perf_counter()
+        try:
+            rows = load_snapshot(options['directory'], options['chunk_size'])
+        except SnapshotError as e:
+            raise CommandError(str(e))
+        for table, count in rows.items():
+            self.stdout.write(f'{table}: {count} rows')
+        self.stdout.write(f'Loaded {sum(rows.values())} rows in {time.perf_counter() - start:.2f}s')
@@ -0,0 +1,22 @@
+#python manage.py refresh_similar_movies [--rebuild]
+#recomputes the similar movies of the movies changed since the last run (run it from cron or after an import),
+#or of every movie with --rebuild
+import time
+from django.core.management.base import BaseCommand, CommandError
+from movies.similar import BATCH_SIZE, refresh_similar_movies
+
+
+class Command(BaseCommand):
+    help = 'Recompute the "more like this" lists affected by the movies changed since the last run.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true', help='recompute the list of every movie')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='movies scored against the catalogue at once')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1.')
+        start = time.perf_counter()
+        count, rebuilt = refresh_similar_movies(options['rebuild'], options['batch_size'])
+        mode = 'Rebuilt' if rebuilt else 'Refreshed'
+        self.stdout.write(f'{mode} the similar movies of {count} movies in {time.perf_counter() - start:.2f}s')
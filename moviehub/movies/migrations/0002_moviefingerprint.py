@@ -0,0 +1,27 @@
+# Generated by Django 5.0.6 on 2026-10-18 18:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MovieFingerprint',
+            fields=[
+                ('movie', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to='movies.movie')),
+                ('natural_key', models.CharField(max_length=40, unique=True)),
+                ('fingerprint', models.CharField(max_length=40)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='movie',
+            name='duration',
+            field=models.PositiveIntegerField(),
+        ),
+    ]
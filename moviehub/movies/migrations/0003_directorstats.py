@@ -0,0 +1,53 @@
+# Generated by Django 5.0.6 on 2026-10-18 18:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Avg, Count, Sum
+
+
+def populate_director_stats(apps, schema_editor):
+    #backfill the stats of the movies that already exist
+    Movie = apps.get_model('movies', 'Movie')
+    MovieActor = apps.get_model('movies', 'MovieActor')
+    DirectorStats = apps.get_model('movies', 'DirectorStats')
+    actors = dict(
+        MovieActor.objects.values('movie__director_id').annotate(unique_actors=Count('actor', distinct=True))
+        .values_list('movie__director_id', 'unique_actors')
+    )
+    rows = Movie.objects.values('director_id').annotate(
+        total_gross=Sum('gross'), average_imdb=Avg('imdb_score'), movie_count=Count('id'),
+    )
+    DirectorStats.objects.bulk_create([
+        DirectorStats(
+            director_id=row['director_id'],
+            total_gross=row['total_gross'],
+            average_imdb=row['average_imdb'],
+            movie_count=row['movie_count'],
+            unique_actors=actors.get(row['director_id'], 0),
+        )
+        for row in rows
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0002_moviefingerprint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DirectorStats',
+            fields=[
+                ('director', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='movies.director')),
+                ('total_gross', models.BigIntegerField(default=0)),
+                ('average_imdb', models.FloatField(null=True)),
+                ('movie_count', models.PositiveIntegerField(default=0)),
+                ('unique_actors', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-total_gross'], name='directorstats_gross_idx'), models.Index(fields=['-average_imdb'], name='directorstats_imdb_idx'), models.Index(fields=['-unique_actors'], name='directorstats_actors_idx')],
+            },
+        ),
+        migrations.RunPython(populate_director_stats, migrations.RunPython.noop),
+    ]
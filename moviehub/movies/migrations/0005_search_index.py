@@ -0,0 +1,49 @@
+# Generated by Django 5.0.6 on 2026-10-18 20:10
+
+from django.db import migrations
+
+#one fts5 table for movie titles, director names and actor names. the rowid encodes the source row
+#as id * 4 + kind (1 movie, 2 director, 3 actor) so triggers update and delete entries by rowid
+SOURCES = [
+    ('movie', 1, 'movies_movie', 'title'),
+    ('director', 2, 'movies_director', 'name'),
+    ('actor', 3, 'movies_actor', 'name'),
+]
+
+
+def forward_sql():
+    statements = [
+        "CREATE VIRTUAL TABLE movies_search USING fts5(name, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')",
+    ]
+    for kind, code, table, column in SOURCES:
+        statements += [
+            f"INSERT INTO movies_search (rowid, name) SELECT id * 4 + {code}, {column} FROM {table}",
+            f"""CREATE TRIGGER movies_search_{kind}_insert AFTER INSERT ON {table} BEGIN
+                INSERT INTO movies_search (rowid, name) VALUES (new.id * 4 + {code}, new.{column});
+            END""",
+            f"""CREATE TRIGGER movies_search_{kind}_update AFTER UPDATE OF {column} ON {table} BEGIN
+                UPDATE movies_search SET name = new.{column} WHERE rowid = old.id * 4 + {code};
+            END""",
+            f"""CREATE TRIGGER movies_search_{kind}_delete AFTER DELETE ON {table} BEGIN
+                DELETE FROM movies_search WHERE rowid = old.id * 4 + {code};
+            END""",
+        ]
+    return statements
+
+
+def reverse_sql():
+    statements = []
+    for kind, code, table, column in SOURCES:
+        statements += [f"DROP TRIGGER movies_search_{kind}_{event}" for event in ('insert', 'update', 'delete')]
+    return statements + ["DROP TABLE movies_search"]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0004_movie_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RunSQL(forward_sql(), reverse_sql()),
+    ]
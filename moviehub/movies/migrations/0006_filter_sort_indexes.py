@@ -0,0 +1,75 @@
+# Generated by Django 5.0.6 on 2026-10-18 20:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+#foreign key indexes created by 0001_initial -> (table, column)
+DROPPED_INDEXES = {
+    'movies_movie_language_id_84e94cd0': ('movies_movie', 'language_id'),
+    'movies_movie_content_rating_id_8c90f13a': ('movies_movie', 'content_rating_id'),
+    'movies_movieactor_actor_id_3d546d87': ('movies_movieactor', 'actor_id'),
+    'movies_moviegenre_genre_id_f324e400': ('movies_moviegenre', 'genre_id'),
+}
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0005_search_index'),
+    ]
+
+    operations = [
+        #the single-column foreign key indexes are prefixes of the composite indexes below. sqlite can only
+        #change a field by rebuilding its table, which would also drop the search triggers of migration 0005,
+        #so only the state is altered and the old indexes are dropped by name
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='movie',
+                    name='content_rating',
+                    field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='movies.contentrating'),
+                ),
+                migrations.AlterField(
+                    model_name='movie',
+                    name='language',
+                    field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='movies.language'),
+                ),
+                migrations.AlterField(
+                    model_name='movieactor',
+                    name='actor',
+                    field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='movies.actor'),
+                ),
+                migrations.AlterField(
+                    model_name='moviegenre',
+                    name='genre',
+                    field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='movies.genre'),
+                ),
+            ],
+            database_operations=[
+                migrations.RunSQL(
+                    [f'DROP INDEX {name}' for name in DROPPED_INDEXES],
+                    [f'CREATE INDEX {name} ON {table} ({column})' for name, (table, column) in DROPPED_INDEXES.items()],
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='movie',
+            index=models.Index(fields=['year', 'title', 'id'], name='movie_year_title_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movie',
+            index=models.Index(fields=['language', 'title', 'id'], name='movie_language_title_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movie',
+            index=models.Index(fields=['content_rating', 'title', 'id'], name='movie_rating_title_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movieactor',
+            index=models.Index(fields=['actor', 'movie'], name='movieactor_actor_movie_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='moviegenre',
+            index=models.Index(fields=['genre', 'movie'], name='moviegenre_genre_movie_idx'),
+        ),
+    ]
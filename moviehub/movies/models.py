@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import connection, models
 
 class Director(models.Model):
     id = models.AutoField(primary_key=True) #explicit PK
@@ -48,36 +48,130 @@ class ContentRating(models.Model):
         return self.rating
     
 
+class MovieQuerySet(models.QuerySet):
+    def distinct_years(self):
+        #the distinct years in ascending order as one index seek per year (a loose index scan over
+        #movie_year_title_idx) instead of reading every row like values('year').distinct() does
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'WITH RECURSIVE years(year) AS ('
+                ' SELECT MIN(year) FROM movies_movie'
+                ' UNION ALL'
+                ' SELECT (SELECT MIN(year) FROM movies_movie WHERE year > years.year) FROM years WHERE years.year IS NOT NULL'
+                ') SELECT year FROM years WHERE year IS NOT NULL'
+            )
+            return [year for year, in cursor.fetchall()]
+
+    def with_details(self):
+        #join the single-valued relations and batch-load actors and genres, so rendering names
+        #(movie_detail, MovieSerializer) costs a fixed number of queries for any number of movies
+        return self.select_related('director', 'language', 'country', 'content_rating').prefetch_related('actors', 'genres')
+
+    def with_relation_ids(self):
+        #batch-load only the actor and genre ids, enough for the serializers that render primary keys
+        return self.prefetch_related(
+            models.Prefetch('actors', queryset=Actor.objects.only('id')),
+            models.Prefetch('genres', queryset=Genre.objects.only('id')),
+        )
+
+
 class Movie(models.Model):
     id = models.AutoField(primary_key=True)  #explicit PK
     title = models.CharField(max_length=255) #not unique, movies may have identical titles
     director = models.ForeignKey(Director, on_delete=models.CASCADE)  #FK to Director
     duration = models.PositiveIntegerField()
     gross = models.BigIntegerField()
-    language = models.ForeignKey(Language, on_delete=models.CASCADE)  #FK to Language
+    language = models.ForeignKey(Language, on_delete=models.CASCADE, db_index=False)  #FK to Language, indexed by movie_language_title_idx
     country = models.ForeignKey(Country, on_delete=models.CASCADE)  #FK to Country
-    content_rating = models.ForeignKey(ContentRating, on_delete=models.CASCADE)  #FK to ContentRating
+    content_rating = models.ForeignKey(ContentRating, on_delete=models.CASCADE, db_index=False)  #FK to ContentRating, indexed by movie_rating_title_idx
     budget = models.BigIntegerField()
     year = models.IntegerField()
     imdb_score = models.FloatField()
     actors = models.ManyToManyField(Actor, through='MovieActor')  #Many-to-Many relationship with Actor
     genres = models.ManyToManyField(Genre, through='MovieGenre')  #Many-to-Many relationship with Genre
 
+    objects = MovieQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            #(key, id) indexes behind the keyset pagination of the api list endpoints and the leaderboards
+            models.Index(fields=['title', 'id'], name='movie_title_id_idx'),
+            models.Index(fields=['gross', 'id'], name='movie_gross_id_idx'),
+            models.Index(fields=['imdb_score', 'id'], name='movie_imdb_score_id_idx'),
+            #filter column first, then the (title, id) order of the html lists: a filtered page is an index range
+            #walk that stops after one page instead of a sort of every matching movie
+            models.Index(fields=['year', 'title', 'id'], name='movie_year_title_idx'),
+            models.Index(fields=['language', 'title', 'id'], name='movie_language_title_idx'),
+            models.Index(fields=['content_rating', 'title', 'id'], name='movie_rating_title_idx'),
+        ]
+
     def __str__(self):
         return self.title
     
 
 class MovieActor(models.Model):
     movie = models.ForeignKey(Movie, on_delete=models.CASCADE)  #FK to Movie
-    actor = models.ForeignKey(Actor, on_delete=models.CASCADE)  #FK to Actor
+    actor = models.ForeignKey(Actor, on_delete=models.CASCADE, db_index=False)  #FK to Actor, indexed by movieactor_actor_movie_idx
 
     class Meta:
         unique_together = ('movie', 'actor')
+        #reverse lookup, actor -> movies, answered from the index alone
+        indexes = [models.Index(fields=['actor', 'movie'], name='movieactor_actor_movie_idx')]
 
 
 class MovieGenre(models.Model):
     movie = models.ForeignKey(Movie, on_delete=models.CASCADE)  #FK to Movie
-    genre = models.ForeignKey(Genre, on_delete=models.CASCADE)  #FK to Genre
+    genre = models.ForeignKey(Genre, on_delete=models.CASCADE, db_index=False)  #FK to Genre, indexed by moviegenre_genre_movie_idx
+
+    class Meta:
+        unique_together = ('movie', 'genre')
+        #reverse lookup, genre -> movies, answered from the index alone
+        indexes = [models.Index(fields=['genre', 'movie'], name='moviegenre_genre_movie_idx')]
+
+class MovieFingerprint(models.Model):
+    movie = models.OneToOneField(Movie, on_delete=models.CASCADE, primary_key=True)  #one fingerprint per imported movie
+    natural_key = models.CharField(max_length=40, unique=True)  #hash of normalized title, year and director
+    fingerprint = models.CharField(max_length=40)  #hash of every imported column, changes when the csv row changes
+
+    def __str__(self):
+        return self.natural_key
+
+
+class DirectorStats(models.Model):
+    #materialized per-director aggregates for the leaderboards, kept up to date by movies/signals.py
+    director = models.OneToOneField(Director, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    total_gross = models.BigIntegerField(default=0)
+    average_imdb = models.FloatField(null=True)
+    movie_count = models.PositiveIntegerField(default=0)
+    unique_actors = models.PositiveIntegerField(default=0)  #distinct actors across all of the director's movies
+
+    class Meta:
+        #one index per leaderboard so the top-N is read off the index
+        indexes = [
+            models.Index(fields=['-total_gross'], name='directorstats_gross_idx'),
+            models.Index(fields=['-average_imdb'], name='directorstats_imdb_idx'),
+            models.Index(fields=['-unique_actors'], name='directorstats_actors_idx'),
+        ]
+
+    def __str__(self):
+        return str(self.director)
+
+
+class SimilarMovie(models.Model):
+    #precomputed "more like this" lists, rank 1 is the most similar movie; written by movies/similar.py
+    movie = models.ForeignKey(Movie, on_delete=models.CASCADE, related_name='similar_movies', db_index=False)  #indexed by the (movie, rank) constraint
+    #no database constraint: rows pointing to a deleted movie stay until the refresh that replaces them,
+    #and the join to the similar movie skips them meanwhile
+    similar = models.ForeignKey(Movie, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+')
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
 
     class Meta:
-        unique_together = ('movie', 'genre')
\ No newline at end of file
+        #a movie's list is one range of this index, in rank order
+        unique_together = ('movie', 'rank')
+
+
+class SimilarityRefresh(models.Model):
+    #queue of movies whose similar movies may have changed, drained by the refresh_similar_movies command.
+    #a movie may be queued many times, the refresh handles the rows up to the last id it read
+    movie_id = models.IntegerField()  #plain id, the movie may have been deleted since
@@ -0,0 +1,181 @@
+import base64
+import json
+from django.conf import settings
+from django.core.exceptions import ValidationError as FieldValidationError
+from django.db.models import Q
+from django.utils.functional import SimpleLazyObject
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+from .sqlite import MAX_INTEGER
+
+
+#================== HTML LIST VIEWS ==================
+class CountlessPage:
+    #one page of an html list: only previous/next navigation, so no COUNT(*) of the filtered table is needed
+    def __init__(self, object_list, number, page_size, has_next, query):
+        self.object_list = object_list
+        self.number = number
+        self.page_size = page_size
+        self.has_next = has_next
+        self.has_previous = number > 1
+        self.start_index = (number - 1) * page_size + 1 if object_list else 0
+        self.end_index = self.start_index + len(object_list) - 1 if object_list else 0
+        #querystrings of the neighbouring pages, keeping the filters and sorting of the current request
+        self.next_query = self.page_query(query, number + 1) if self.has_next else ''
+        self.previous_query = self.page_query(query, number - 1) if self.has_previous else ''
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @staticmethod
+    def page_query(query, number):
+        query = query.copy()
+        query['page'] = number
+        return query.urlencode()
+
+
+def get_html_page_size(request):
+    #?page_size= overrides MOVIEHUB_PAGE_SIZE up to MOVIEHUB_MAX_PAGE_SIZE
+    default = getattr(settings, 'MOVIEHUB_PAGE_SIZE', 50)
+    try:
+        page_size = int(request.GET.get('page_size', default))
+    except ValueError:
+        return default
+    return max(1, min(page_size, getattr(settings, 'MOVIEHUB_MAX_PAGE_SIZE', 200)))
+
+
+def paginate_without_count(request, queryset, page_size=None):
+    #slice ?page= out of an ordered queryset, fetching one extra row to know whether a next page exists
+    page_size = page_size or get_html_page_size(request)
+    try:
+        number = max(1, int(request.GET.get('page', 1)))
+    except ValueError:
+        number = 1
+    #a page past the end is empty, but its offset must still fit in an sqlite integer
+    number = min(number, MAX_INTEGER // page_size)
+    offset = (number - 1) * page_size
+    rows = list(queryset[offset:offset + page_size + 1])
+    return CountlessPage(rows[:page_size], number, page_size, len(rows) > page_size, request.GET)
+
+
+def lazy_page(request, queryset, page_size=None):
+    #paginate_without_count on first use: a page rendered inside a {% cache %} fragment is only queried on a miss
+    return SimpleLazyObject(lambda: paginate_without_count(request, queryset, page_size))
+
+
+#================== API LIST VIEWS ==================
+class KeysetPagination(BasePagination):
+    #keyset (cursor) pagination on a (key, id) pair: every page is an index range scan from the last row
+    #of the previous page, without COUNT(*) and without OFFSET, and rows do not shift while a crawl runs.
+    #the cursor is opaque to clients, they follow the "next" link until it is null
+    cursor_query_param = 'cursor'
+    ordering_query_param = 'ordering'
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self, orderings, default_ordering, page_size):
+        #orderings: allowed values of ?ordering=, a leading "-" sorts descending
+        self.orderings = orderings
+        self.default_ordering = default_ordering
+        self.page_size = page_size
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def encode_cursor(self, ordering, value, pk):
+        data = json.dumps([ordering, value, pk], separators=(',', ':')).encode('utf-8')
+        return base64.urlsafe_b64encode(data).decode('ascii')
+
+    def decode_cursor(self, encoded, model):
+        #the value goes into a filter on the ordering key, so it has to be a value of that field; a cursor
+        #that was not issued by get_next_link is not found rather than reaching the query
+        try:
+            ordering, value, pk = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if ordering not in self.orderings or type(pk) is not int or value is None or isinstance(value, (bool, list, dict)):
+            raise NotFound(self.invalid_cursor_message)
+        try:
+            value = model._meta.get_field(ordering.lstrip('-')).to_python(value)
+        except (TypeError, ValueError, FieldValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        if any(isinstance(number, int) and not -MAX_INTEGER - 1 <= number <= MAX_INTEGER for number in (value, pk)):
+            raise NotFound(self.invalid_cursor_message)
+        return ordering, value, pk
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded:
+            #the cursor remembers the ordering it was issued for
+            self.ordering, value, pk = self.decode_cursor(encoded, queryset.model)
+        else:
+            self.ordering = request.query_params.get(self.ordering_query_param, self.default_ordering)
+            if self.ordering not in self.orderings:
+                raise ValidationError({self.ordering_query_param: f'Choose one of {", ".join(self.orderings)}.'})
+        descending = self.ordering.startswith('-')
+        self.key = self.ordering.lstrip('-')
+
+        queryset = queryset.order_by(self.ordering, '-pk' if descending else 'pk')
+        if encoded:
+            #(key, id) > (value, pk) written as a range on key plus a tie-break on id, so the index seeks to value
+            after, at = ('lt', 'lte') if descending else ('gt', 'gte')
+            queryset = queryset.filter(**{f'{self.key}__{at}': value}).filter(
+                Q(**{f'{self.key}__{after}': value}) | Q(**{f'pk__{after}': pk})
+            )
+
+        #one extra row tells whether there is a next page
+        page_size = self.get_page_size(request)
+        rows = list(queryset[:page_size + 1])
+        self.has_next = len(rows) > page_size
+        self.page = rows[:page_size]
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        last = self.page[-1]
+        #rows are model instances, or dicts from values() on the fast list path (movies/fast_serializers.py)
+        value, pk = (last[self.key], last['pk']) if isinstance(last, dict) else (getattr(last, self.key), last.pk)
+        cursor = self.encode_cursor(self.ordering, value, pk)
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.get_next_link(), 'results': data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class OptInKeysetPagination(PageNumberPagination):
+    #page number pagination by default; ?cursor=... or ?pagination=cursor switches to KeysetPagination
+    #on the orderings the view declares in keyset_orderings (first entry is the default)
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if request.query_params.get('cursor') or request.query_params.get('pagination') == 'cursor':
+            orderings = view.keyset_orderings
+            self.keyset = KeysetPagination(orderings, orderings[0], self.get_page_size(request) or self.page_size)
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -0,0 +1,163 @@
+#query count and latency measurement of every route in movies/urls.py and movies/api_urls.py
+#used by the route regression test and benchmarks/route_bench.py
+import json
+import time
+from urllib.parse import urlencode
+from django.conf import settings
+from django.db import connection
+from django.urls import URLPattern, reverse
+from .cache import clear_caches
+from . import api_urls, urls
+from .graph import GRAPH
+from .models import Director, Genre, Movie, MovieActor
+from .typeahead import INDEXES
+
+#checked-in results of benchmarks/route_bench.py, per dataset size and route
+BASELINE_PATH = settings.BASE_DIR / 'benchmarks' / 'route_baseline.json'
+
+#url parameter values, taken from the seeded catalogue
+SAMPLE_KWARGS = {
+    'pk': lambda: Movie.objects.order_by('id').values_list('id', flat=True).first(),
+    'director_id': lambda: Director.objects.order_by('-stats__movie_count', 'id').values_list('id', flat=True).first(),
+    'genre': lambda: Genre.objects.order_by('id').values_list('name', flat=True).first(),
+    'actor_id': lambda: MovieActor.objects.order_by('id').values_list('actor_id', flat=True).first(),
+    #an actor of the tenth movie, in the same seeded batch (and so usually connected to) the first actor
+    'other_id': lambda: MovieActor.objects.filter(movie__in=Movie.objects.order_by('id')[:10]).order_by('-id').values_list('actor_id', flat=True).first(),
+}
+
+#querystrings of routes that do nothing useful without one
+SAMPLE_QUERIES = {
+    'api:search': lambda: {'q': Movie.objects.order_by('id').values_list('title', flat=True).first().split()[0][:3]},
+    'api:typeahead': lambda: {'kind': 'actor', 'q': 'jo'},
+    'api:faceted_search': lambda: {'genre': 'Drama', 'year_from': 2000},
+}
+
+#routes left out of the measurements: the bulk endpoint has no GET to measure, and the export reads the
+#whole catalogue by design, three queries per chunk (benchmarks/export_bench.py measures it instead)
+UNMEASURED_ROUTES = {'api:bulk_movies', 'api:export_movies'}
+
+
+def iter_routes():
+    #(reverse name, pattern) for every named route, the api include inside movies/urls.py is walked once through api_urls
+    for pattern in urls.urlpatterns:
+        if isinstance(pattern, URLPattern):
+            yield pattern.name, pattern
+    for pattern in api_urls.urlpatterns:
+        name = f'{api_urls.app_name}:{pattern.name}'
+        if name not in UNMEASURED_ROUTES:
+            yield name, pattern
+
+
+def route_url(name, pattern):
+    kwargs = {key: SAMPLE_KWARGS[key]() for key in pattern.pattern.converters}
+    url = reverse(name, kwargs=kwargs)
+    if name in SAMPLE_QUERIES:
+        url += '?' + urlencode(SAMPLE_QUERIES[name]())
+    return url
+
+
+class QueryTimer:
+    #execute_wrapper that counts the queries of a request and adds up their execution time
+    def __init__(self):
+        self.count = 0
+        self.elapsed = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.elapsed += time.perf_counter() - start
+
+
+class QueryRecorder:
+    #execute_wrapper that keeps the sql and parameters of every query, to explain them afterwards
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries.append((sql, params))
+        return execute(sql, params, many, context)
+
+
+def explain(sql, params):
+    #the detail column of sqlite's EXPLAIN QUERY PLAN, one line per step
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def route_query_plans(client, url):
+    #(sql, plan) of every read the route runs
+    recorder = QueryRecorder()
+    with connection.execute_wrapper(recorder):
+        client.get(url)
+    return [(sql, explain(sql, params)) for sql, params in recorder.queries if sql.lstrip().upper().startswith(('SELECT', 'WITH'))]
+
+
+def reset_caches():
+    #drop the caches, so a request pays for building them at any size
+    clear_caches()
+    for index in INDEXES.values():
+        index.clear()
+    GRAPH.clear()
+
+
+def measure_route(client, url, repeat=3):
+    #query count, best sql and wall time of cold requests: the caches are dropped before each one, so the
+    #cached routes (leaderboards, detail endpoints, page fragments) are timed on the path that fills the cache
+    result = None
+    for _ in range(repeat):
+        reset_caches()
+        timer = QueryTimer()
+        with connection.execute_wrapper(timer):
+            start = time.perf_counter()
+            response = client.get(url)
+            if response.streaming:
+                b''.join(response.streaming_content)
+            wall = time.perf_counter() - start
+        if result is None:
+            result = {'status': response.status_code, 'queries': timer.count, 'sql_ms': timer.elapsed * 1000, 'wall_ms': wall * 1000}
+        else:
+            result['sql_ms'] = min(result['sql_ms'], timer.elapsed * 1000)
+            result['wall_ms'] = min(result['wall_ms'], wall * 1000)
+    return result
+
+
+def measure_routes(client, repeat=3):
+    return {name: measure_route(client, route_url(name, pattern), repeat) for name, pattern in iter_routes()}
+
+
+def load_baseline(path):
+    with open(path) as file:
+        return json.load(file)
+
+
+def query_count_regressions(results_by_size, baseline=None):
+    #routes whose query count changes with the dataset size, or exceeds the baseline count
+    problems = []
+    sizes = sorted(results_by_size, key=int)
+    for name in results_by_size[sizes[0]]:
+        counts = {size: results_by_size[size][name]['queries'] for size in sizes}
+        if len(set(counts.values())) > 1:
+            problems.append(f'{name}: query count grows with dataset size {counts}')
+        for size in sizes:
+            allowed = (baseline or {}).get(size, {}).get(name, {}).get('queries')
+            if allowed is not None and counts[size] > allowed:
+                problems.append(f'{name}: {counts[size]} queries at {size} movies, baseline {allowed}')
+    return problems
+
+
+def latency_regressions(results_by_size, baseline, tolerance=0.5, slack_ms=5.0):
+    #routes slower than the baseline by more than tolerance (relative) plus slack_ms (absolute, absorbs timer noise)
+    problems = []
+    for size, results in results_by_size.items():
+        for name, result in results.items():
+            expected = baseline.get(size, {}).get(name)
+            if expected is None:
+                continue
+            limit = expected['wall_ms'] * (1 + tolerance) + slack_ms
+            if result['wall_ms'] > limit:
+                problems.append(f"{name}: {result['wall_ms']:.1f}ms at {size} movies, baseline {expected['wall_ms']:.1f}ms")
+    return problems
@@ -0,0 +1,64 @@
+#full-text search over movie titles, director names and actor names
+#backed by the sqlite fts5 table movies_search, which migration 0005 creates and keeps in sync with triggers
+import re
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from .models import Actor, Director, Movie
+
+#kind of a search entry -> code stored in its rowid (id * 4 + code)
+KINDS = {'movie': 1, 'director': 2, 'actor': 3}
+MODEL_KINDS = {Movie: 'movie', Director: 'director', Actor: 'actor'}
+#the model field each kind indexes, used for the fallback when a query has no words
+SEARCH_FIELDS = {Movie: 'title', Director: 'name', Actor: 'name'}
+MAX_LIMIT = 100
+
+
+def match_expression(query):
+    #every word of the query as a quoted prefix term, all of them required: 'dark kni' -> '"dark"* "kni"*'
+    #quoting keeps fts5 operators and punctuation typed by users out of the query syntax
+    return ' '.join(f'"{word}"*' for word in re.findall(r'\w+', query))
+
+
+def search(query, kinds=None, limit=20):
+    #best matches first (bm25), as dicts with the kind, id and name of the matched row
+    match = match_expression(query)
+    if not match:
+        return []
+    sql = 'SELECT rowid, name, rank FROM movies_search WHERE movies_search MATCH %s'
+    params = [match]
+    if kinds:
+        sql += f" AND rowid %% 4 IN ({', '.join(str(KINDS[kind]) for kind in kinds)})"
+    sql += ' ORDER BY rank LIMIT %s'
+    params.append(max(1, min(limit, MAX_LIMIT)))
+    codes = {code: kind for kind, code in KINDS.items()}
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [
+            {'kind': codes[rowid % 4], 'id': rowid // 4, 'name': name, 'score': -rank}
+            for rowid, name, rank in cursor.fetchall()
+        ]
+
+
+def filter_matching(queryset, query):
+    #restrict a Movie, Director or Actor queryset to the rows whose title/name matches query
+    match = match_expression(query)
+    if not match:
+        return queryset.filter(**{f'{SEARCH_FIELDS[queryset.model]}__icontains': query})
+    ids = RawSQL(
+        'SELECT rowid / 4 FROM movies_search WHERE movies_search MATCH %s AND rowid %% 4 = %s',
+        (match, KINDS[MODEL_KINDS[queryset.model]]),
+    )
+    return queryset.filter(pk__in=ids)
+
+
+def filter_initial(queryset, field, initial):
+    #istartswith on a single letter as two range scans, which can use the index on field
+    #('A' <= title < 'B' or 'a' <= title < 'b') instead of LOWER() on every row
+    if len(initial) == 1 and initial.isascii() and initial.isalpha():
+        upper, lower = initial.upper(), initial.lower()
+        return queryset.filter(
+            Q(**{f'{field}__gte': upper, f'{field}__lt': chr(ord(upper) + 1)})
+            | Q(**{f'{field}__gte': lower, f'{field}__lt': chr(ord(lower) + 1)})
+        )
+    return queryset.filter(**{f'{field}__istartswith': initial})
@@ -35,6 +35,7 @@ class ContentRatingSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
+#nests every relation: serialize querysets built with Movie.objects.with_details() to avoid per-movie queries
 class MovieSerializer(serializers.ModelSerializer):
     director = DirectorSerializer()
     language = LanguageSerializer()
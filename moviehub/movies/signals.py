@@ -0,0 +1,136 @@
+#keep the materialized tables, the typeahead index, the co-star graph, the similar movies queue and the cache version in sync with writes made through the ORM (forms, admin, API)
+#bulk writes (load_data.py) bypass these signals and call the refresh functions themselves
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+from .cache import bump_data_version
+from .graph import GRAPH
+from .models import Actor, ContentRating, Country, Director, Genre, Language, Movie, MovieActor, MovieGenre
+from .similar import mark_similar_stale
+from .stats import refresh_director_stats
+from .typeahead import MODEL_INDEXES
+
+
+@receiver(pre_save, sender=Movie)
+def remember_previous_director(sender, instance, **kwargs):
+    #a movie moved to another director changes the stats of both
+    instance._previous_director_id = None
+    if instance.pk is not None:
+        instance._previous_director_id = Movie.objects.filter(pk=instance.pk).values_list('director_id', flat=True).first()
+
+
+@receiver(post_save, sender=Movie)
+def movie_saved(sender, instance, **kwargs):
+    refresh_director_stats([instance.director_id, getattr(instance, '_previous_director_id', None)])
+
+
+@receiver(post_delete, sender=Movie)
+def movie_deleted(sender, instance, **kwargs):
+    refresh_director_stats([instance.director_id])
+
+
+@receiver(post_save, sender=MovieActor)
+@receiver(post_delete, sender=MovieActor)
+def movie_actor_changed(sender, instance, **kwargs):
+    #the movie may already be gone when its through rows are deleted in a cascade
+    refresh_director_stats(Movie.objects.filter(pk=instance.movie_id).values_list('director_id', flat=True))
+
+
+@receiver(m2m_changed, sender=Movie.actors.through)
+def movie_actors_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    #movie.actors.add/remove/set/clear and the reverse actor.movie_set calls write the through table directly
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            refresh_director_stats([instance.director_id])
+        return
+    if action == 'pre_clear':
+        #the cleared movies are only known before the clear
+        instance._cleared_movie_ids = list(instance.movie_set.values_list('id', flat=True))
+    elif action in ('post_add', 'post_remove', 'post_clear'):
+        movie_ids = pk_set if action != 'post_clear' else getattr(instance, '_cleared_movie_ids', [])
+        refresh_director_stats(Movie.objects.filter(pk__in=movie_ids).values_list('director_id', flat=True))
+
+
+@receiver(post_save, sender=MovieActor)
+def graph_edge_saved(sender, instance, **kwargs):
+    GRAPH.update(added=[(instance.movie_id, instance.actor_id)])
+
+
+@receiver(post_delete, sender=MovieActor)
+def graph_edge_deleted(sender, instance, **kwargs):
+    GRAPH.update(removed=[(instance.movie_id, instance.actor_id)])
+
+
+@receiver(m2m_changed, sender=Movie.actors.through)
+def graph_edges_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    #edges are (movie id, actor id); instance is the movie, or the actor for actor.movie_set calls
+    if GRAPH.built_at is None:
+        return
+    if action == 'pre_clear':
+        related = instance.movie_set if reverse else instance.actors
+        instance._cleared_graph_ids = list(related.values_list('id', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    related_ids = pk_set if action != 'post_clear' else getattr(instance, '_cleared_graph_ids', [])
+    edges = [(pk, instance.pk) if reverse else (instance.pk, pk) for pk in related_ids]
+    GRAPH.update(**{'added' if action == 'post_add' else 'removed': edges})
+
+
+@receiver(post_save, sender=Movie)
+@receiver(post_delete, sender=Movie)
+def movie_similarity_changed(sender, instance, **kwargs):
+    mark_similar_stale([instance.pk])
+
+
+@receiver(post_save, sender=MovieActor)
+@receiver(post_delete, sender=MovieActor)
+@receiver(post_save, sender=MovieGenre)
+@receiver(post_delete, sender=MovieGenre)
+def movie_features_changed(sender, instance, **kwargs):
+    mark_similar_stale([instance.movie_id])
+
+
+@receiver(m2m_changed, sender=Movie.actors.through)
+@receiver(m2m_changed, sender=Movie.genres.through)
+def movie_features_set(sender, instance, action, reverse, pk_set, **kwargs):
+    #instance is the movie, or the actor/genre for the reverse calls, whose movies are pk_set
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            mark_similar_stale([instance.pk])
+        return
+    if action == 'pre_clear':
+        instance._cleared_similar_ids = list(instance.movie_set.values_list('id', flat=True))
+    elif action in ('post_add', 'post_remove', 'post_clear'):
+        mark_similar_stale(pk_set if action != 'post_clear' else getattr(instance, '_cleared_similar_ids', []))
+
+
+@receiver(post_save, sender=Director)
+@receiver(post_save, sender=Actor)
+def name_saved(sender, instance, **kwargs):
+    MODEL_INDEXES[sender].update(instance.pk, instance.name)
+
+
+@receiver(post_delete, sender=Director)
+@receiver(post_delete, sender=Actor)
+def name_deleted(sender, instance, **kwargs):
+    MODEL_INDEXES[sender].remove(instance.pk)
+
+
+#every table a cached result may be derived from
+CATALOGUE_MODELS = [Movie, MovieActor, MovieGenre, Director, Actor, Genre, Language, Country, ContentRating]
+
+
+def catalogue_changed(sender, **kwargs):
+    bump_data_version()
+
+
+def catalogue_relations_changed(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        bump_data_version()
+
+
+for model in CATALOGUE_MODELS:
+    post_save.connect(catalogue_changed, sender=model, dispatch_uid=f'catalogue_saved_{model.__name__}')
+    post_delete.connect(catalogue_changed, sender=model, dispatch_uid=f'catalogue_deleted_{model.__name__}')
+for through in (Movie.actors.through, Movie.genres.through):
+    m2m_changed.connect(catalogue_relations_changed, sender=through, dispatch_uid=f'catalogue_m2m_{through.__name__}')
@@ -0,0 +1,199 @@
+#"more like this": the TOP_K most similar movies of every movie, precomputed into the SimilarMovie table so the
+#detail page and /api/movies/<id>/similar/ read a movie's list as one range of the (movie, rank) index.
+#movies are compared on sparse feature vectors built from MovieGenre and MovieActor (the cosine of their
+#genres and of their actors) plus the same director, the same language and a nearby year and imdb score.
+#the score of a pair depends on the two movies only (no catalogue-wide weights), which is what lets the
+#incremental refresh below recompute a few lists and still match a full rebuild.
+#scores are computed offline, a batch of movies against the whole catalogue at a time, with numpy over the
+#columnar copy of movies/analytics.py. writes queue the movies they change in SimilarityRefresh (signals for
+#orm writes, the bulk paths themselves) and refresh_similar_movies recomputes only the lists that can change:
+#those of the queued movies, those that show a queued movie, and those a queued movie now scores high enough
+#to enter
+import numpy as np
+from django.db import connection, transaction
+from django.db.models import Max
+from .analytics import CSR, get_catalogue
+from .graph import gather
+from .models import SimilarMovie, SimilarityRefresh
+from .sqlite import LOOKUP_CHUNK_SIZE
+
+TOP_K = 10
+#movies scored against the whole catalogue at once: small batches keep the batch x catalogue arrays in cache
+BATCH_SIZE = 16
+#weight of every part of the score
+WEIGHTS = {'genres': 1.0, 'actors': 2.0, 'director': 1.0, 'language': 0.5, 'year': 0.5, 'imdb_score': 0.5}
+#the year and imdb score parts fall from 1 for equal values to 0 at this distance
+YEAR_WINDOW = 10
+IMDB_SCORE_WINDOW = 2.0
+#scores are rounded so that a pair scores the same in any batch and from either side
+DECIMALS = 6
+#a queue holding more than this fraction of the catalogue is handled with a full rebuild
+REBUILD_FRACTION = 0.25
+
+
+def _chunks(items, size=LOOKUP_CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class Similarity:
+    #the feature arrays of a loaded catalogue; movies are addressed by catalogue row
+    def __init__(self, catalogue):
+        self.catalogue = catalogue
+        #genres are few: a dense row-normalized movie x genre matrix, their cosines are one matrix product
+        self.genres = np.zeros((len(catalogue), len(catalogue.genre_names)))
+        self.genres[catalogue.genres.rows, catalogue.genres.indices] = 1
+        norms = np.sqrt(self.genres.sum(axis=1))
+        self.genres /= np.where(norms > 0, norms, 1)[:, None]
+        #actors are many: shared actors are counted through the posting lists, actor -> movie rows
+        self.actor_counts = np.diff(catalogue.actors.indptr)
+        self.actor_movies = CSR(catalogue.actors.indices, catalogue.actors.rows, len(catalogue.actor_names))
+        self.year = catalogue.metrics['year'].astype(np.float64)
+        self.imdb_score = catalogue.metrics['imdb_score'].astype(np.float64)
+
+    def __len__(self):
+        return len(self.catalogue)
+
+    def shared_actors(self, rows):
+        #(position in rows, movie row, shared actor count) of the movies sharing actors with one of rows: every
+        #actor of the rows, then every movie of those actors, counted per pair
+        actors, _ = gather(self.catalogue.actors, rows)
+        owners = np.repeat(np.arange(len(rows)), self.actor_counts[rows])
+        movies, _ = gather(self.actor_movies, actors)
+        owners = np.repeat(owners, np.diff(self.actor_movies.indptr)[actors])
+        pairs, shared = np.unique(owners * len(self) + movies, return_counts=True)
+        return pairs // len(self), pairs % len(self), shared
+
+    def scores(self, rows):
+        #(position in rows, movie row, score) of the candidate pairs of rows, sorted by position then movie. a
+        #candidate shares a genre, an actor or the director with the movie and is not the movie itself. only
+        #the genre cosines are computed against every movie (one matrix product), the other terms for the
+        #candidates, a fraction of the catalogue
+        catalogue, size = self.catalogue, len(self)
+        genres = self.genres[rows] @ self.genres.T
+        candidates = genres > 0
+        candidates |= np.equal(catalogue.director[rows][:, None], catalogue.director)
+        actor_owners, actor_movies, shared = self.shared_actors(rows)
+        other = actor_movies != rows[actor_owners]
+        actor_owners, actor_movies, shared = actor_owners[other], actor_movies[other], shared[other]
+        candidates[actor_owners, actor_movies] = True
+        candidates[np.arange(len(rows)), rows] = False
+
+        #flat positions of the candidates, in (position in rows, movie) order
+        pairs = np.flatnonzero(candidates)
+        owners, movies = pairs // size, pairs % size
+        score = WEIGHTS['genres'] * genres.ravel()[pairs]
+        score[np.searchsorted(pairs, actor_owners * size + actor_movies)] += (
+            WEIGHTS['actors'] * shared / np.sqrt(self.actor_counts[rows][actor_owners] * self.actor_counts[actor_movies])
+        )
+        #the movie's side of every pair, repeated over its candidates
+        counts = np.bincount(owners, minlength=len(rows))
+        def source(values):
+            return np.repeat(values[rows], counts)
+        score += WEIGHTS['director'] * (source(catalogue.director) == catalogue.director[movies])
+        score += WEIGHTS['language'] * (source(catalogue.language) == catalogue.language[movies])
+        #weight * max(0, 1 - distance / window) for the year and the imdb score
+        score += WEIGHTS['year'] * np.maximum(0, 1 - np.abs(source(self.year) - self.year[movies]) / YEAR_WINDOW)
+        score += WEIGHTS['imdb_score'] * np.maximum(0, 1 - np.abs(source(self.imdb_score) - self.imdb_score[movies]) / IMDB_SCORE_WINDOW)
+        return owners, movies, np.round(score, DECIMALS)
+
+    def neighbours(self, rows, k=TOP_K):
+        #[(similar movie rows, scores)] for each of rows: its k best candidates, ties broken by the lower id
+        owners, movies, scores = self.scores(rows)
+        bounds = np.searchsorted(owners, np.arange(len(rows) + 1))
+        result = []
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            row_movies, row_scores = movies[start:end], scores[start:end]
+            if len(row_scores) > k:
+                #only the candidates that can make the top k are sorted: down to the k-th score, ties included
+                keep = row_scores >= np.partition(row_scores, -k)[-k]
+                row_movies, row_scores = row_movies[keep], row_scores[keep]
+            #catalogue rows are in id order, so the row breaks ties like the id
+            order = np.lexsort((row_movies, -row_scores))[:k]
+            result.append((row_movies[order], row_scores[order]))
+        return result
+
+    def similar_movie_rows(self, rows):
+        #(movie id, rank, similar id, score) of the lists of the given catalogue rows
+        ids = self.catalogue.ids
+        return [
+            (int(ids[row]), rank, int(ids[similar]), float(score))
+            for row, (similar_rows, scores) in zip(rows, self.neighbours(rows))
+            for rank, (similar, score) in enumerate(zip(similar_rows, scores), start=1)
+        ]
+
+    def affected_rows(self, movie_ids, batch_size=BATCH_SIZE):
+        #catalogue rows whose lists can change when the given movies changed (or were deleted): the movies
+        #themselves, the movies that list one of them, and the movies one of them now scores high enough to
+        #enter, i.e. at least the last score of a full list (and as a candidate, any list that is not full)
+        catalogue = self.catalogue
+        affected = np.zeros(len(self), dtype=bool)
+        affected[self.rows(movie_ids)] = True
+        for chunk in _chunks(movie_ids):
+            affected[self.rows(SimilarMovie.objects.filter(similar_id__in=chunk).values_list('movie_id', flat=True))] = True
+
+        #the last score of every full list, one scan of the table
+        last = np.array(SimilarMovie.objects.filter(rank=TOP_K).values_list('movie_id', 'score')).reshape(-1, 2)
+        thresholds = np.full(len(self), -np.inf)
+        present = self.present(last[:, 0].astype(np.int64))
+        thresholds[np.searchsorted(catalogue.ids, last[present, 0].astype(np.int64))] = last[present, 1]
+        rows = self.rows(movie_ids)
+        for start in range(0, len(rows), batch_size):
+            _, movies, scores = self.scores(rows[start:start + batch_size])
+            affected[movies[scores >= thresholds[movies]]] = True
+        return np.flatnonzero(affected)
+
+    def present(self, movie_ids):
+        #mask of the ids that are movies of the catalogue
+        positions = np.minimum(np.searchsorted(self.catalogue.ids, movie_ids), max(len(self) - 1, 0))
+        return (self.catalogue.ids[positions] == movie_ids) if len(self) else np.zeros(len(movie_ids), dtype=bool)
+
+    def rows(self, movie_ids):
+        #sorted catalogue rows of the ids that are still movies
+        movie_ids = np.unique(np.array(list(movie_ids), dtype=np.int64))
+        return np.searchsorted(self.catalogue.ids, movie_ids[self.present(movie_ids)])
+
+
+def _insert(rows):
+    #a plain executemany: the lists are a million rows on a large catalogue, and building a model instance
+    #per row for bulk_create would cost more than scoring them
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(SimilarMovie._meta.get_field(name).column) for name in ('movie', 'rank', 'similar', 'score'))
+    with connection.cursor() as cursor:
+        cursor.executemany(f'INSERT INTO {quote(SimilarMovie._meta.db_table)} ({columns}) VALUES (%s, %s, %s, %s)', rows)
+
+
+def mark_similar_stale(movie_ids):
+    #queue the movies for the next refresh
+    SimilarityRefresh.objects.bulk_create([SimilarityRefresh(movie_id=movie_id) for movie_id in set(movie_ids) if movie_id is not None])
+
+
+def refresh_similar_movies(rebuild=False, batch_size=BATCH_SIZE):
+    #drain the queue, recomputing the affected lists in one transaction, or every list when rebuild is set,
+    #nothing was computed yet or the queue is long. returns (movies recomputed, whether it was a full rebuild)
+    last = SimilarityRefresh.objects.aggregate(last=Max('id'))['last']
+    queued = list(SimilarityRefresh.objects.filter(id__lte=last).values_list('movie_id', flat=True).distinct()) if last else []
+    similarity = Similarity(get_catalogue())
+    rebuild = rebuild or len(queued) > REBUILD_FRACTION * len(similarity) or not SimilarMovie.objects.exists()
+    with transaction.atomic():
+        if rebuild:
+            SimilarMovie.objects.all().delete()
+            rows = np.arange(len(similarity))
+        else:
+            rows = similarity.affected_rows(queued, batch_size) if queued else np.array([], dtype=np.int64)
+            for chunk in _chunks(rows):
+                SimilarMovie.objects.filter(movie_id__in=similarity.catalogue.ids[chunk].tolist()).delete()
+        for start in range(0, len(rows), batch_size):
+            _insert(similarity.similar_movie_rows(rows[start:start + batch_size]))
+        if last:
+            #movies queued meanwhile stay for the next refresh
+            SimilarityRefresh.objects.filter(id__lte=last).delete()
+    return len(rows), rebuild
+
+
+def similar_movies(movie_id):
+    #the precomputed list of a movie, best first: one range read of the (movie, rank) index, joined to the movies
+    rows = SimilarMovie.objects.filter(movie_id=movie_id).order_by('rank').values_list(
+        'similar_id', 'similar__title', 'similar__year', 'similar__imdb_score', 'score',
+    )
+    return [{'id': pk, 'title': title, 'year': year, 'imdb_score': imdb_score, 'score': score} for pk, title, year, imdb_score, score in rows]
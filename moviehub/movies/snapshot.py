@@ -0,0 +1,145 @@
+#columnar snapshots of the catalogue for the analytics team: one zstd-compressed parquet file per table
+#(movies, the dimension tables and the actor/genre through tables), with the table's columns and ids as stored,
+#written by the export_snapshot command and loaded into an empty database by load_snapshot
+#tables are read in keyset chunks and written one row group per chunk, so the memory used stays at one chunk.
+#loading inserts whole record batches with executemany (no per-object orm work, no name lookups: the ids are
+#in the files) inside a single transaction, with the secondary indexes and the full-text insert triggers
+#dropped: each index is built again from the loaded rows in one sorted pass and the search table is filled
+#with one INSERT ... SELECT per source, instead of per-row b-tree and fts inserts (sqlite only, like the
+#search index itself). then the director stats are rebuilt
+import os
+from django.db import connection, transaction
+from .cache import bump_data_version
+from .models import Actor, ContentRating, Country, Director, Genre, Language, Movie, MovieActor, MovieGenre
+from .search import KINDS, MODEL_KINDS, SEARCH_FIELDS
+from .stats import rebuild_director_stats
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  #optional, only the snapshot commands need it
+    pa = pq = None
+
+#in load order: the tables a foreign key points to come first
+SNAPSHOT_MODELS = [Director, Actor, Genre, Language, Country, ContentRating, Movie, MovieActor, MovieGenre]
+#rows per row group on export and per executemany on load
+CHUNK_SIZE = 50000
+COMPRESSION = 'zstd'
+#internal type of a concrete field (of the field a foreign key points to) -> arrow type name
+ARROW_TYPES = {
+    'AutoField': 'int64', 'BigAutoField': 'int64', 'IntegerField': 'int64', 'BigIntegerField': 'int64',
+    'PositiveIntegerField': 'int64', 'FloatField': 'float64', 'CharField': 'string',
+}
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def require_pyarrow():
+    if pa is None:
+        raise SnapshotError('Snapshots need pyarrow: pip install pyarrow')
+
+
+def snapshot_path(directory, model):
+    return os.path.join(directory, f'{model._meta.db_table}.parquet')
+
+
+def schema(model):
+    #arrow schema of the table: its columns in model order, labelled with the model
+    fields = []
+    for field in model._meta.concrete_fields:
+        target = field.target_field if field.is_relation else field
+        fields.append(pa.field(field.column, getattr(pa, ARROW_TYPES[target.get_internal_type()])(), nullable=field.null))
+    return pa.schema(fields, metadata={'model': model._meta.label})
+
+
+def export_snapshot(directory, chunk_size=CHUNK_SIZE, compression=COMPRESSION):
+    #write every snapshot table to directory, returns {table: rows}
+    require_pyarrow()
+    os.makedirs(directory, exist_ok=True)
+    rows_written = {}
+    for model in SNAPSHOT_MODELS:
+        table_schema = schema(model)
+        attnames = [field.attname for field in model._meta.concrete_fields]
+        rows_written[model._meta.db_table] = 0
+        last_pk = None
+        with pq.ParquetWriter(snapshot_path(directory, model), table_schema, compression=compression) as writer:
+            while True:
+                queryset = model.objects.order_by('pk')
+                if last_pk is not None:
+                    queryset = queryset.filter(pk__gt=last_pk)
+                rows = list(queryset.values_list(*attnames)[:chunk_size])
+                if not rows:
+                    break
+                columns = zip(*rows)
+                writer.write_table(pa.Table.from_arrays(
+                    [pa.array(column, type=field.type) for column, field in zip(columns, table_schema)], schema=table_schema,
+                ))
+                rows_written[model._meta.db_table] += len(rows)
+                last_pk = rows[-1][0]
+    return rows_written
+
+
+def check_snapshot(directory):
+    #every table has a file with the columns of the table, raises SnapshotError otherwise
+    for model in SNAPSHOT_MODELS:
+        path = snapshot_path(directory, model)
+        if not os.path.exists(path):
+            raise SnapshotError(f'{path} is missing.')
+        expected = [field.column for field in model._meta.concrete_fields]
+        found = pq.read_schema(path).names
+        if sorted(found) != sorted(expected):
+            raise SnapshotError(f'{path} has the columns {", ".join(found)}, expected {", ".join(expected)}.')
+
+
+def _deferred_schema(cursor, tables):
+    #CREATE statements of the secondary indexes of the tables and of the full-text insert triggers, which
+    #sqlite_master keeps (the indexes of unique columns, created with their table, have none and stay)
+    cursor.execute(
+        f"SELECT type, name, sql FROM sqlite_master WHERE sql IS NOT NULL AND tbl_name IN ({', '.join(['%s'] * len(tables))})"
+        f" AND (type = 'index' OR (type = 'trigger' AND name IN ({', '.join(['%s'] * len(KINDS))})))",
+        [*tables, *(f'movies_search_{kind}_insert' for kind in KINDS)],
+    )
+    return cursor.fetchall()
+
+
+def _fill_search_index(cursor):
+    #what the dropped insert triggers would have written, one statement per source table
+    quote = connection.ops.quote_name
+    for model, kind in MODEL_KINDS.items():
+        cursor.execute(
+            f'INSERT INTO movies_search (rowid, name) SELECT id * 4 + {KINDS[kind]}, {quote(SEARCH_FIELDS[model])} '
+            f'FROM {quote(model._meta.db_table)}'
+        )
+
+
+def load_snapshot(directory, chunk_size=CHUNK_SIZE):
+    #load a snapshot into an empty catalogue in one transaction, returns {table: rows}
+    require_pyarrow()
+    check_snapshot(directory)
+    filled = [model._meta.db_table for model in SNAPSHOT_MODELS if model.objects.exists()]
+    if filled:
+        raise SnapshotError(f'Snapshots are loaded into an empty database, {", ".join(filled)} already has rows.')
+
+    quote = connection.ops.quote_name
+    rows_loaded = {}
+    with transaction.atomic(), connection.cursor() as cursor:
+        deferred = _deferred_schema(cursor, [model._meta.db_table for model in SNAPSHOT_MODELS])
+        for kind, name, _ in deferred:
+            cursor.execute(f'DROP {kind.upper()} {quote(name)}')
+        for model in SNAPSHOT_MODELS:
+            columns = [field.column for field in model._meta.concrete_fields]
+            sql = (f'INSERT INTO {quote(model._meta.db_table)} ({", ".join(quote(column) for column in columns)}) '
+                   f'VALUES ({", ".join(["%s"] * len(columns))})')
+            rows_loaded[model._meta.db_table] = 0
+            for batch in pq.ParquetFile(snapshot_path(directory, model)).iter_batches(batch_size=chunk_size, columns=columns):
+                cursor.executemany(sql, list(zip(*(batch.column(column).to_pylist() for column in columns))))
+                rows_loaded[model._meta.db_table] += batch.num_rows
+        for _, _, sql in deferred:
+            cursor.execute(sql)
+        _fill_search_index(cursor)
+        #the loaded rows bypass the signals that maintain these
+        rebuild_director_stats()
+        bump_data_version()
+    return rows_loaded
@@ -0,0 +1,21 @@
+#per-connection sqlite settings of the database profile (MOVIEHUB_DB_PROFILE in settings.py): the pragmas
+#are run on every connection django opens, in web requests, management commands and load_data.py alike.
+#journal_mode=wal is stored in the database file, the others last as long as the connection
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+#ids per IN list of the chunked lookups and deletes (bulk.py, similar.py, stats.py, load_data.py): sqlite
+#allows 32766 bound parameters per statement since 3.32, this leaves room for the statement's other parameters
+LOOKUP_CHUNK_SIZE = 10000
+#largest sqlite INTEGER: ids, offsets and filter values beyond it raise OverflowError when bound to a statement
+MAX_INTEGER = 2**63 - 1
+
+
+@receiver(connection_created)
+def apply_pragmas(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name, value in getattr(settings, 'MOVIEHUB_SQLITE_PRAGMAS', {}).items():
+            cursor.execute(f'PRAGMA {name} = {value}')
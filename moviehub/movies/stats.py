@@ -0,0 +1,48 @@
+#incremental maintenance of the DirectorStats table
+from django.db import transaction
+from django.db.models import Avg, Count, Sum
+from .models import DirectorStats, Movie, MovieActor
+from .sqlite import LOOKUP_CHUNK_SIZE
+
+
+def compute_director_stats(movies, movie_actors):
+    #unsaved DirectorStats rows of the directors of these movies: one grouped query per aggregate
+    rows = movies.values('director_id').annotate(total_gross=Sum('gross'), average_imdb=Avg('imdb_score'), movie_count=Count('id'))
+    actors = dict(
+        movie_actors.values('movie__director_id')
+        .annotate(unique_actors=Count('actor', distinct=True)).values_list('movie__director_id', 'unique_actors')
+    )
+    return [
+        DirectorStats(
+            director_id=row['director_id'],
+            total_gross=row['total_gross'],
+            average_imdb=row['average_imdb'],
+            movie_count=row['movie_count'],
+            unique_actors=actors.get(row['director_id'], 0),
+        )
+        for row in rows
+    ]
+
+
+def refresh_director_stats(director_ids):
+    #recompute the stats rows of the given directors from their movies,
+    #restricted to these directors through the director_id index
+    director_ids = sorted({director_id for director_id in director_ids if director_id is not None})
+    for start in range(0, len(director_ids), LOOKUP_CHUNK_SIZE):
+        chunk = director_ids[start:start + LOOKUP_CHUNK_SIZE]
+        stats = compute_director_stats(Movie.objects.filter(director_id__in=chunk), MovieActor.objects.filter(movie__director_id__in=chunk))
+        DirectorStats.objects.bulk_create(
+            stats, update_conflicts=True, unique_fields=['director'],
+            update_fields=['total_gross', 'average_imdb', 'movie_count', 'unique_actors'],
+        )
+        #directors left without movies drop off the leaderboards
+        with_movies = {row.director_id for row in stats}
+        DirectorStats.objects.filter(director_id__in=[director_id for director_id in chunk if director_id not in with_movies]).delete()
+
+
+def rebuild_director_stats():
+    #recompute every row, e.g. after writes that bypassed the signals: the aggregates of all directors in one
+    #pass each, inserted into the emptied table without the IN lists and upserts of refresh_director_stats
+    with transaction.atomic():
+        DirectorStats.objects.all().delete()
+        DirectorStats.objects.bulk_create(compute_director_stats(Movie.objects.all(), MovieActor.objects.all()))
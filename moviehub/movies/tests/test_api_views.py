@@ -1,8 +1,11 @@
 # movies/test_api_views.py
+import base64
+import json
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
 from movies.models import Movie
+from movies.serializers import MovieSerializer
 from movies.factories import MovieFactory, DirectorFactory, ActorFactory, GenreFactory, LanguageFactory, CountryFactory, ContentRatingFactory
 
 class MovieAPITests(APITestCase):
@@ -66,3 +69,110 @@ class MovieAPITests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.movie.refresh_from_db()
         self.assertEqual(self.movie.title, 'Updated Movie')
+
+
+class MovieQueryCountTests(APITestCase):
+    def setUp(self):
+        #create movies that share their relations, each with two actors and a genre
+        director = DirectorFactory()
+        actors = [ActorFactory() for _ in range(4)]
+        self.genre = GenreFactory(name="Drama")
+        for i in range(12):
+            movie = MovieFactory(director=director)
+            movie.actors.add(actors[i % 4], actors[(i + 1) % 4])
+            movie.genres.add(self.genre)
+
+    def test_list_endpoints_have_fixed_query_count(self):
+        #test that the list endpoints batch-load actor and genre ids instead of querying per movie
+        #count, page, actor ids, genre ids
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('api:movie_list'))
+        self.assertEqual(len(response.data['results'][0]['actors']), 2)
+        with self.assertNumQueries(4):
+            self.client.get(reverse('api:movies_by_genre', args=[self.genre.name]))
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('api:top_10_highest_grossing_movies'))
+        self.assertEqual(len(response.data), 10)
+
+    def test_detail_endpoint_has_fixed_query_count(self):
+        #test that the movie detail endpoint does not query per relation
+        movie = Movie.objects.first()
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('api:movie_detail', args=[movie.id]))
+        self.assertEqual(response.data['genres'], [self.genre.id])
+
+    def test_nested_serializer_has_fixed_query_count(self):
+        #test that the fully nested serializer renders any number of movies in a fixed number of queries
+        #movies with their foreign keys, actors, genres
+        with self.assertNumQueries(3):
+            data = MovieSerializer(Movie.objects.with_details(), many=True).data
+        self.assertEqual(len(data), 12)
+        self.assertEqual(data[0]['genres'][0]['name'], "Drama")
+
+
+class KeysetPaginationTests(APITestCase):
+    def setUp(self):
+        #create movies with repeated gross values, so pages have to break ties on the id
+        director = DirectorFactory()
+        for i in range(25):
+            MovieFactory(director=director, title=f"Movie {i:02d}", gross=(i % 4) * 1000)
+
+    def crawl(self, url, params):
+        #follow the next links and collect the titles of every page
+        titles, pages = [], 0
+        response = self.client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('count', response.data)
+            titles.extend(movie['title'] for movie in response.data['results'])
+            pages += 1
+            if response.data['next'] is None:
+                return titles, pages
+            response = self.client.get(response.data['next'])
+
+    def test_cursor_crawl_returns_every_movie_once(self):
+        #test that following the cursor visits the catalogue in (title, id) order without gaps or repeats
+        titles, pages = self.crawl(reverse('api:movie_list'), {'pagination': 'cursor'})
+        self.assertEqual(titles, [f"Movie {i:02d}" for i in range(25)])
+        self.assertEqual(pages, 3)
+
+    def test_descending_ordering_breaks_ties_on_id(self):
+        #test that a descending key with duplicates pages in (-gross, -id) order
+        titles, _ = self.crawl(reverse('api:movie_list'), {'pagination': 'cursor', 'ordering': '-gross', 'page_size': 4})
+        self.assertEqual(titles, list(Movie.objects.order_by('-gross', '-id').values_list('title', flat=True)))
+
+    def test_cursor_page_has_no_count_query(self):
+        #test that a cursor page is the page query plus the actor and genre ids, whatever the page depth
+        response = self.client.get(reverse('api:movie_list'), {'pagination': 'cursor'})
+        with self.assertNumQueries(3):
+            self.client.get(response.data['next'])
+
+    def test_default_pagination_is_unchanged(self):
+        #test that without the opt-in the endpoints keep page number pagination
+        response = self.client.get(reverse('api:movie_list'))
+        self.assertEqual(response.data['count'], 25)
+        response = self.client.get(reverse('api:director_list'), {'pagination': 'cursor'})
+        self.assertEqual(response.data['next'], None)
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test_invalid_cursor_and_ordering_are_rejected(self):
+        #test that a tampered cursor is not found and an unknown ordering is a bad request
+        response = self.client.get(reverse('api:movie_list'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.get(reverse('api:movie_list'), {'pagination': 'cursor', 'ordering': 'budget'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_cursor_values_of_the_wrong_type_are_not_found(self):
+        #test that a cursor whose value or id does not fit the ordering key never reaches the query
+        cursors = [
+            ['gross', 'abc', 1], ['gross', [1], 1], ['gross', {'a': 1}, 1], ['title', None, 1], ['imdb_score', 'x', 3],
+            ['gross', True, 1], ['gross', 10 ** 20, 1], ['gross', 1000, True], ['gross', 1000, 10 ** 20], ['title', 'Movie', '1'],
+        ]
+        genre = GenreFactory(name="Drama")
+        for cursor in cursors:
+            encoded = base64.urlsafe_b64encode(json.dumps(cursor).encode()).decode()
+            for url in (reverse('api:movie_list'), reverse('api:movies_by_genre', args=[genre.name])):
+                with self.subTest(cursor=cursor, url=url):
+                    response = self.client.get(url, {'cursor': encoded})
+                    self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+                    self.assertEqual(response.data['detail'], 'Invalid cursor')
@@ -0,0 +1,63 @@
+from django.test import TestCase
+from django.urls import reverse
+from movies.cache import clear_caches
+from movies.factories import seed_catalogue
+from movies.models import Director, Genre, Movie
+
+#sync route name -> async route name, for the same arguments
+ASYNC_ROUTES = {
+    'api:movie_list': 'api:async_movie_list',
+    'api:movie_detail': 'api:async_movie_detail',
+    'api:movies_by_genre': 'api:async_movies_by_genre',
+    'api:director_list': 'api:async_director_list',
+    'api:actor_list': 'api:async_actor_list',
+    'api:top_10_highest_grossing_movies': 'api:async_top_10_highest_grossing_movies',
+    'api:actors_with_director': 'api:async_actors_with_director',
+    'api:top_directors_by_imdb': 'api:async_top_directors_by_imdb',
+    'api:top_versatile_directors': 'api:async_top_versatile_directors',
+}
+
+
+class AsyncApiViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed_catalogue(25, seed=6)
+
+    def setUp(self):
+        clear_caches()
+        self.args = {
+            'api:movie_detail': [Movie.objects.order_by('id').first().id],
+            'api:movies_by_genre': [Genre.objects.order_by('id').first().name],
+            'api:actors_with_director': [Director.objects.order_by('id').first().id],
+        }
+
+    def fetch(self, name, query='', args_of=None):
+        return self.client.get(reverse(name, args=self.args.get(args_of or name, [])) + query, HTTP_ACCEPT='application/json')
+
+    def test_responses_match_the_drf_views(self):
+        #test that every async endpoint returns the same status and bytes as its sync counterpart
+        for sync_name, async_name in ASYNC_ROUTES.items():
+            for query in ('', '?page=2', '?page=last', '?page=99'):
+                clear_caches()
+                expected, response = self.fetch(sync_name, query), self.fetch(async_name, query, sync_name)
+                self.assertEqual(response.status_code, expected.status_code, (async_name, query))
+                #the next and previous links point at the async routes
+                self.assertEqual(response.content, expected.content.replace(b'/api/', b'/api/async/'), (async_name, query))
+
+    def test_missing_objects_are_404(self):
+        self.assertEqual(self.client.get(reverse('api:async_movie_detail', args=[0])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('api:async_actors_with_director', args=[0])).status_code, 404)
+
+    def test_sync_and_async_views_share_the_leaderboard_cache(self):
+        #test that a leaderboard computed by the async view is served from the cache by the sync one
+        response = self.client.get(reverse('api:async_top_versatile_directors'))
+        with self.assertNumQueries(0):
+            self.assertEqual(self.fetch('api:top_versatile_directors').content, response.content)
+
+    async def test_async_client(self):
+        #test the views on the event loop, as under asgi, including the conditional get
+        response = await self.async_client.get(reverse('api:async_movie_list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], 25)
+        response = await self.async_client.get(reverse('api:async_movie_list'), headers={'if-none-match': response['ETag']})
+        self.assertEqual(response.status_code, 304)
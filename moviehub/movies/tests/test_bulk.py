@@ -0,0 +1,123 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from movies.cache import clear_caches, data_version
+from movies.factories import seed_catalogue
+from movies.graph import GRAPH
+from movies.models import Actor, ContentRating, Country, Director, DirectorStats, Genre, Language, Movie
+from movies.serializers import MovieCreateUpdateSerializer
+
+
+class BulkMovieTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed_catalogue(20, seed=8)
+
+    def setUp(self):
+        clear_caches()
+        GRAPH.clear()
+        self.url = reverse('api:bulk_movies')
+        self.directors = list(Director.objects.order_by('id').values_list('id', flat=True))
+        self.actors = list(Actor.objects.order_by('id').values_list('id', flat=True))
+        self.genres = list(Genre.objects.order_by('id').values_list('id', flat=True))
+
+    def new_movie(self, i, **fields):
+        return {
+            'title': f'Bulk {i}', 'director': self.directors[i % len(self.directors)], 'duration': 90 + i, 'gross': 1000 * i,
+            'language': Language.objects.first().id, 'country': Country.objects.first().id,
+            'content_rating': ContentRating.objects.first().id, 'budget': 500 * i, 'year': 2000 + i % 20, 'imdb_score': 5.5,
+            'actors': [self.actors[(i + k) % len(self.actors)] for k in range(3)], 'genres': self.genres[:2], **fields,
+        }
+
+    def test_create_and_update_in_one_batch(self):
+        movie = Movie.objects.order_by('id').first()
+        items = [self.new_movie(i) for i in range(50)] + [{'id': movie.id, 'title': 'Renamed', 'actors': [self.actors[-1]]}]
+        response = self.client.post(self.url, items, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 51)
+        self.assertEqual(Movie.objects.filter(title__startswith='Bulk ').count(), 50)
+
+        #the response rows are the movies as stored, with their ids
+        created = Movie.objects.with_relation_ids().get(id=response.data[0]['id'])
+        self.assertEqual(response.data[0], {'id': created.id, **MovieCreateUpdateSerializer(created).data})
+        self.assertEqual(response.data[0]['actors'], self.actors[0:3])
+
+        #an update changes only the fields it gives, the actors are replaced
+        movie.refresh_from_db()
+        self.assertEqual((movie.title, movie.director_id), ('Renamed', response.data[-1]['director']))
+        self.assertEqual(list(movie.actors.values_list('id', flat=True)), [self.actors[-1]])
+
+    def test_queries_do_not_grow_with_the_batch(self):
+        #test one lookup per table and one write per table, however many items the batch has
+        def queries(n, offset):
+            items = [self.new_movie(offset + i) for i in range(n)]
+            items += [{'id': pk, 'gross': 1, 'genres': self.genres[:1]} for pk in Movie.objects.order_by('id').values_list('id', flat=True)[:n]]
+            with CaptureQueriesContext(connection) as context:
+                self.assertEqual(self.client.post(self.url, items, format='json').status_code, 200)
+            return len(context.captured_queries)
+
+        self.assertEqual(queries(2, 0), queries(15, 100))
+
+    def test_errors_are_reported_per_item_and_nothing_is_written(self):
+        version = data_version()
+        items = [
+            self.new_movie(0),
+            self.new_movie(1, director=0, actors=[self.actors[0], 0, -1]),
+            {'id': 0, 'title': 'Missing'},
+            self.new_movie(3, duration=-5, title=None),
+            'not a movie',
+            {'title': 'Incomplete'},
+        ]
+        response = self.client.post(self.url, items, format='json')
+        self.assertEqual(response.status_code, 400)
+        errors = response.data
+        self.assertEqual(len(errors), 6)
+        self.assertEqual(errors[0], {})
+        self.assertEqual(errors[1], {
+            'director': ['Invalid pk "0" - object does not exist.'],
+            'actors': ['Invalid pk "0" - object does not exist.', 'Invalid pk "-1" - object does not exist.'],
+        })
+        self.assertEqual(errors[2], {'id': ['Invalid pk "0" - object does not exist.']})
+        self.assertEqual(set(errors[3]), {'duration', 'title'})
+        self.assertIn('non_field_errors', errors[4])
+        self.assertIn('director', errors[5])
+        self.assertFalse(Movie.objects.filter(title__startswith='Bulk ').exists())
+        self.assertEqual(data_version(), version)
+
+    def test_ids_beyond_int64_do_not_exist(self):
+        #test that ids sqlite cannot store are reported like any other missing id, as the single-movie endpoint does
+        pk, huge = Movie.objects.order_by('id').values_list('id', flat=True).first(), 10 ** 20
+        cases = [
+            ({'id': huge}, 'id', huge), ({'id': pk, 'director': huge}, 'director', huge),
+            ({'id': pk, 'actors': [huge]}, 'actors', huge), (self.new_movie(0, genres=[-huge]), 'genres', -huge),
+        ]
+        for item, field, value in cases:
+            response = self.client.post(self.url, [item], format='json')
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.data, [{field: [f'Invalid pk "{value}" - object does not exist.']}])
+
+    def test_repeated_ids_and_bad_payloads(self):
+        pk = Movie.objects.order_by('id').values_list('id', flat=True).first()
+        response = self.client.post(self.url, [{'id': pk, 'gross': 1}, {'id': pk, 'gross': 2}], format='json')
+        self.assertEqual(response.data, [{}, {'id': [f'Movie {pk} appears more than once in the batch.']}])
+        self.assertEqual(self.client.post(self.url, {'title': 'x'}, format='json').status_code, 400)
+        self.assertEqual(self.client.post(self.url, [], format='json').data, [])
+
+    def test_derived_data_follows_the_batch(self):
+        #test the director stats, the cache version and the co-star graph, which the signals maintain for single writes
+        movie = Movie.objects.order_by('id').first()
+        old_director, new_director = movie.director_id, next(pk for pk in self.directors if pk != movie.director_id)
+        lonely = Actor.objects.create(name='Bulk Loner').id
+        self.assertEqual(GRAPH.current().costars(lonely), [])
+        version = data_version()
+
+        self.client.post(self.url, [
+            {'id': movie.id, 'director': new_director, 'gross': 10 ** 12},
+            self.new_movie(0, actors=[lonely, self.actors[0]]),
+        ], format='json')
+
+        self.assertGreater(data_version(), version)
+        self.assertEqual(DirectorStats.objects.get(director_id=new_director).total_gross, sum(Movie.objects.filter(director_id=new_director).values_list('gross', flat=True)))
+        self.assertFalse(DirectorStats.objects.filter(director_id=old_director, movie_count__gt=Movie.objects.filter(director_id=old_director).count()).exists())
+        self.assertEqual([actor_id for actor_id, _ in GRAPH.current().costars(lonely)], [self.actors[0]])
@@ -0,0 +1,218 @@
+import os
+import subprocess
+import sys
+from django.conf import settings
+from django.core.cache import caches
+from django.test import TestCase
+from django.urls import reverse
+from movies.cache import VERSION_CACHE, VERSION_KEY, bump_data_version, cached, clear_caches, data_version
+from movies.models import Movie, MovieGenre
+from movies.factories import MovieFactory, DirectorFactory, ActorFactory, GenreFactory, LanguageFactory
+from movies.tests.test_load_data import LoadDataTestCase, make_row
+import load_data
+
+LEADERBOARDS = [
+    'api:top_10_highest_grossing_movies', 'api:top_directors_by_imdb', 'api:top_versatile_directors',
+    'top_movies_by_imdb', 'top_directors', 'top_versatile_directors', 'top_directors_by_imdb',
+]
+
+
+class DataVersionTests(TestCase):
+    def setUp(self):
+        clear_caches()
+
+    def test_cached_computes_once_per_version(self):
+        #test that a result, None included, is reused until the version changes
+        calls = []
+        compute = lambda value: calls.append(value)
+        cached('probe', compute, 1)
+        cached('probe', compute, 1)
+        cached('probe', compute, 2)
+        self.assertEqual(calls, [1, 2])
+        bump_data_version()
+        cached('probe', compute, 1)
+        self.assertEqual(calls, [1, 2, 1])
+
+    def test_lost_version_starts_over(self):
+        #test that an evicted version is replaced by a new one instead of reusing an old key
+        version = data_version()
+        caches[VERSION_CACHE].delete(VERSION_KEY)
+        self.assertNotEqual(data_version(), version)
+
+    def test_version_is_shared_with_other_processes(self):
+        #test that a bump made by another process, like a load_data.py import, invalidates the results and
+        #etags of this one
+        calls = []
+        cached('probe', calls.append, 1)
+        response = self.client.get(reverse('api:director_list'))
+        subprocess.run(
+            [sys.executable, 'manage.py', 'shell', '-c', 'from movies.cache import bump_data_version; bump_data_version()'],
+            cwd=settings.BASE_DIR, check=True, capture_output=True,
+            env={**os.environ, 'MOVIEHUB_DATA_VERSION_DIR': str(settings.CACHES[VERSION_CACHE]['LOCATION'])},
+        )
+        cached('probe', calls.append, 1)
+        self.assertEqual(calls, [1, 1])
+        self.assertEqual(self.client.get(reverse('api:director_list'), headers={'if-none-match': response['ETag']}).status_code, 200)
+
+    def test_tests_use_their_own_version(self):
+        #test that the suite does not clear the version of a dev server running on the same checkout
+        self.assertNotEqual(str(settings.CACHES[VERSION_CACHE]['LOCATION']), str(settings.BASE_DIR / '.data_version'))
+
+    def test_version_is_bumped_again_on_commit(self):
+        #test that the commit of a write invalidates results computed while it was in flight
+        with self.captureOnCommitCallbacks(execute=True):
+            MovieFactory()
+            version = data_version()
+        self.assertNotEqual(data_version(), version)
+
+
+class LeaderboardCacheTests(LoadDataTestCase):
+    def setUp(self):
+        clear_caches()
+        self.director = DirectorFactory(name="Test Director")
+        self.actor = ActorFactory(name="Actor A")
+        self.movie = MovieFactory(director=self.director, title="Old Title", gross=10, imdb_score=5.0)
+        self.movie.actors.add(self.actor)
+
+    def test_repeated_requests_do_not_query(self):
+        #test that the second request of every leaderboard is served without touching the database
+        urls = [reverse(name) for name in LEADERBOARDS] + [reverse('api:actors_with_director', args=[self.director.id])]
+        for url in urls:
+            self.client.get(url)
+        for url in urls:
+            with self.assertNumQueries(0):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+
+    def test_movie_writes_invalidate(self):
+        #test that saving a movie or its relations is visible on the next request
+        url = reverse('api:top_10_highest_grossing_movies')
+        self.assertEqual(self.client.get(url).json()[0]['title'], "Old Title")
+        self.movie.title = "New Title"
+        self.movie.save()
+        self.assertEqual(self.client.get(url).json()[0]['title'], "New Title")
+
+        url = reverse('api:actors_with_director', args=[self.director.id])
+        self.assertEqual(len(self.client.get(url).json()), 1)
+        self.movie.actors.add(ActorFactory(name="Actor B"))
+        self.assertEqual(len(self.client.get(url).json()), 2)
+
+        version = data_version()
+        MovieGenre.objects.create(movie=self.movie, genre=GenreFactory())
+        self.assertNotEqual(data_version(), version)
+
+    def test_unknown_director_is_cached_until_created(self):
+        #test that a cached 404 does not survive the creation of the director
+        url = reverse('api:actors_with_director', args=[self.director.id + 1])
+        self.assertEqual(self.client.get(url).status_code, 404)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url).status_code, 404)
+        DirectorFactory()
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_bulk_loads_invalidate(self):
+        #test that bulk and incremental imports, which bypass the signals, bump the version
+        url = reverse('top_movies_by_imdb')
+        self.client.get(url)
+        load_data.bulk_load_data(self.write_csv([make_row('Bulk Movie', imdb_score='9.9')]))
+        self.assertContains(self.client.get(url), 'Bulk Movie')
+        load_data.incremental_load_data(self.write_csv([make_row('Bulk Movie', imdb_score='9.9'), make_row('Best Movie', imdb_score='10')]))
+        self.assertContains(self.client.get(url), 'Best Movie')
+        self.assertEqual(Movie.objects.count(), 3)
+
+
+class FragmentCacheTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.movie = MovieFactory(title="Cached Movie", year=1999, language=LanguageFactory(name="Klingon"))
+        self.movie.genres.add(GenreFactory(name="Noir"))
+
+    def test_repeated_pages_do_not_query(self):
+        #test that the second render of the catalogue pages reads their dropdowns and rows from the cache
+        urls = [reverse(name) for name in ('movie_list', 'movies_by_year_genre', 'movies_by_language', 'movies_by_content_rating', 'movies_by_actor')]
+        urls += [reverse('movies_by_language') + '?language=Klingon', reverse('movie_list') + '?initial=C&page=1']
+        for url in urls:
+            first = self.client.get(url).content
+            with self.assertNumQueries(0):
+                response = self.client.get(url)
+            self.assertEqual(response.content, first)
+        self.assertContains(self.client.get(reverse('movies_by_year_genre')), '<option value="1999" >1999</option>', html=True)
+
+    def test_fragments_follow_the_request(self):
+        #test that the selected option and the page come from the request, not from the first cached render
+        url = reverse('movies_by_language')
+        self.assertContains(self.client.get(url), '<option value="Klingon" >Klingon</option>', html=True)
+        self.assertContains(self.client.get(url, {'language': 'Klingon'}), '<option value="Klingon" selected>Klingon</option>', html=True)
+        self.assertNotContains(self.client.get(url, {'language': 'Klingon', 'page': 2}), 'Cached Movie')
+
+    def test_writes_invalidate(self):
+        #test that new rows and new dropdown options are visible on the next request
+        url = reverse('movies_by_year_genre')
+        self.client.get(url)
+        MovieFactory(title="Fresh Movie", year=2024)
+        GenreFactory(name="Western")
+        response = self.client.get(url)
+        self.assertContains(response, 'Fresh Movie')
+        self.assertContains(response, '<option value="2024" >2024</option>', html=True)
+        self.assertContains(response, 'Western')
+
+        url = reverse('movie_list')
+        self.client.get(url)
+        self.movie.title = "Renamed Movie"
+        self.movie.save()
+        self.assertContains(self.client.get(url), 'Renamed Movie')
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.movie = MovieFactory(title="Polled Movie")
+
+    def test_matching_etag_returns_304_without_queries(self):
+        #test that a poller holding the current etag gets a 304 from every api view, without a query
+        urls = [
+            reverse('api:movie_list'), reverse('api:movie_detail', args=[self.movie.id]), reverse('api:director_list'),
+            reverse('api:list_directors'), reverse('api:top_10_highest_grossing_movies'), reverse('api:search') + '?q=poll',
+        ]
+        for url in urls:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertFalse(response.has_header('Last-Modified'))
+            with self.assertNumQueries(0):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+            self.assertEqual(response.status_code, 304)
+
+    def test_writes_change_the_etag(self):
+        #test that a write makes the old etag stale, so the next poll downloads the new data
+        url = reverse('api:top_10_highest_grossing_movies')
+        etag = self.client.get(url)['ETag']
+        self.movie.title = "Renamed Movie"
+        self.movie.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]['title'], "Renamed Movie")
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_if_modified_since_alone_is_not_answered_with_304(self):
+        #test that a poller sending only a date still gets writes made within the same second
+        url = reverse('api:top_10_highest_grossing_movies')
+        self.client.get(url)
+        self.movie.title = "Renamed Movie"
+        self.movie.save()
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]['title'], "Renamed Movie")
+
+    def test_representations_have_their_own_etag(self):
+        #test that the browsable api and json do not share an etag
+        url = reverse('api:movie_list')
+        json_etag = self.client.get(url, HTTP_ACCEPT='application/json')['ETag']
+        html_etag = self.client.get(url, HTTP_ACCEPT='text/html')['ETag']
+        self.assertNotEqual(json_etag, html_etag)
+
+    def test_writes_and_typeahead_are_not_conditional(self):
+        #test that unsafe methods get no etag and the typeahead, which may lag behind bulk loads, is not cached
+        response = self.client.post(reverse('api:movie_list'), {}, format='json')
+        self.assertFalse(response.has_header('ETag'))
+        response = self.client.get(reverse('api:typeahead'), {'q': 'x'})
+        self.assertFalse(response.has_header('ETag'))
@@ -0,0 +1,124 @@
+import contextlib
+import csv
+import io
+import json
+import os
+import tempfile
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from movies.export import iter_chunks
+from movies.factories import ActorFactory, GenreFactory, MovieFactory, seed_catalogue
+from movies.models import Actor, Movie, MovieActor
+import load_data
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed_catalogue(45, seed=9)
+        #a cast larger than the three actor columns of movie_data.csv
+        movie = Movie.objects.order_by('id').last()
+        MovieActor.objects.bulk_create([MovieActor(movie=movie, actor=Actor.objects.create(name=f'Extra Actor {i}')) for i in range(2)])
+
+    def export(self, export_format, **options):
+        out = io.StringIO()
+        call_command('export_catalogue', format=export_format, stdout=out, **options)
+        return out.getvalue()
+
+    def export_file(self, export_format):
+        handle, path = tempfile.mkstemp(suffix=f'.{export_format}')
+        os.close(handle)
+        self.addCleanup(os.remove, path)
+        call_command('export_catalogue', output=path, stderr=io.StringIO())
+        return path
+
+    def reload(self, path, loader):
+        #replace the catalogue with the export
+        Movie.objects.all().delete()
+        loader(path)
+
+    def test_ndjson_lines(self):
+        lines = self.export('ndjson', chunk_size=7).splitlines()
+        self.assertEqual(len(lines), 45)
+        first, last = json.loads(lines[0]), json.loads(lines[-1])
+        movie = Movie.objects.with_details().order_by('id').first()
+        self.assertEqual(first['title'], movie.title)
+        self.assertEqual((first['director'], first['content_rating']), (movie.director.name, movie.content_rating.rating))
+        self.assertEqual(sorted(first['actors']), sorted(actor.name for actor in movie.actors.all()))
+        self.assertEqual(last['actors'][-2:], ['Extra Actor 0', 'Extra Actor 1'])
+
+    def test_queries_per_chunk(self):
+        #test that memory is bounded by the chunk: every chunk is three queries, whatever the catalogue size
+        with self.assertNumQueries(3 * 5 + 1):
+            chunks = [len(chunk) for chunk in iter_chunks(chunk_size=10)]
+        self.assertEqual(chunks, [10, 10, 10, 10, 5])
+
+    def test_csv_round_trip(self):
+        #test that the csv export loaded by load_data.py exports to the same csv
+        before = self.export('csv')
+        self.assertTrue(before.startswith('movie_title,title_year,director_name,'))
+        self.assertIn('actor_5_name', next(csv.reader(io.StringIO(before))))
+        self.reload(self.export_file('csv'), load_data.bulk_load_data)
+        self.assertEqual(Movie.objects.count(), 45)
+        self.assertEqual(self.export('csv'), before)
+
+    def test_ndjson_round_trip_is_unchanged_on_reimport(self):
+        #test that the ndjson export goes through the incremental importer, and that importing the export of
+        #the result again changes nothing
+        before = [{**json.loads(line), 'id': None} for line in self.export('ndjson').splitlines()]
+        self.reload(self.export_file('ndjson'), load_data.incremental_load_data)
+        self.assertEqual([{**json.loads(line), 'id': None} for line in self.export('ndjson').splitlines()], before)
+        result = load_data.incremental_load_data(self.export_file('ndjson'))
+        self.assertEqual((result['inserted'], result['updated'], result['deleted'], result['unchanged']), (0, 0, 0, 45))
+
+    def test_streaming_endpoint(self):
+        response = self.client.get(reverse('api:export_movies'))
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual(b''.join(response.streaming_content).decode(), self.export('ndjson'))
+
+        response = self.client.get(reverse('api:export_movies') + '?format=csv')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="movies.csv"')
+        self.assertEqual(b''.join(response.streaming_content).decode(), self.export('csv'))
+        self.assertEqual(self.client.get(reverse('api:export_movies') + '?format=xml').status_code, 400)
+
+
+class VariableCastRoundTripTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        #casts smaller and larger than the three actor columns, and a movie without genres
+        genres = [GenreFactory(name='Drama'), GenreFactory(name='Crime')]
+        for size in (1, 3, 5):
+            movie = MovieFactory(title=f'Cast of {size}')
+            movie.actors.add(*[ActorFactory(name=f'Actor {size}-{i}') for i in range(size)])
+            movie.genres.add(*genres[:size // 2])
+
+    def export(self, export_format):
+        out = io.StringIO()
+        call_command('export_catalogue', format=export_format, stdout=out)
+        return out.getvalue()
+
+    def export_file(self, export_format):
+        handle, path = tempfile.mkstemp(suffix=f'.{export_format}')
+        with os.fdopen(handle, 'w', newline='', encoding='utf-8') as file:
+            file.write(self.export(export_format))
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_every_loader_reads_the_export_back(self):
+        #test that blank actor and genre cells and extra actor columns load in every mode
+        loaders = [
+            ('csv', load_data.bulk_load_data), ('csv', load_data.incremental_load_data), ('csv', load_data.load_data),
+            ('ndjson', load_data.incremental_load_data), ('ndjson', load_data.bulk_load_data),
+        ]
+        before = self.export('csv')
+        self.assertIn(',,', before)
+        for export_format, loader in loaders:
+            with self.subTest(format=export_format, loader=loader.__name__):
+                path = self.export_file(export_format)
+                Movie.objects.all().delete()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    loader(path)
+                self.assertEqual(self.export('csv'), before)
+        self.assertEqual(list(Movie.objects.get(title='Cast of 1').genres.all()), [])
@@ -0,0 +1,67 @@
+from django.db.models import Count
+from rest_framework.test import APITestCase
+from django.urls import reverse
+from movies.cache import clear_caches
+from movies.factories import seed_catalogue
+from movies.models import Movie, MovieActor
+
+
+class FacetedSearchTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed_catalogue(80, seed=5)
+
+    def setUp(self):
+        clear_caches()
+        self.url = reverse('api:faceted_search')
+
+    def facet(self, response, key):
+        return {entry.get('id', entry.get('value')): entry['count'] for entry in response.data['facets'][key]}
+
+    def test_filters_match_the_orm(self):
+        #test that values of one facet are OR'ed, facets AND'ed, and the page is ordered by title
+        response = self.client.get(self.url, {'genre': ['Drama', 'Comedy'], 'language': 'English', 'year_from': 1990, 'page_size': 100})
+        self.assertEqual(response.status_code, 200)
+        expected = Movie.objects.filter(genres__name__in=['Drama', 'Comedy'], language__name='English', year__gte=1990).distinct().order_by('title', 'id')
+        self.assertEqual(response.data['count'], expected.count())
+        self.assertEqual([movie['id'] for movie in response.data['results']], list(expected.values_list('id', flat=True)))
+
+        actor = MovieActor.objects.first().actor
+        response = self.client.get(self.url, {'actor': actor.id})
+        self.assertEqual([movie['id'] for movie in response.data['results']], list(actor.movie_set.order_by('title', 'id').values_list('id', flat=True)))
+
+    def test_facet_counts_ignore_their_own_filter(self):
+        #test that each facet is counted under every filter except its own
+        response = self.client.get(self.url, {'genre': 'Drama', 'language': 'French'})
+        expected = Movie.objects.filter(language__name='French').values('genres__name').annotate(count=Count('id'))
+        self.assertEqual(self.facet(response, 'genre'), {row['genres__name']: row['count'] for row in expected})
+        expected = Movie.objects.filter(genres__name='Drama').values('language__name').annotate(count=Count('id'))
+        self.assertEqual(self.facet(response, 'language'), {row['language__name']: row['count'] for row in expected})
+        expected = Movie.objects.filter(genres__name='Drama', language__name='French').values('year').annotate(count=Count('id'))
+        self.assertEqual(self.facet(response, 'year'), {row['year']: row['count'] for row in expected})
+        self.assertEqual(sum(self.facet(response, 'content_rating').values()), response.data['count'])
+        directors = response.data['facets']['director']
+        self.assertEqual(directors, sorted(directors, key=lambda entry: (-entry['count'], entry['id'])))
+
+    def test_warm_requests_only_load_the_page(self):
+        #test that filtering and counting need no query once the catalogue is loaded
+        self.client.get(self.url)
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url, {'year_from': 1900, 'page': 2, 'page_size': 5})
+        self.assertEqual(len(response.data['results']), 5)
+        self.assertIn('page=3', response.data['next'])
+        self.assertNotIn('page=', response.data['previous'])
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, {'genre': 'No Such Genre', 'director': 0})
+        self.assertEqual(response.data['count'], 0)
+        self.assertEqual(response.data['facets']['genre'], [])
+
+    def test_invalid_numbers_are_rejected(self):
+        response = self.client.get(self.url, {'year_from': 'soon', 'actor': 'x'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.data), {'year_from', 'actor'})
+
+    def test_ids_beyond_int64_match_nothing(self):
+        response = self.client.get(self.url, {'director': 10 ** 20, 'actor': -10 ** 20})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 0)
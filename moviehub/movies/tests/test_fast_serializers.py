@@ -0,0 +1,67 @@
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+from movies.cache import clear_caches
+from movies.factories import seed_catalogue, MovieFactory
+from movies.fast_serializers import ValuesSerializer
+from movies.models import Actor, Director, Genre, Movie
+from movies.renderers import FastJSONRenderer
+from movies.serializers import MovieCreateUpdateSerializer, SimpleActorSerializer, SimpleDirectorSerializer, SimpleMovieSerializer
+
+
+class FastSerializerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed_catalogue(30, seed=7)
+        #a name with the characters the renderers have to escape
+        MovieFactory(title='Line\u2028break "quoted" \\ Se7en 1e5', imdb_score=0.00005)
+
+    def setUp(self):
+        clear_caches()
+
+    def test_values_serializer_matches_the_model_serializer(self):
+        #test the rows, including the order of the many-to-many ids, for every serializer used by a list view
+        for serializer_class, queryset in (
+            (SimpleMovieSerializer, Movie.objects.with_relation_ids()),
+            (MovieCreateUpdateSerializer, Movie.objects.with_relation_ids()),
+            (SimpleDirectorSerializer, Director.objects.all()),
+            (SimpleActorSerializer, Actor.objects.all()),
+        ):
+            serializer = ValuesSerializer(serializer_class)
+            expected = serializer_class(queryset.order_by('id'), many=True).data
+            self.assertEqual(serializer.to_representation(serializer.values(queryset.order_by('id'))), expected)
+
+    def test_relation_ids_need_one_query_per_relation(self):
+        serializer = ValuesSerializer(SimpleMovieSerializer)
+        with self.assertNumQueries(3):
+            rows = serializer.to_representation(serializer.values(Movie.objects.all()))
+        self.assertEqual(len(rows), 31)
+
+    def test_list_endpoints_render_the_same_bytes(self):
+        #test the fast path end to end against the model serializers rendered by DRF's JSONRenderer
+        genre = Genre.objects.order_by('id').first()
+        for url, serializer_class, queryset in (
+            (reverse('api:movie_list') + '?page=2', MovieCreateUpdateSerializer, Movie.objects.with_relation_ids()[10:20]),
+            (reverse('api:movies_by_genre', args=[genre.name]), SimpleMovieSerializer, Movie.objects.filter(genres=genre).with_relation_ids()[:10]),
+            (reverse('api:director_list'), SimpleDirectorSerializer, Director.objects.all()[:10]),
+            (reverse('api:list_directors'), SimpleDirectorSerializer, Director.objects.all()),
+        ):
+            content = self.client.get(url, HTTP_ACCEPT='application/json').content
+            results = serializer_class(queryset, many=True).data
+            rendered = JSONRenderer().render(results)
+            self.assertIn(rendered[1:-1], content, url)
+
+    def test_cursor_pages_from_values_rows(self):
+        #test that keyset cursors are taken from the values() rows
+        url = reverse('api:movie_list') + '?pagination=cursor&ordering=-gross&page_size=7'
+        grosses = []
+        while url:
+            data = self.client.get(url).json()
+            grosses += [movie['gross'] for movie in data['results']]
+            url = data['next']
+        self.assertEqual(grosses, sorted(Movie.objects.values_list('gross', flat=True), reverse=True))
+
+    def test_renderer_matches_json_renderer(self):
+        data = {'floats': [1e16, 1.5e-7, 0.00009, 7.0, -0.0, 1e300], 'text': 'a\u2028b c "1e5" 0.00001', 'keys': {1: 'int key'}}
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(FastJSONRenderer().render(data, 'application/json; indent=2'), JSONRenderer().render(data, 'application/json; indent=2'))
@@ -0,0 +1,63 @@
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from movies.cache import clear_caches
+from movies.factories import ActorFactory, DirectorFactory, GenreFactory, MovieFactory
+
+
+class FilmographyTests(APITestCase):
+    def setUp(self):
+        clear_caches()
+        self.director = DirectorFactory(name="Busy Director")
+        self.actor = ActorFactory(name="Lead Actor")
+        self.costar = ActorFactory(name="Second Actor")
+        self.drama, self.crime = GenreFactory(name="Drama"), GenreFactory(name="Crime")
+        self.first = MovieFactory(title="First", year=2001, director=self.director, gross=100, imdb_score=6.0)
+        self.first.actors.add(self.actor, self.costar)
+        self.first.genres.add(self.drama, self.crime)
+        self.second = MovieFactory(title="Second", year=2005, gross=300, imdb_score=8.0)
+        self.second.actors.add(self.actor)
+
+    def test_director_detail(self):
+        response = self.client.get(reverse('api:director_detail', args=[self.director.id]))
+        self.assertEqual(response.json(), {
+            'id': self.director.id,
+            'name': "Busy Director",
+            'stats': {'movie_count': 1, 'total_gross': 100, 'average_imdb': 6.0},
+            'movies': [{
+                'id': self.first.id, 'title': "First", 'year': 2001, 'gross': 100, 'imdb_score': 6.0,
+                'director': {'id': self.director.id, 'name': "Busy Director"},
+                'genres': ["Crime", "Drama"],
+                'actors': [{'id': self.actor.id, 'name': "Lead Actor"}, {'id': self.costar.id, 'name': "Second Actor"}],
+            }],
+        })
+
+    def test_actor_detail(self):
+        data = self.client.get(reverse('api:actor_detail', args=[self.actor.id])).json()
+        self.assertEqual(data['stats'], {'movie_count': 2, 'total_gross': 400, 'average_imdb': 7.0})
+        self.assertEqual([movie['title'] for movie in data['movies']], ["First", "Second"])
+        self.assertEqual(data['movies'][1]['director'], {'id': self.second.director_id, 'name': self.second.director.name})
+        self.assertEqual(data['movies'][1]['genres'], [])
+
+        #an actor without movies still has a detail, and an unknown id is a 404
+        lonely = ActorFactory()
+        self.assertEqual(self.client.get(reverse('api:actor_detail', args=[lonely.id])).json()['stats'],
+                         {'movie_count': 0, 'total_gross': 0, 'average_imdb': None})
+        self.assertEqual(self.client.get(reverse('api:actor_detail', args=[0])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('api:director_detail', args=[0])).status_code, 404)
+
+    def test_query_count_does_not_grow_with_the_filmography(self):
+        #test that a detail is the same four queries with one movie or many, and none once cached
+        url = reverse('api:director_detail', args=[self.director.id])
+        with self.assertNumQueries(4):
+            self.client.get(url)
+        for i in range(30):
+            movie = MovieFactory(director=self.director)
+            movie.actors.add(ActorFactory(name=f"Extra {i}"), self.costar)
+            movie.genres.add(self.drama)
+        with self.assertNumQueries(4):
+            data = self.client.get(url).json()
+        self.assertEqual(data['stats']['movie_count'], 31)
+        with self.assertNumQueries(0):
+            self.client.get(url)
+        with self.assertNumQueries(4):
+            self.assertEqual(len(self.client.get(reverse('api:actor_detail', args=[self.costar.id])).json()['movies']), 31)
@@ -0,0 +1,92 @@
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from movies.factories import ActorFactory, MovieFactory
+from movies.graph import GRAPH
+from movies.models import MovieActor
+
+
+class ActorGraphTests(APITestCase):
+    def setUp(self):
+        #start every test from an unbuilt graph, the graph outlives the rolled back test data
+        GRAPH.clear()
+        self.addCleanup(GRAPH.clear)
+        #a - b - c - d chain through movies 1-3, plus e who shares two movies with a
+        self.a, self.b, self.c, self.d, self.e, self.loner = [ActorFactory(name=name) for name in 'ABCDEL']
+        self.m1, self.m2, self.m3, self.m4 = [MovieFactory(title=f"Movie {i}") for i in range(1, 5)]
+        self.m1.actors.add(self.a, self.b, self.e)
+        self.m2.actors.add(self.b, self.c)
+        self.m3.actors.add(self.c, self.d)
+        self.m4.actors.add(self.a, self.e)
+
+    def get(self, name, *args, **params):
+        return self.client.get(reverse(f'api:{name}', args=args), params)
+
+    def test_costars_ranked_by_shared_movies(self):
+        response = self.get('actor_costars', self.a.id)
+        self.assertEqual(response.json(), [
+            {'id': self.e.id, 'name': 'E', 'shared_movies': 2},
+            {'id': self.b.id, 'name': 'B', 'shared_movies': 1},
+        ])
+        self.assertEqual(self.get('actor_costars', self.loner.id).json(), [])
+        self.assertEqual(self.get('actor_costars', self.loner.id + 100).status_code, 404)
+
+    def test_shortest_path(self):
+        #test the bidirectional search in both directions and the unconnected case
+        data = self.get('actor_path', self.a.id, self.d.id).json()
+        self.assertEqual(data['degrees'], 3)
+        self.assertEqual([actor['name'] for actor in data['actors']], ['A', 'B', 'C', 'D'])
+        self.assertEqual([movie['title'] for movie in data['movies']], ['Movie 1', 'Movie 2', 'Movie 3'])
+        data = self.get('actor_path', self.d.id, self.e.id).json()
+        self.assertEqual([actor['name'] for actor in data['actors']], ['D', 'C', 'B', 'E'])
+        self.assertEqual(self.get('actor_path', self.a.id, self.a.id).json()['degrees'], 0)
+        self.assertEqual(self.get('actor_path', self.a.id, self.loner.id).json(), {'degrees': None, 'actors': [], 'movies': []})
+
+    def test_neighborhood_per_distance(self):
+        data = self.get('actor_neighborhood', self.a.id, hops=3).json()
+        self.assertEqual([level['count'] for level in data], [2, 1, 1])
+        self.assertEqual([actor['name'] for actor in data[1]['actors']], ['C'])
+        self.assertEqual(len(self.get('actor_neighborhood', self.a.id, hops=9).json()), 3)
+        self.assertEqual(self.get('actor_neighborhood', self.a.id, hops='x').status_code, 400)
+
+    def test_orm_writes_patch_the_graph(self):
+        #test that adds, removes, clears and deletes are folded in without reading the edges again
+        self.get('actor_costars', self.a.id)
+        self.m2.actors.remove(self.c)
+        self.d.movie_set.add(self.m2)
+        MovieActor.objects.create(movie=self.m3, actor=self.loner)
+        self.m4.delete()
+        with self.assertNumQueries(0):
+            path = GRAPH.current().shortest_path(self.a.id, self.d.id)
+        self.assertEqual(len(path[1]), 2)
+        self.assertEqual(GRAPH.current().costars(self.a.id), [(self.b.id, 1), (self.e.id, 1)])
+        self.m1.actors.clear()
+        self.m1.actors.add(self.a)
+        self.assertEqual(GRAPH.current().costars(self.a.id), [])
+        self.assertEqual(GRAPH.current().costars(self.loner.id), [(self.c.id, 1), (self.d.id, 1)])
+
+    def test_writes_do_not_change_a_snapshot_being_read(self):
+        #test that a reader's snapshot keeps its arrays while writes are patched in and compacted
+        snapshot = GRAPH.current()
+        arrays = [snapshot.edges, snapshot.actor_ids, snapshot.movie_ids, snapshot.actor_movies.indices, snapshot.movie_actors.indptr]
+        before = [array.copy() for array in arrays]
+        self.m2.actors.remove(self.c)
+        MovieActor.objects.create(movie=self.m3, actor=self.loner)
+        self.assertIsNot(GRAPH.current(), snapshot)
+        for array, copy in zip(arrays, before):
+            self.assertTrue((array == copy).all())
+        self.assertEqual(snapshot.shortest_path(self.a.id, self.d.id)[1], [self.m1.id, self.m2.id, self.m3.id])
+        self.assertIsNone(GRAPH.current().shortest_path(self.a.id, self.d.id))
+
+    @override_settings(MOVIEHUB_GRAPH_MAX_AGE=0)
+    def test_only_one_thread_rebuilds(self):
+        #test that while a rebuild runs, other requests answer from the current snapshot without a query
+        snapshot = GRAPH.current()
+        with GRAPH.build_lock, self.assertNumQueries(0):
+            self.assertIs(GRAPH.current(), snapshot)
+
+    @override_settings(MOVIEHUB_GRAPH_MAX_AGE=0)
+    def test_stale_graph_sees_bulk_writes(self):
+        self.get('actor_costars', self.a.id)
+        MovieActor.objects.bulk_create([MovieActor(movie=self.m3, actor=self.a)])
+        self.assertEqual(len(self.get('actor_costars', self.a.id).json()), 4)
@@ -0,0 +1,177 @@
+import csv
+import os
+import tempfile
+from django.test import TestCase
+from movies.models import Movie, Director, DirectorStats, Actor, Genre, MovieActor, MovieGenre, MovieFingerprint
+import load_data
+
+#queries of an incremental import that only updates, or only deletes, up to one batch of movies
+UPDATE_QUERIES = 23
+DELETE_QUERIES = 14
+
+CSV_HEADER = [
+    'director_name', 'duration', 'actor_2_name', 'gross', 'genres', 'actor_1_name', 'movie_title',
+    'actor_3_name', 'language', 'country', 'content_rating', 'budget', 'title_year', 'imdb_score',
+]
+
+
+def make_row(title, director='Test Director', actors=('Actor A', 'Actor B', 'Actor C'), genres='Action|Drama', **overrides):
+    #build one csv row in the layout of movie_metadata.csv
+    row = {
+        'director_name': director,
+        'duration': '120',
+        'actor_1_name': actors[0],
+        'actor_2_name': actors[1],
+        'actor_3_name': actors[2],
+        'gross': '1000000',
+        'genres': genres,
+        'movie_title': title + '\xa0',
+        'language': 'English',
+        'country': 'USA',
+        'content_rating': 'PG-13',
+        'budget': '500000',
+        'title_year': '2009',
+        'imdb_score': '7.5',
+    }
+    row.update(overrides)
+    return row
+
+
+class LoadDataTestCase(TestCase):
+    def write_csv(self, rows):
+        #write rows to a temporary csv file that is removed after the test
+        handle, path = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(handle, 'w', newline='') as file:
+            writer = csv.DictWriter(file, fieldnames=CSV_HEADER)
+            writer.writeheader()
+            writer.writerows(rows)
+        self.addCleanup(os.remove, path)
+        return path
+
+
+#===================== BULK MODE TESTS =====================
+
+class BulkLoadTests(LoadDataTestCase):
+    def test_bulk_load_creates_movies_and_relations(self):
+        #test that every complete row becomes a movie with its actors and genres
+        path = self.write_csv([
+            make_row('Movie One'),
+            make_row('Movie Two', director='Other Director', actors=('Actor A', 'Actor D', 'Actor A'), genres='Comedy'),
+            make_row('Incomplete', gross=''),
+            make_row('Broken', duration='abc'),
+            make_row('No Cast', actors=('', '', '')),
+        ])
+        loaded = load_data.bulk_load_data(path, batch_size=1)
+
+        self.assertEqual(loaded, 2)
+        self.assertEqual(Movie.objects.count(), 2)
+        self.assertEqual(Director.objects.count(), 2)
+        self.assertEqual(Actor.objects.count(), 4)
+        self.assertEqual(Genre.objects.count(), 3)
+        movie = Movie.objects.get(title='Movie Two')
+        self.assertEqual(sorted(movie.actors.values_list('name', flat=True)), ['Actor A', 'Actor D'])
+        self.assertEqual(list(movie.genres.values_list('name', flat=True)), ['Comedy'])
+        self.assertEqual(MovieActor.objects.count(), 5)
+        self.assertEqual(MovieGenre.objects.count(), 3)
+
+    def test_bulk_load_reuses_existing_dimensions(self):
+        #test that names already in the database are resolved instead of duplicated
+        director = Director.objects.create(name='Test Director')
+        path = self.write_csv([make_row('Movie One'), make_row('Movie Two')])
+        load_data.bulk_load_data(path)
+
+        self.assertEqual(Director.objects.count(), 1)
+        self.assertEqual(Movie.objects.filter(director=director).count(), 2)
+
+    def test_bulk_load_query_count_is_per_batch(self):
+        #test that the number of queries depends on the batch count, not the row count
+        path = self.write_csv([make_row(f'Movie {i}', actors=(f'A{i}', f'B{i}', f'C{i}')) for i in range(50)])
+        #6 preload selects, then per batch: 6 dimension inserts + 6 id lookups, movies, actors, genres,
+        #2 director stats aggregates + 1 upsert, the similar movies queue and the savepoint/transaction statements
+        with self.assertNumQueries(6 + 6 * 2 + 3 + 3 + 1 + 2):
+            load_data.bulk_load_data(path, batch_size=100)
+        self.assertEqual(Movie.objects.count(), 50)
+        self.assertEqual(MovieActor.objects.count(), 150)
+
+
+#===================== INCREMENTAL MODE TESTS =====================
+
+class IncrementalLoadTests(LoadDataTestCase):
+    def test_rerun_is_idempotent(self):
+        #test that importing the same file twice does not duplicate movies
+        path = self.write_csv([make_row('Movie One'), make_row('Movie Two')])
+        first = load_data.incremental_load_data(path)
+        second = load_data.incremental_load_data(path)
+
+        self.assertEqual(first['inserted'], 2)
+        self.assertEqual(second, {'inserted': 0, 'updated': 0, 'deleted': 0, 'unchanged': 2, 'skipped': 0})
+        self.assertEqual(Movie.objects.count(), 2)
+        self.assertEqual(MovieFingerprint.objects.count(), 2)
+
+    def test_only_changed_rows_are_written(self):
+        #test that changed rows are updated in place and missing rows are deleted
+        load_data.incremental_load_data(self.write_csv([make_row('Movie One'), make_row('Movie Two'), make_row('Movie Three')]))
+        movie_one = Movie.objects.get(title='Movie One')
+
+        path = self.write_csv([
+            make_row('Movie One', imdb_score='9.1', genres='Horror'),
+            make_row('Movie Two'),
+            make_row('Movie Four'),
+        ])
+        result = load_data.incremental_load_data(path)
+
+        self.assertEqual(result, {'inserted': 1, 'updated': 1, 'deleted': 1, 'unchanged': 1, 'skipped': 0})
+        movie_one.refresh_from_db()
+        self.assertEqual(movie_one.imdb_score, 9.1)
+        self.assertEqual(list(movie_one.genres.values_list('name', flat=True)), ['Horror'])
+        self.assertEqual(sorted(Movie.objects.values_list('title', flat=True)), ['Movie Four', 'Movie One', 'Movie Two'])
+
+    def test_unchanged_rerun_writes_nothing(self):
+        #test that an unchanged feed only reads the fingerprints and the unmanaged movies
+        path = self.write_csv([make_row(f'Movie {i}') for i in range(20)])
+        load_data.incremental_load_data(path)
+        with self.assertNumQueries(2):
+            load_data.incremental_load_data(path)
+
+    def test_update_and_delete_query_counts_are_per_batch(self):
+        #test that updating or deleting movies costs the same queries for 5 rows or 60: set-based deletes
+        #instead of a post_delete signal per through row, the refreshes once per batch
+        for size in (5, 60):
+            with self.subTest(size=size):
+                rows = [make_row(f'Movie {size} {i}', director=f'Director {i % 7}') for i in range(size)]
+                load_data.incremental_load_data(self.write_csv(rows))
+                changed = [dict(row, imdb_score='9.0', actor_1_name=f'New Actor {i}') for i, row in enumerate(rows)]
+                with self.assertNumQueries(UPDATE_QUERIES):
+                    self.assertEqual(load_data.incremental_load_data(self.write_csv(changed))['updated'], size)
+                with self.assertNumQueries(DELETE_QUERIES):
+                    self.assertEqual(load_data.incremental_load_data(self.write_csv([]))['deleted'], size)
+                self.assertFalse(Movie.objects.exists())
+                self.assertFalse(MovieActor.objects.exists())
+                self.assertFalse(DirectorStats.objects.exists())
+
+    def test_adopts_movies_loaded_without_fingerprints(self):
+        #test that movies from a bulk load (or a repeated one) are matched instead of duplicated
+        path = self.write_csv([make_row('Movie One'), make_row('Movie Two')])
+        load_data.bulk_load_data(path)
+        load_data.bulk_load_data(path)
+        self.assertEqual(Movie.objects.count(), 4)
+
+        result = load_data.incremental_load_data(path)
+
+        self.assertEqual(result['updated'], 2)
+        self.assertEqual(result['deleted'], 2)
+        self.assertEqual(Movie.objects.count(), 2)
+        self.assertEqual(MovieFingerprint.objects.count(), 2)
+
+
+#===================== PIPELINE MODE TESTS =====================
+
+class PipelineLoadTests(LoadDataTestCase):
+    def test_pipeline_matches_bulk_load(self):
+        #test that parsing in worker processes loads the same rows, in file order
+        path = self.write_csv([make_row(f'Movie {i}') for i in range(25)] + [make_row('Incomplete', budget='')])
+        loaded = load_data.pipelined_load_data(path, workers=2, chunk_size=4)
+
+        self.assertEqual(loaded, 25)
+        self.assertEqual(list(Movie.objects.order_by('id').values_list('title', flat=True)), [f'Movie {i}' for i in range(25)])
+        self.assertEqual(MovieGenre.objects.count(), 50)
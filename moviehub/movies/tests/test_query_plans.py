@@ -0,0 +1,90 @@
+import re
+from django.test import TestCase
+from django.urls import reverse
+from movies.cache import clear_caches
+from movies.factories import seed_catalogue
+from movies.models import Actor, Director, Movie
+from movies.profiling import route_query_plans
+
+#tables that grow with the catalogue; the lookup tables (genres, languages, ratings) are small by nature
+#and read whole for the filter dropdowns
+LARGE_TABLES = {'movies_movie', 'movies_movieactor', 'movies_moviegenre', 'movies_actor', 'movies_director', 'movies_directorstats',
+                'movies_similarmovie'}
+SCAN = re.compile(r'^SCAN (\w+)')
+
+
+def full_scans(sql, plan):
+    #large tables the query reads whole. a SCAN is only bounded when rows come out of it in the final order
+    #and LIMIT stops it after one page: the plan has no temp b-tree sorting every row first, and a scan
+    #in table order (no index) does not skip rows with a WHERE filter
+    ordered = ' LIMIT ' in sql and not any('TEMP B-TREE' in step for step in plan)
+    scans = []
+    for step in plan:
+        match = SCAN.match(step)
+        if not match or match.group(1) not in LARGE_TABLES:
+            continue
+        if not ordered or (' USING ' not in step and ' WHERE ' in sql):
+            scans.append(match.group(1))
+    return scans
+
+
+class QueryPlanTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed_catalogue(60)
+
+    def setUp(self):
+        clear_caches()
+
+    def hot_paths(self):
+        #(url, sort allowed): a sort is allowed where the filter goes through a many-to-many table, or matches
+        #a few rows of two index ranges, and then only sorts the matching movies
+        movie = Movie.objects.select_related('language', 'content_rating').first()
+        genre = movie.genres.first().name
+        actor = Actor.objects.first().name
+        director = Director.objects.first().id
+        return [
+            (reverse('movie_list'), False),
+            (reverse('movie_list') + '?order=desc&page=3', False),
+            (reverse('movie_list') + '?sort=id', False),
+            (reverse('movie_list') + '?initial=A', True),
+            (reverse('directors_list') + '?order=desc', False),
+            (reverse('actors_list') + '?page=2', False),
+            (reverse('movies_by_year_genre') + f'?year={movie.year}', False),
+            (reverse('movies_by_year_genre') + f'?genre={genre}', True),
+            (reverse('movies_by_year_genre') + f'?year={movie.year}&genre={genre}', False),
+            (reverse('movies_by_language') + f'?language={movie.language.name}', False),
+            (reverse('movies_by_content_rating') + f'?rating={movie.content_rating.rating}', False),
+            (reverse('movies_by_actor') + f'?actor={actor}', True),
+            (reverse('top_movies_by_imdb'), False),
+            (reverse('top_directors'), False),
+            (reverse('top_versatile_directors'), False),
+            (reverse('top_directors_by_imdb'), False),
+            (reverse('api:movie_list') + '?pagination=cursor&ordering=-gross', False),
+            (reverse('api:movie_list') + '?pagination=cursor&ordering=imdb_score', False),
+            (reverse('api:movie_list') + '?pagination=cursor&ordering=-title', False),
+            (reverse('api:movies_by_genre', args=[genre]) + '?pagination=cursor', True),
+            (reverse('api:top_10_highest_grossing_movies'), False),
+            (reverse('api:actors_with_director', args=[director]), True),
+            (reverse('api:director_detail', args=[director]), True),
+            (reverse('api:actor_detail', args=[Actor.objects.first().id]), True),
+            (reverse('movie_detail', args=[movie.id]), False),
+            (reverse('api:movie_similar', args=[movie.id]), False),
+        ]
+
+    def test_hot_paths_do_not_scan_large_tables(self):
+        #test that every query of the hot paths reaches the large tables through an index
+        for url, sort_allowed in self.hot_paths():
+            for sql, plan in route_query_plans(self.client, url):
+                with self.subTest(url=url, sql=sql[:80]):
+                    self.assertEqual(full_scans(sql, plan), [], plan)
+                    if not sort_allowed:
+                        self.assertFalse([step for step in plan if 'TEMP B-TREE' in step], plan)
+
+    def test_distinct_years_seeks_the_index(self):
+        #test that the year dropdown is a loose index scan, not a read of every movie
+        self.assertEqual(Movie.objects.distinct_years(), sorted(set(Movie.objects.values_list('year', flat=True))))
+        plans = route_query_plans(self.client, reverse('movies_by_year_genre'))
+        year_plan = next(plan for sql, plan in plans if sql.startswith('WITH RECURSIVE'))
+        self.assertTrue(any('movie_year_title_idx' in step for step in year_plan), year_plan)
+        self.assertFalse([step for step in year_plan if SCAN.match(step) and 'movies_movie' in step], year_plan)
@@ -0,0 +1,25 @@
+from django.test import TestCase
+from movies.factories import seed_catalogue
+from movies.profiling import BASELINE_PATH, iter_routes, load_baseline, measure_routes, query_count_regressions
+
+
+class RouteRegressionTests(TestCase):
+    def test_every_route_has_a_fixed_query_count(self):
+        #test that growing the catalogue does not change the query count of any route,
+        #and that no route needs more queries than the checked-in baseline
+        seed_catalogue(10, seed=1)
+        small = measure_routes(self.client, repeat=1)
+        seed_catalogue(40, seed=2)
+        large = measure_routes(self.client, repeat=1)
+
+        for name, result in large.items():
+            self.assertEqual(result['status'], 200, name)
+        baseline = load_baseline(BASELINE_PATH)
+        baseline_counts = {'10': baseline['1000'], '50': baseline['1000']}
+        self.assertEqual(query_count_regressions({'10': small, '50': large}, baseline_counts), [])
+
+    def test_baseline_covers_every_route(self):
+        #test that new routes are added to the baseline (python benchmarks/route_bench.py --update-baseline)
+        baseline = load_baseline(BASELINE_PATH)
+        for size, results in baseline.items():
+            self.assertEqual(sorted(results), sorted(name for name, _ in iter_routes()), size)
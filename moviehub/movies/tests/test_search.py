@@ -0,0 +1,86 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from movies.models import Movie, Director, Actor
+from movies.factories import MovieFactory, DirectorFactory, ActorFactory
+from movies.search import filter_initial, filter_matching, match_expression, search
+
+
+class SearchIndexTests(TestCase):
+    def setUp(self):
+        #create a small catalogue whose names share words across kinds
+        self.director = DirectorFactory(name="Christopher Nolan")
+        self.actor = ActorFactory(name="Christian Bale")
+        self.dark = MovieFactory(title="The Dark Knight", director=self.director)
+        self.rises = MovieFactory(title="The Dark Knight Rises", director=self.director)
+        self.other = MovieFactory(title="Amélie", director=DirectorFactory(name="Jean-Pierre Jeunet"))
+
+    def test_match_expression_quotes_every_word(self):
+        #test that user input cannot inject fts5 syntax
+        self.assertEqual(match_expression('dark "kni OR'), '"dark"* "kni"* "OR"*')
+        self.assertEqual(match_expression('  -*() '), '')
+
+    def test_search_ranks_prefix_matches_across_kinds(self):
+        #test that every word matches as a prefix and the closest match ranks first
+        results = search('dark kni')
+        self.assertEqual([(r['kind'], r['id']) for r in results], [('movie', self.dark.id), ('movie', self.rises.id)])
+        kinds = {(r['kind'], r['name']) for r in search('chris')}
+        self.assertEqual(kinds, {('director', 'Christopher Nolan'), ('actor', 'Christian Bale')})
+        self.assertEqual([r['kind'] for r in search('chris', kinds=['actor'])], ['actor'])
+        self.assertEqual(search('amelie')[0]['id'], self.other.id)
+
+    def test_index_follows_writes(self):
+        #test that inserts, renames and deletes reach the index through the triggers, bulk writes included
+        self.dark.title = "Batman Begins"
+        self.dark.save()
+        self.rises.delete()
+        Actor.objects.bulk_create([Actor(name="Heath Ledger")])
+
+        self.assertEqual(search('dark'), [])
+        self.assertEqual(search('batman')[0]['id'], self.dark.id)
+        self.assertEqual(search('heath')[0]['kind'], 'actor')
+
+    def test_filter_matching_and_filter_initial(self):
+        #test the queryset helpers used by the list views
+        self.assertEqual(list(filter_matching(Movie.objects.order_by('id'), 'knight')), [self.dark, self.rises])
+        self.assertEqual(list(filter_matching(Director.objects.all(), 'nol')), [self.director])
+        self.assertEqual(list(filter_matching(Movie.objects.all(), '!!')), [])
+        for letter in ('t', 'A', 'é'):
+            self.assertEqual(
+                set(filter_initial(Movie.objects.all(), 'title', letter)),
+                set(Movie.objects.filter(title__istartswith=letter)),
+            )
+
+
+class SearchViewTests(TestCase):
+    def setUp(self):
+        self.director = DirectorFactory(name="Greta Gerwig")
+        self.movie = MovieFactory(title="Little Women", director=self.director)
+        MovieFactory(title="Lady Bird", director=self.director)
+
+    def test_search_endpoint(self):
+        #test the unified api endpoint and its validation
+        response = self.client.get(reverse('api:search'), {'q': 'litt wom'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), [{'kind': 'movie', 'id': self.movie.id, 'name': 'Little Women', 'score': response.json()[0]['score']}])
+        response = self.client.get(reverse('api:search'), {'q': 'greta', 'kind': 'movie'})
+        self.assertEqual(response.json(), [])
+        response = self.client.get(reverse('api:search'), {'q': 'greta', 'kind': 'studio'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_list_views_search_through_the_index(self):
+        #test that the html search box matches word prefixes
+        response = self.client.get(reverse('movie_list'), {'q': 'wom'})
+        self.assertContains(response, 'Little Women')
+        self.assertNotContains(response, 'Lady Bird')
+        response = self.client.get(reverse('directors_list'), {'q': 'gerw'})
+        self.assertContains(response, 'Greta Gerwig')
+
+    def test_admin_search_matches_title_or_director(self):
+        #test that the admin search box finds movies by their director's name
+        User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.login(username='admin', password='password')
+        response = self.client.get(reverse('admin:movies_movie_changelist'), {'q': 'gerwig'})
+        self.assertEqual(response.context['cl'].result_count, 2)
+        response = self.client.get(reverse('admin:movies_movie_changelist'), {'q': 'bird'})
+        self.assertEqual(response.context['cl'].result_count, 1)
@@ -0,0 +1,95 @@
+import math
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from movies.cache import clear_caches
+from movies.factories import ActorFactory, GenreFactory, MovieFactory, seed_catalogue
+from movies.models import Movie, SimilarMovie, SimilarityRefresh
+from movies.similar import IMDB_SCORE_WINDOW, TOP_K, WEIGHTS, YEAR_WINDOW, refresh_similar_movies
+
+
+def reference_score(a, b):
+    #the score of a pair computed the slow way, from the orm
+    def cosine(x, y):
+        return len(x & y) / math.sqrt(len(x) * len(y)) if x and y else 0
+    genres = cosine(set(a.genres.values_list('id', flat=True)), set(b.genres.values_list('id', flat=True)))
+    actors = cosine(set(a.actors.values_list('id', flat=True)), set(b.actors.values_list('id', flat=True)))
+    score = (
+        WEIGHTS['genres'] * genres + WEIGHTS['actors'] * actors
+        + WEIGHTS['director'] * (a.director_id == b.director_id) + WEIGHTS['language'] * (a.language_id == b.language_id)
+        + WEIGHTS['year'] * max(0, 1 - abs(a.year - b.year) / YEAR_WINDOW)
+        + WEIGHTS['imdb_score'] * max(0, 1 - abs(a.imdb_score - b.imdb_score) / IMDB_SCORE_WINDOW)
+    )
+    return score if genres or actors or a.director_id == b.director_id else None
+
+
+class SimilarMovieTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed_catalogue(60, seed=11)
+
+    def setUp(self):
+        #a new data version, so the columnar copy is not one loaded in a rolled back test
+        clear_caches()
+
+    def lists(self):
+        return list(SimilarMovie.objects.order_by('movie_id', 'rank').values_list('movie_id', 'rank', 'similar_id', 'score'))
+
+    def test_rebuild_ranks_the_best_candidates(self):
+        self.assertEqual(refresh_similar_movies(rebuild=True), (60, True))
+        self.assertFalse(SimilarityRefresh.objects.exists())
+        for movie in Movie.objects.order_by('id')[:5]:
+            scores = {other.id: reference_score(movie, other) for other in Movie.objects.exclude(id=movie.id)}
+            expected = sorted((-round(score, 6), pk) for pk, score in scores.items() if score is not None)[:TOP_K]
+            stored = SimilarMovie.objects.filter(movie=movie).order_by('rank').values_list('similar_id', 'score')
+            self.assertEqual([pk for pk, _ in stored], [pk for _, pk in expected])
+            for (_, score), (key, _) in zip(stored, expected):
+                self.assertAlmostEqual(score, -key, places=5)
+
+    def test_incremental_refresh_matches_a_rebuild(self):
+        #test that a refresh recomputes fewer lists than a rebuild and ends with the same lists
+        refresh_similar_movies(rebuild=True)
+        movies = list(Movie.objects.order_by('id'))
+        movies[0].actors.add(movies[1].actors.first(), ActorFactory(name='New Face'))
+        movies[2].year, movies[2].imdb_score = movies[3].year, movies[3].imdb_score
+        movies[2].save()
+        movies[4].genres.set([GenreFactory(name='Western')])
+        movies[5].delete()
+        new = MovieFactory(director=movies[6].director, language=movies[6].language, year=movies[6].year)
+        new.actors.set(movies[6].actors.all())
+        new.genres.set(movies[6].genres.all())
+
+        count, rebuilt = refresh_similar_movies()
+        self.assertFalse(rebuilt)
+        self.assertLess(count, 60)
+        self.assertFalse(SimilarityRefresh.objects.exists())
+        self.assertEqual(SimilarMovie.objects.filter(movie=new, rank=1).get().similar_id, movies[6].id)
+        refreshed = self.lists()
+        refresh_similar_movies(rebuild=True)
+        self.assertEqual(refreshed, self.lists())
+
+    def test_writes_queue_the_changed_movies(self):
+        #test that forward and reverse relation writes queue exactly the movies they touch
+        movie = Movie.objects.order_by('id').first()
+        SimilarityRefresh.objects.all().delete()
+        movie.actors.add(ActorFactory())
+        genre = Movie.objects.order_by('id').last().genres.first()
+        genre_movies = set(genre.movie_set.values_list('id', flat=True))
+        genre.movie_set.clear()
+        self.assertEqual(set(SimilarityRefresh.objects.values_list('movie_id', flat=True)), {movie.id} | genre_movies)
+
+    def test_similar_endpoint_is_one_lookup(self):
+        refresh_similar_movies(rebuild=True)
+        movie = Movie.objects.order_by('id').first()
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('api:movie_similar', args=[movie.id]))
+        data = response.json()
+        self.assertEqual(len(data), TOP_K)
+        first = Movie.objects.get(id=data[0]['id'])
+        self.assertEqual(data[0], {'id': first.id, 'title': first.title, 'year': first.year, 'imdb_score': first.imdb_score, 'score': data[0]['score']})
+        self.assertEqual(self.client.get(reverse('api:movie_similar', args=[0])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('api:movie_similar', args=[10 ** 20])).status_code, 404)
+
+        #a deleted similar movie drops out of the lists until the next refresh
+        first.delete()
+        self.assertEqual(len(self.client.get(reverse('api:movie_similar', args=[movie.id])).json()), TOP_K - 1)
+        self.assertContains(self.client.get(reverse('movie_detail', args=[movie.id])), 'More like this')
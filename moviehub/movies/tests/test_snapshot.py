@@ -0,0 +1,64 @@
+import io
+import os
+import shutil
+import tempfile
+from unittest import skipIf
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from movies.export import iter_ndjson
+from movies.factories import seed_catalogue
+from movies.models import DirectorStats, Movie
+from movies.search import search
+from movies.snapshot import SNAPSHOT_MODELS, pa, snapshot_path
+
+
+@skipIf(pa is None, 'pyarrow is not installed')
+class SnapshotTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed_catalogue(35, seed=10)
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def command(self, name, *args):
+        out = io.StringIO()
+        call_command(name, *args, stdout=out)
+        return out.getvalue()
+
+    def empty_catalogue(self):
+        for model in reversed(SNAPSHOT_MODELS):
+            model.objects.all().delete()
+
+    def test_round_trip(self):
+        #test that loading a snapshot into an empty database restores every row with its id
+        export = ''.join(iter_ndjson())
+        query = Movie.objects.order_by('id').first().title.split()[0]
+        matches = search(query)
+        stats = list(DirectorStats.objects.order_by('director_id').values_list())
+        output = self.command('export_snapshot', self.directory, '--chunk-size', '8')
+        self.assertIn('movies_movie: 35 rows', output)
+        self.assertTrue(all(os.path.exists(snapshot_path(self.directory, model)) for model in SNAPSHOT_MODELS))
+
+        self.empty_catalogue()
+        self.assertEqual(Movie.objects.count(), 0)
+        output = self.command('load_snapshot', self.directory, '--chunk-size', '8')
+        self.assertIn('movies_movieactor: 105 rows', output)
+        self.assertEqual(''.join(iter_ndjson()), export)
+        self.assertEqual(list(DirectorStats.objects.order_by('director_id').values_list()), stats)
+        #the search index is filled and its triggers are back
+        self.assertEqual(search(query), matches)
+        Movie.objects.filter(id=matches[0]['id']).update(title='Zyzzyva')
+        self.assertEqual([match['id'] for match in search('zyzzyva')], [matches[0]['id']])
+
+    def test_load_needs_an_empty_database_and_every_table(self):
+        self.command('export_snapshot', self.directory)
+        with self.assertRaisesMessage(CommandError, 'already has rows'):
+            self.command('load_snapshot', self.directory)
+
+        self.empty_catalogue()
+        os.remove(snapshot_path(self.directory, Movie))
+        with self.assertRaisesMessage(CommandError, 'movies_movie.parquet is missing'):
+            self.command('load_snapshot', self.directory)
+        self.assertFalse(SNAPSHOT_MODELS[0].objects.exists())
@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.db import connections
+from django.test import TestCase, override_settings
+
+
+class SqlitePragmaTests(TestCase):
+    def new_connection(self):
+        #a second connection to the test database, opened (and given its pragmas) on first use
+        connection = connections.create_connection('default')
+        self.addCleanup(connection.close)
+        return connection
+
+    @override_settings(MOVIEHUB_SQLITE_PRAGMAS={'cache_size': -1234, 'busy_timeout': 4321})
+    def test_pragmas_are_applied_on_connect(self):
+        with self.new_connection().cursor() as cursor:
+            self.assertEqual(cursor.execute('PRAGMA cache_size').fetchone(), (-1234,))
+            self.assertEqual(cursor.execute('PRAGMA busy_timeout').fetchone(), (4321,))
+
+    def test_every_profile_applies(self):
+        #test that the pragmas of every profile are valid sqlite and keep the connection usable
+        for name, profile in settings.MOVIEHUB_DB_PROFILES.items():
+            with self.subTest(profile=name), override_settings(MOVIEHUB_SQLITE_PRAGMAS=profile['PRAGMAS']):
+                with self.new_connection().cursor() as cursor:
+                    self.assertEqual(cursor.execute('SELECT COUNT(*) FROM movies_movie').fetchone(), (0,))
+        self.assertGreater(settings.MOVIEHUB_DB_PROFILES['production']['CONN_MAX_AGE'], 0)
@@ -0,0 +1,76 @@
+from django.db.models import Avg, Count, Sum
+from django.test import TestCase
+from django.urls import reverse
+from movies.models import Director, DirectorStats
+from movies.factories import MovieFactory, DirectorFactory, ActorFactory
+from movies.stats import rebuild_director_stats
+
+
+class DirectorStatsTests(TestCase):
+    def setUp(self):
+        #two directors sharing one actor
+        self.director = DirectorFactory(name="Busy Director")
+        self.other = DirectorFactory(name="Other Director")
+        self.actors = [ActorFactory() for _ in range(3)]
+        self.movie_1 = MovieFactory(director=self.director, gross=100, imdb_score=8.0)
+        self.movie_2 = MovieFactory(director=self.director, gross=300, imdb_score=6.0)
+        self.movie_3 = MovieFactory(director=self.other, gross=50, imdb_score=9.0)
+        self.movie_1.actors.add(self.actors[0], self.actors[1])
+        self.movie_2.actors.add(self.actors[1], self.actors[2])
+        self.movie_3.actors.add(self.actors[0])
+
+    def assertStatsMatchAggregates(self):
+        #the materialized rows must equal what the old annotate() queries computed
+        unique_actors = dict(Director.objects.annotate(n=Count('movie__movieactor__actor', distinct=True)).values_list('id', 'n'))
+        expected = {
+            director.id: (director.total_gross, director.average_imdb, director.movie_count, unique_actors[director.id])
+            for director in Director.objects.annotate(
+                total_gross=Sum('movie__gross'), average_imdb=Avg('movie__imdb_score'), movie_count=Count('movie'),
+            ).filter(movie_count__gt=0)
+        }
+        actual = {
+            stats.director_id: (stats.total_gross, stats.average_imdb, stats.movie_count, stats.unique_actors)
+            for stats in DirectorStats.objects.all()
+        }
+        self.assertEqual(actual, expected)
+
+    def test_stats_follow_movie_writes(self):
+        #test that saves, director changes and deletes update the stats rows
+        stats = DirectorStats.objects.get(director=self.director)
+        self.assertEqual((stats.total_gross, stats.average_imdb, stats.movie_count, stats.unique_actors), (400, 7.0, 2, 3))
+
+        self.movie_2.director = self.other
+        self.movie_2.save()
+        self.assertStatsMatchAggregates()
+
+        self.movie_3.delete()
+        self.movie_2.delete()
+        self.assertStatsMatchAggregates()
+        self.assertFalse(DirectorStats.objects.filter(director=self.other).exists())
+
+    def test_stats_follow_actor_changes(self):
+        #test that through-table writes from both sides update the unique actor counts
+        self.movie_1.actors.remove(self.actors[0])
+        self.assertStatsMatchAggregates()
+        self.actors[0].movie_set.add(self.movie_2)
+        self.assertStatsMatchAggregates()
+        self.actors[1].movie_set.clear()
+        self.assertStatsMatchAggregates()
+        self.movie_2.actors.clear()
+        self.assertStatsMatchAggregates()
+
+    def test_rebuild_director_stats(self):
+        #test that a full rebuild restores rows written around the signals
+        DirectorStats.objects.all().delete()
+        rebuild_director_stats()
+        self.assertStatsMatchAggregates()
+
+    def test_leaderboards_read_from_stats(self):
+        #test that the leaderboard views rank the directors from the stats table in a fixed number of queries
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('top_directors'))
+        self.assertEqual([director.name for director in response.context['directors']], ["Busy Director", "Other Director"])
+        response = self.client.get(reverse('top_versatile_directors'))
+        self.assertEqual([director.unique_actors for director in response.context['directors']], [3, 1])
+        response = self.client.get(reverse('api:top_directors_by_imdb'))
+        self.assertEqual(response.json(), [{'name': "Other Director", 'average_imdb': 9.0}, {'name': "Busy Director", 'average_imdb': 7.0}])
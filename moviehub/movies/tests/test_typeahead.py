@@ -0,0 +1,90 @@
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from movies.models import Actor, Director
+from movies.factories import ActorFactory, DirectorFactory
+from movies.typeahead import INDEXES, fold, typeahead
+
+
+class TypeaheadTests(TestCase):
+    def setUp(self):
+        #start every test from an unbuilt index, the index outlives the rolled back test data
+        for index in INDEXES.values():
+            index.clear()
+            self.addCleanup(index.clear)
+        self.nolan = DirectorFactory(name="Christopher Nolan")
+        self.columbus = DirectorFactory(name="Chris Columbus")
+        DirectorFactory(name="Pedro Almodóvar")
+
+    def test_fold_ignores_case_and_accents(self):
+        self.assertEqual(fold('  Almodóvar '), 'almodovar')
+
+    def test_prefix_matches_any_word(self):
+        #test that a prefix matches the start of the name or of a later word, case and accent insensitive
+        self.assertEqual(typeahead('director', 'chris'), [
+            {'id': self.columbus.id, 'name': 'Chris Columbus'},
+            {'id': self.nolan.id, 'name': 'Christopher Nolan'},
+        ])
+        self.assertEqual([d['id'] for d in typeahead('director', 'NOL')], [self.nolan.id])
+        self.assertEqual([d['name'] for d in typeahead('director', 'almodov')], ['Pedro Almodóvar'])
+        self.assertEqual(typeahead('director', 'chris col')[0]['id'], self.columbus.id)
+        self.assertEqual(typeahead('director', ''), [])
+        self.assertEqual(len(typeahead('director', 'c', limit=1)), 1)
+
+    def test_lookup_after_build_needs_no_query(self):
+        #test that only the first lookup reads the table
+        with self.assertNumQueries(1):
+            typeahead('director', 'chris')
+        with self.assertNumQueries(0):
+            typeahead('director', 'nolan')
+
+    def test_orm_writes_patch_the_index(self):
+        #test that saves, renames and deletes made through the orm are visible without a rebuild
+        typeahead('director', 'chris')
+        self.nolan.name = "Jonathan Nolan"
+        self.nolan.save()
+        self.columbus.delete()
+        DirectorFactory(name="Christine Jeffs")
+        with self.assertNumQueries(0):
+            self.assertEqual([d['name'] for d in typeahead('director', 'chris')], ['Christine Jeffs'])
+            self.assertEqual([d['name'] for d in typeahead('director', 'jon')], ['Jonathan Nolan'])
+
+    @override_settings(MOVIEHUB_TYPEAHEAD_MAX_AGE=0)
+    def test_stale_index_sees_bulk_writes(self):
+        #test that rows written without signals show up once the index expires
+        typeahead('actor', 'gem')
+        Actor.objects.bulk_create([Actor(name="Gemma Arterton")])
+        self.assertEqual([a['name'] for a in typeahead('actor', 'gem')], ['Gemma Arterton'])
+
+    def test_writes_do_not_change_a_snapshot_being_read(self):
+        #test that a lookup holding the previous keys sees them unchanged while rows are added and removed
+        typeahead('director', 'chris')
+        keys, names = INDEXES['director'].snapshot
+        before = (list(keys), dict(names))
+        DirectorFactory(name="Christine Jeffs")
+        self.nolan.delete()
+        self.assertEqual((keys, names), before)
+        self.assertEqual([d['name'] for d in typeahead('director', 'chris')], ['Chris Columbus', 'Christine Jeffs'])
+
+    @override_settings(MOVIEHUB_TYPEAHEAD_MAX_AGE=0)
+    def test_only_one_thread_rebuilds(self):
+        #test that while a rebuild runs, other lookups answer from the current snapshot without a query
+        index = INDEXES['director']
+        typeahead('director', 'chris')
+        with index.build_lock, self.assertNumQueries(0):
+            self.assertEqual(len(typeahead('director', 'chris')), 2)
+
+    def test_typeahead_endpoint(self):
+        #test the api endpoint and its validation
+        ActorFactory(name="Christian Bale")
+        response = self.client.get(reverse('api:typeahead'), {'kind': 'actor', 'q': 'bal'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), [{'id': Actor.objects.get().id, 'name': 'Christian Bale'}])
+        response = self.client.get(reverse('api:typeahead'), {'kind': 'movie', 'q': 'bal'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_movies_by_actor_does_not_list_every_actor(self):
+        #test that the filter page renders no actor names beyond the selected one
+        ActorFactory(name="Unlisted Actor")
+        response = self.client.get(reverse('movies_by_actor'))
+        self.assertNotContains(response, 'Unlisted Actor')
+        self.assertEqual(Director.objects.count(), 3)
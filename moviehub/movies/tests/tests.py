@@ -1,4 +1,4 @@
-from django.test import TestCase, Client
+from django.test import TestCase, Client, override_settings
 from django.urls import reverse
 from movies.models import Movie, Director, Actor, Genre, Language, Country, ContentRating
 from movies.forms import MovieForm
@@ -45,6 +45,15 @@ class MovieTests(TestCase):
         self.assertTemplateUsed(response, 'movies/movie_detail.html')
         self.assertContains(response, self.movie.title)
 
+    def test_movie_detail_query_count(self):
+        #test that the detail page loads the movie and its relations in a fixed number of queries
+        self.movie.actors.add(ActorFactory(), ActorFactory())
+        #movie with its foreign keys, actors, genres, similar movies
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('movie_detail', args=[self.movie.id]))
+        self.assertContains(response, self.director.name)
+        self.assertContains(response, self.genre.name)
+
     def test_movie_create_view(self):
         #test the movie create view
         response = self.client.post(reverse('movie_create'), {
@@ -209,3 +218,51 @@ class FilterTests(TestCase):
         response = self.client.get(reverse('movies_by_language'))
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, 'movies/movies_by_language.html')
+
+
+#===================== PAGINATION TESTS =====================
+
+@override_settings(MOVIEHUB_PAGE_SIZE=5)
+class PaginationTests(TestCase):
+    def setUp(self):
+        #create twelve movies in one language, with two pairs of equal titles
+        self.language = LanguageFactory(name="English")
+        for i in range(12):
+            MovieFactory(title=f"Movie {min(i, 10):02d}", language=self.language)
+
+    def test_movie_list_is_paged_without_count(self):
+        #test that a page renders page_size movies from a single query and links to the next page
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('movie_list'))
+        page = response.context['movies']
+        self.assertEqual(len(page), 5)
+        self.assertTrue(page.has_next)
+        self.assertFalse(page.has_previous)
+        self.assertContains(response, '?page=2')
+
+    def test_pages_cover_every_movie_once(self):
+        #test that walking the pages returns each movie exactly once, ties on the title included
+        seen = []
+        for number in (1, 2, 3):
+            page = self.client.get(reverse('movie_list'), {'order': 'desc', 'page': number}).context['movies']
+            seen.extend(movie.pk for movie in page)
+        self.assertFalse(page.has_next)
+        self.assertEqual(seen, list(Movie.objects.order_by('-title', '-id').values_list('pk', flat=True)))
+
+    def test_next_link_keeps_the_filters(self):
+        #test that the navigation keeps the selected filter and the requested page size
+        response = self.client.get(reverse('movies_by_language'), {'language': 'English', 'page_size': 4})
+        page = response.context['movies']
+        self.assertEqual(len(page), 4)
+        self.assertEqual(page.next_query, 'language=English&page_size=4&page=2')
+
+    def test_page_size_and_page_are_clamped(self):
+        #test that bad or oversized parameters fall back to safe values
+        with self.settings(MOVIEHUB_MAX_PAGE_SIZE=8):
+            page = self.client.get(reverse('movie_list'), {'page_size': 1000, 'page': 'x'}).context['movies']
+        self.assertEqual((page.number, len(page)), (1, 8))
+        response = self.client.get(reverse('actors_list'), {'page': 50})
+        self.assertEqual(len(response.context['actors']), 0)
+        response = self.client.get(reverse('movie_list'), {'page': 10 ** 20})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['movies']), 0)
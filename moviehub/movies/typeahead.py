@@ -0,0 +1,115 @@
+#in-memory prefix index of director and actor names for the typeahead endpoint
+#each process keeps a sorted list of keys and answers a prefix with a bisection, no database query.
+#orm writes patch the index through signals; bulk writes (load_data.py) bypass them, so an index is
+#also rebuilt once it is older than MOVIEHUB_TYPEAHEAD_MAX_AGE seconds
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+from django.conf import settings
+from .models import Actor, Director
+
+MAX_LIMIT = 50
+#separates the folded text of a key from the id it points to, sorts before any printable character
+SEPARATOR = '\x00'
+
+
+def fold(text):
+    #case and accent insensitive form of a name: 'Amélie' -> 'amelie'
+    decomposed = unicodedata.normalize('NFKD', text.casefold())
+    return ''.join(char for char in decomposed if not unicodedata.combining(char)).strip()
+
+
+def name_keys(pk, name):
+    #one key per word start, so 'nol' finds 'Christopher Nolan' as well as 'chris' does
+    words = fold(name).split()
+    return [f"{' '.join(words[i:])}{SEPARATOR}{pk}" for i in range(len(words))]
+
+
+class PrefixIndex:
+    #lookups read one (keys, names) snapshot without the lock; writes build a new snapshot and swap the
+    #reference under the lock, so a lookup never walks a list that is being changed
+    def __init__(self, model):
+        self.model = model
+        self.snapshot = ([], {})
+        self.built_at = None
+        self.lock = threading.Lock()
+        self.build_lock = threading.Lock()
+
+    def is_stale(self):
+        max_age = getattr(settings, 'MOVIEHUB_TYPEAHEAD_MAX_AGE', 300)
+        return self.built_at is None or time.monotonic() - self.built_at > max_age
+
+    def build(self):
+        names = dict(self.model.objects.values_list('id', 'name'))
+        keys = sorted(key for pk, name in names.items() for key in name_keys(pk, name))
+        with self.lock:
+            self.snapshot, self.built_at = (keys, names), time.monotonic()
+
+    def refresh(self):
+        #one thread rebuilds a stale index while the others answer from the current snapshot; before the
+        #first build there is nothing to answer from, so they wait for it
+        if not self.build_lock.acquire(blocking=self.built_at is None):
+            return
+        try:
+            if self.is_stale():
+                self.build()
+        finally:
+            self.build_lock.release()
+
+    def lookup(self, prefix, limit=10):
+        #the first matches in alphabetical order of the matched words, one entry per id
+        if self.is_stale():
+            self.refresh()
+        prefix = ' '.join(fold(prefix).split())
+        if not prefix:
+            return []
+        keys, names = self.snapshot
+        results, seen = [], set()
+        for position in range(bisect_left(keys, prefix), len(keys)):
+            key = keys[position]
+            if not key.startswith(prefix) or len(results) >= limit:
+                break
+            pk = int(key.rsplit(SEPARATOR, 1)[1])
+            if pk not in seen and pk in names:
+                seen.add(pk)
+                results.append({'id': pk, 'name': names[pk]})
+        return results
+
+    def update(self, pk, name):
+        #insert or rename one row, a no-op until the index is first used
+        if self.built_at is None:
+            return
+        with self.lock:
+            keys, names = self._without(pk)
+            names[pk] = name
+            #timsort merges the few new keys into the sorted copy in linear time
+            self.snapshot = (sorted(keys + name_keys(pk, name)), names)
+
+    def remove(self, pk):
+        if self.built_at is None:
+            return
+        with self.lock:
+            self.snapshot = self._without(pk)
+
+    def _without(self, pk):
+        #copies of the current keys and names without the row
+        keys, names = self.snapshot
+        names = dict(names)
+        name = names.pop(pk, None)
+        if name is None:
+            return list(keys), names
+        dropped = set(name_keys(pk, name))
+        return [key for key in keys if key not in dropped], names
+
+    def clear(self):
+        with self.lock:
+            self.snapshot, self.built_at = ([], {}), None
+
+
+INDEXES = {'director': PrefixIndex(Director), 'actor': PrefixIndex(Actor)}
+MODEL_INDEXES = {index.model: index for index in INDEXES.values()}
+
+
+def typeahead(kind, prefix, limit=10):
+    return INDEXES[kind].lookup(prefix, max(1, min(limit, MAX_LIMIT)))
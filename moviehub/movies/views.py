@@ -1,8 +1,13 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.http import JsonResponse
-from django.db.models import Count, F, Sum, Q, Avg
+from django.db.models import Q
 from .models import Movie, Director, Actor, MovieActor, ContentRating, Language, Genre
+from .cache import cached
+from .leaderboards import top_directors as rank_directors, top_movies as rank_movies
 from .forms import MovieForm
+from .pagination import lazy_page, paginate_without_count
+from .search import filter_initial, filter_matching
+from .similar import similar_movies
 
 def frontend_home_view(request):
     #render the frontend homepage
@@ -21,24 +26,27 @@ def movie_list(request):
 
     #sort the movies based on the parameters
     if sort_by == 'title':
-        movies = Movie.objects.order_by('-title') if order == 'desc' else Movie.objects.order_by('title')
+        movies = Movie.objects.order_by('-title', '-id') if order == 'desc' else Movie.objects.order_by('title', 'id')
     else:
-        movies = Movie.objects.all()
+        movies = Movie.objects.order_by('id')
     
     #filter movies by initial letter if provided
     if initial:
-        movies = movies.filter(title__istartswith=initial)
+        movies = filter_initial(movies, 'title', initial)
     
-    #filter movies by search query if provided
+    #filter movies by search query if provided, through the full-text index
     if search_query:
-        movies = movies.filter(title__icontains=search_query)
+        movies = filter_matching(movies, search_query)
 
+    #render one page at a time, the id breaks ties between equal titles so pages do not overlap. the page is
+    #only fetched when its cached fragment is missing
+    movies = lazy_page(request, movies)
     return render(request, 'movies/movie_list.html', {'movies': movies, 'sort_by': sort_by, 'order': order, 'initial': initial, 'search_query': search_query})
 
 def movie_detail(request, pk):
-    #get a single movie by primary key and render its detail view
-    movie = get_object_or_404(Movie, pk=pk)
-    return render(request, 'movies/movie_detail.html', {'movie': movie})
+    #get a single movie by primary key with its related objects loaded up front and render its detail view
+    movie = get_object_or_404(Movie.objects.with_details(), pk=pk)
+    return render(request, 'movies/movie_detail.html', {'movie': movie, 'similar_movies': similar_movies(pk)})
 
 def movie_create(request):
     #create a new movie using a form
@@ -76,20 +84,21 @@ def top_grossing_movies_view(request):
     return render(request, 'movies/top_grossing_movies.html')
 
 def top_movies_by_imdb(request):
-    #order movies by IMDb score in descending order and limit to the top 10
-    movies = Movie.objects.order_by('-imdb_score')[:10]
+    #order movies by IMDb score in descending order and limit to the top 10, cached until the catalogue changes
+    movies = cached('top_movies_by_imdb', rank_movies, 'imdb_score', 10)
     return render(request, 'movies/top_movies_by_imdb.html', {'movies': movies})
 
 
 def movies_by_year_genre(request):
-    #filter movies by year and genre
-    years = Movie.objects.values_list('year', flat=True).distinct().order_by('year')
+    #filter movies by year and genre. the dropdowns and the page are cached fragments of the template, so the
+    #years are passed as the method and queried, like the querysets, only on a miss
+    years = Movie.objects.distinct_years
     genres = Genre.objects.all()
     
     selected_year = request.GET.get('year')
     selected_genre = request.GET.get('genre')
 
-    movies = Movie.objects.all()
+    movies = Movie.objects.order_by('title', 'id')
     if selected_year:
         movies = movies.filter(year=selected_year)
     if selected_genre:
@@ -98,7 +107,7 @@ def movies_by_year_genre(request):
     return render(request, 'movies/movies_by_year_genre.html', {
         'years': years,
         'genres': genres,
-        'movies': movies,
+        'movies': lazy_page(request, movies),
         'selected_year': selected_year,
         'selected_genre': selected_genre,
     })
@@ -106,35 +115,35 @@ def movies_by_year_genre(request):
 
 
 def movies_by_content_rating(request):
-    #filter movies by content rating
+    #filter movies by content rating, the dropdown and the page are cached fragments of the template
     content_ratings = ContentRating.objects.all()
     
     selected_rating = request.GET.get('rating')
 
-    movies = Movie.objects.all()
+    movies = Movie.objects.order_by('title', 'id')
     if selected_rating:
         movies = movies.filter(content_rating__rating=selected_rating)
 
     return render(request, 'movies/movies_by_content_rating.html', {
         'content_ratings': content_ratings,
-        'movies': movies,
+        'movies': lazy_page(request, movies),
         'selected_rating': selected_rating,
     })
 
 
 def movies_by_language(request):
-    #filter movies by language
+    #filter movies by language, the dropdown and the page are cached fragments of the template
     languages = Language.objects.all()
     
     selected_language = request.GET.get('language')
 
-    movies = Movie.objects.all()
+    movies = Movie.objects.order_by('title', 'id')
     if selected_language:
         movies = movies.filter(language__name=selected_language)
 
     return render(request, 'movies/movies_by_language.html', {
         'languages': languages,
-        'movies': movies,
+        'movies': lazy_page(request, movies),
         'selected_language': selected_language,
     })
 
@@ -153,33 +162,32 @@ def directors_list(request):
     if sort_by == 'name':
         directors = Director.objects.order_by('-name') if order == 'desc' else Director.objects.order_by('name')
     else:
-        directors = Director.objects.all()
+        directors = Director.objects.order_by('id')
     
     #filter directors by initial letter if provided
     if initial:
-        directors = directors.filter(name__istartswith=initial)
+        directors = filter_initial(directors, 'name', initial)
     
-    #filter directors by search query if provided
+    #filter directors by search query if provided, through the full-text index
     if search_query:
-        directors = directors.filter(name__icontains=search_query)
+        directors = filter_matching(directors, search_query)
 
+    directors = paginate_without_count(request, directors)
     return render(request, 'movies/directors_list.html', {'directors': directors, 'sort_by': sort_by, 'order': order, 'initial': initial, 'search_query': search_query})
 
 def top_directors(request):
-    #aggregate the total gross earnings for each director and sort them in descending order
-    directors = Director.objects.annotate(total_gross=Sum('movie__gross')).order_by('-total_gross')[:10]
+    #read the total gross earnings of each director from the precomputed stats, sorted in descending order
+    directors = cached('top_directors', rank_directors, 'total_gross', 10)
     return render(request, 'movies/top_directors.html', {'directors': directors})
 
 def top_versatile_directors(request):
-    #annotate each director with the count of unique actors they've worked with
-    directors = Director.objects.annotate(
-        unique_actors=Count('movie__movieactor__actor', distinct=True)
-    ).order_by('-unique_actors')[:5]
+    #read the count of unique actors each director has worked with from the precomputed stats
+    directors = cached('top_versatile_directors', rank_directors, 'unique_actors', 5)
     return render(request, 'movies/top_versatile_directors.html', {'directors': directors})
 
 def top_directors_by_imdb_view(request):
-    #calculate the average IMDb score for each director's movies and return the top 10 directors
-    directors = Director.objects.annotate(average_imdb=Avg('movie__imdb_score')).order_by('-average_imdb')[:10]
+    #read the average IMDb score of each director's movies from the precomputed stats and return the top 10 directors
+    directors = cached('top_directors_by_imdb', rank_directors, 'average_imdb', 10)
     return render(request, 'movies/top_directors_by_imdb.html', {'directors': directors})
 
 
@@ -197,16 +205,17 @@ def actors_list(request):
     if sort_by == 'name':
         actors = Actor.objects.order_by('-name') if order == 'desc' else Actor.objects.order_by('name')
     else:
-        actors = Actor.objects.all()
+        actors = Actor.objects.order_by('id')
     
     #filter actors by initial letter if provided
     if initial:
-        actors = actors.filter(name__istartswith=initial)
+        actors = filter_initial(actors, 'name', initial)
     
-    #filter actors by search query if provided
+    #filter actors by search query if provided, through the full-text index
     if search_query:
-        actors = actors.filter(name__icontains=search_query)
+        actors = filter_matching(actors, search_query)
 
+    actors = paginate_without_count(request, actors)
     return render(request, 'movies/actors_list.html', {'actors': actors, 'sort_by': sort_by, 'order': order, 'initial': initial, 'search_query': search_query})
 
 def actors_with_director_view(request):
@@ -216,18 +225,16 @@ def actors_with_director_view(request):
 
 
 def movies_by_actor(request):
-    #filter: select an actor and see all movies they're in
-    actors = Actor.objects.all()
-    
+    #filter: select an actor and see all movies they're in, the actor names are suggested by the typeahead api
+    #and the page is a cached fragment of the template
     selected_actor = request.GET.get('actor')
 
-    movies = Movie.objects.all()
+    movies = Movie.objects.order_by('title', 'id')
     if selected_actor:
         movies = movies.filter(actors__name=selected_actor)
 
     return render(request, 'movies/movies_by_actor.html', {
-        'actors': actors,
-        'movies': movies,
+        'movies': lazy_page(request, movies),
         'selected_actor': selected_actor,
     })
 